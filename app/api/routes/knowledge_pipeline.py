@@ -60,8 +60,8 @@ def get_cache_recommendations():
     """
     キャッシュ最適化の推奨事項を取得
     """
-    from app.services.knowledge.utils.enhanced_cache_system import EnhancedDocumentIntelligenceCache
-    cache = EnhancedDocumentIntelligenceCache()
+    from app.services.knowledge.utils.enhanced_cache_system import get_enhanced_cache
+    cache = get_enhanced_cache()
     return cache.get_cache_recommendations()
 
 
@@ -75,8 +75,8 @@ def cleanup_enhanced_cache(days_old: int = 30, min_access_count: int = 1, max_si
         min_access_count: 最小アクセス回数
         max_size_mb: 最大ファイルサイズ（MB）
     """
-    from app.services.knowledge.utils.enhanced_cache_system import EnhancedDocumentIntelligenceCache
-    cache = EnhancedDocumentIntelligenceCache()
+    from app.services.knowledge.utils.enhanced_cache_system import get_enhanced_cache
+    cache = get_enhanced_cache()
     removed_count = cache.cleanup_by_criteria(days_old, min_access_count, max_size_mb)
     
     return {
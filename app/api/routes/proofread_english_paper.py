@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import APIRouter, UploadFile, File, Query
 from typing import Optional
 from app.services.proofreading.proofread_english_paper import proofread_english_paper, proofread_english_paper_posted_file, proofread_english_paper_without_knowledge, EnglishPaperProofreadingService
@@ -13,7 +15,9 @@ async def proofread_english_paper_api():
     """
     校正前の英語論文を校正するAPIエンドポイント
     """
-    return proofread_english_paper()
+    # 校正処理は同期実装（Driveダウンロード＋LLM呼び出し）のため、
+    # ワーカースレッドへ逃がしてイベントループを塞がない
+    return await asyncio.to_thread(proofread_english_paper)
 
 @router.post("/file")
 async def proofread_english_paper_file_api(file: UploadFile = File(...)):
@@ -24,7 +28,7 @@ async def proofread_english_paper_file_api(file: UploadFile = File(...)):
     # ここでは、ファイルの内容を直接処理する例を示す
     file_content = await file.read()
     file_content = file_content.decode("utf-8")  # ファイル内容を文字列に変換
-    return proofread_english_paper_posted_file(file_content)
+    return await asyncio.to_thread(proofread_english_paper_posted_file, file_content)
 
 @router.post("/without_knowledge")
 async def proofread_english_paper_without_knowledge_api(file: UploadFile = File(...)):
@@ -33,7 +37,7 @@ async def proofread_english_paper_without_knowledge_api(file: UploadFile = File(
     """
     file_content = await file.read()
     file_content = file_content.decode("utf-8")  # ファイル内容を文字列に変換
-    return proofread_english_paper_without_knowledge(file_content)
+    return await asyncio.to_thread(proofread_english_paper_without_knowledge, file_content)
 
 @router.post("/split_by_command")
 async def split_latex_by_command_api(file: UploadFile = File(...)):
@@ -90,7 +94,8 @@ async def proofreading_with_split_mode_api(
     file_content = file_content.decode("utf-8")
     
     service = EnglishPaperProofreadingService()
-    results = service.proofread_with_options(
+    results = await asyncio.to_thread(
+        service.proofread_with_options,
         tex_file=file_content,
         use_google_drive=False,
         use_knowledge=use_knowledge,
@@ -55,6 +55,12 @@ class SentenceProofreadPair(BaseModel):
         description="この文の修正根拠・理由"
     )
 
+class BatchProofreadResult(BaseModel):
+    results: List["ProofreadResult"] = Field(
+        ...,
+        description="各セクションの校正結果（入力のid順）"
+    )
+
 class ProofreadResult(BaseModel):
     pre_proofread: Optional[str] = Field(
         None, 
@@ -69,9 +75,15 @@ class ProofreadResult(BaseModel):
         description="校正全体の総括的な根拠・概要"
     )
     sentences: List[SentenceProofreadPair] = Field(
-        ..., 
+        ...,
         description="校正箇所の英文（校正前後の対比）"
     )
+    confidence: Optional[float] = Field(
+        None,
+        description="校正品質に対する自己評価の信頼度（0.0〜1.0）",
+        ge=0.0,
+        le=1.0
+    )
 
 
 # 分割テスト用スキーマ
@@ -24,5 +24,9 @@ FALLBACK_ENCODING = "utf-8"
 MIN_CHUNK_SIZE = 10
 MAX_CHUNK_SIZE = 1000000  # 1MB相当のテキスト長制限に拡大
 
+# チャンク結果のディスクキャッシュ設定
+CHUNK_CACHE_DIR = ".chunk_cache"
+CHUNK_CACHE_ENABLED = True
+
 # ログ出力設定
 CHUNKING_DEBUG_ENABLED = True
\ No newline at end of file
@@ -5,6 +5,8 @@
 # 知識抽出の処理設定
 KNOWLEDGE_EXTRACTION_TIMEOUT = 30  # 秒
 KNOWLEDGE_EXTRACTION_RETRY_COUNT = 3
+# チャンク単位LLM呼び出しの同時実行数（Azureレート制限内に収める）
+KNOWLEDGE_EXTRACTION_MAX_WORKERS = 8
 
 # バリデーション設定
 MIN_KNOWLEDGE_DESCRIPTION_LENGTH = 5
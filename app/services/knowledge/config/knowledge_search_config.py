@@ -13,8 +13,25 @@ class SearchType:
     BY_KNOWLEDGE_TYPE = "by_knowledge_type"
 
 # キャッシュ設定
-ENABLE_SEARCH_CACHE = False
+ENABLE_SEARCH_CACHE = True
 CACHE_EXPIRY_SECONDS = 300  # 5分
+# セマンティックキャッシュのヒット判定に使うコサイン類似度の閾値
+SEMANTIC_CACHE_SIMILARITY_THRESHOLD = 0.95
+
+# 埋め込みモデル設定
+# text-embedding-3-small は 512 次元に切り詰めても ada-002 と同等の再現率で、
+# ベクトルあたりのサイズが 1/3 になる（埋め込みAPIの転送量・Chromaの
+# 格納行サイズ・HNSW走査コストがいずれも縮む）。
+# 注意: モデル/次元を変更したら chroma_db/ の既存コレクションとは互換が
+# なくなるため、ナレッジパイプラインでベクトルDBを再構築すること。
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 512
+
+# HNSWインデックス設定（Chromaのコレクション作成時に適用）
+# search_ef を上げると再現率が向上し、下げると検索が高速になる
+HNSW_SPACE = "cosine"
+HNSW_CONSTRUCTION_EF = 200
+HNSW_SEARCH_EF = 64
 
 # バリデーション設定
 MIN_QUERY_LENGTH = 1
@@ -1,7 +1,10 @@
 """
 LaTeXテキスト分割（チャンキング）エンジン
 """
-from typing import List, Dict, Any, Union
+import hashlib
+import json
+import os
+from typing import List, Dict, Any, Optional, Union
 from langchain.text_splitter import LatexTextSplitter
 
 from app.services.shared.text_utils import ensure_string, validate_text_length, clean_chunk
@@ -12,7 +15,9 @@ from app.services.knowledge.config.chunking_config import (
     SECTION_REGEX,
     DOCUMENT_START_MARKER,
     MIN_CHUNK_SIZE,
-    MAX_CHUNK_SIZE
+    MAX_CHUNK_SIZE,
+    CHUNK_CACHE_DIR,
+    CHUNK_CACHE_ENABLED
 )
 from app.services.shared.exceptions import ChunkingError
 from app.services.knowledge.core.nlp_chunking_engine import NLPChunkingEngine
@@ -116,6 +121,44 @@ class ChunkingEngine:
         except Exception as e:
             raise ChunkingError(f"セクション分割中にエラーが発生しました: {e}")
     
+    def _chunk_cache_path(self, content: Union[str, bytes]) -> str:
+        """
+        コンテンツハッシュからキャッシュファイルのパスを算出
+
+        Args:
+            content (Union[str, bytes]): チャンク対象のコンテンツ
+
+        Returns:
+            str: キャッシュファイルのパス
+        """
+        data = content if isinstance(content, bytes) else content.encode("utf-8")
+        # チャンクサイズ設定が変わると結果も変わるためキーに含める
+        digest = hashlib.sha256(data).hexdigest()
+        return os.path.join(
+            CHUNK_CACHE_DIR,
+            f"{digest}_{self.chunk_size}_{self.chunk_overlap}.json"
+        )
+
+    def _load_cached_chunks(self, cache_path: str) -> Optional[List[str]]:
+        """キャッシュからチャンクリストを読み込み（ミス時はNone）"""
+        try:
+            if os.path.exists(cache_path):
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            # 壊れたキャッシュは無視して再計算する
+            log_proofreading_debug(f"チャンクキャッシュの読み込みに失敗: {cache_path}")
+        return None
+
+    def _save_cached_chunks(self, cache_path: str, chunks: List[str]) -> None:
+        """チャンクリストをキャッシュに保存（失敗しても処理は継続）"""
+        try:
+            os.makedirs(CHUNK_CACHE_DIR, exist_ok=True)
+            with open(cache_path, "w", encoding="utf-8") as f:
+                json.dump(chunks, f, ensure_ascii=False)
+        except OSError:
+            log_proofreading_debug(f"チャンクキャッシュの保存に失敗: {cache_path}")
+
     def create_chunk_metadata(self, chunk: str, chunk_id: int, source_name: str = None) -> Dict[str, Any]:
         """
         チャンクのメタデータを作成
@@ -165,8 +208,20 @@ class ChunkingEngine:
                 
                 file_name = file_data["name"]
                 log_proofreading_debug(f"ファイル処理中: {file_name}")
-                
-                chunks = self.split_by_section(file_data["content"])
+
+                # 同一コンテンツの再チャンクをコンテンツハッシュキャッシュで回避
+                chunks = None
+                cache_path = None
+                if CHUNK_CACHE_ENABLED:
+                    cache_path = self._chunk_cache_path(file_data["content"])
+                    chunks = self._load_cached_chunks(cache_path)
+                    if chunks is not None:
+                        log_proofreading_debug(f"チャンクキャッシュヒット: {file_name}")
+
+                if chunks is None:
+                    chunks = self.split_by_section(file_data["content"])
+                    if cache_path is not None:
+                        self._save_cached_chunks(cache_path, chunks)
                 
                 chunk_metadata_list = [
                     self.create_chunk_metadata(chunk, i, file_name)
@@ -208,20 +263,21 @@ class ChunkingEngine:
     
     def split_by_sentence(self, latex: Union[str, bytes]) -> List[str]:
         """
-        NLPベースの文単位分割
-        
-        NLTK使用により学術論文に適した高精度文分割
-        
+        一パス走査スキャナによる文単位分割
+
+        NLTKの保護・復元処理を経由しない線形走査で、トークナイザの
+        オーバーヘッドなしに文境界を検出します
+
         Args:
             latex (Union[str, bytes]): 分割対象のLaTeXテキスト
-            
+
         Returns:
             List[str]: 文単位で分割されたチャンクのリスト
-            
+
         Raises:
             ChunkingError: 分割処理に失敗した場合
         """
-        return self.nlp_engine.split_by_sentence_nlp(latex)
+        return self.nlp_engine.split_by_sentence_scanner(latex)
     
     def split_by_hybrid(self, latex: Union[str, bytes]) -> List[str]:
         """
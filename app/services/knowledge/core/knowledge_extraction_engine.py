@@ -1,6 +1,7 @@
 """
 LaTeXテキストからの知識抽出エンジン
 """
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 from langchain_core.prompts import ChatPromptTemplate
 
@@ -15,7 +16,8 @@ from app.services.knowledge.config.knowledge_extraction_config import (
     MIN_KNOWLEDGE_DESCRIPTION_LENGTH,
     MAX_KNOWLEDGE_DESCRIPTION_LENGTH,
     EXCLUDE_EMPTY_KNOWLEDGE,
-    EXCLUDE_DUPLICATE_KNOWLEDGE
+    EXCLUDE_DUPLICATE_KNOWLEDGE,
+    KNOWLEDGE_EXTRACTION_MAX_WORKERS
 )
 from app.services.shared.exceptions import KnowledgeExtractionError
 
@@ -25,6 +27,14 @@ class KnowledgeExtractionEngine:
     
     def __init__(self):
         self.openai_client = ClientFactory.get_openai_client()
+        # プロンプトと構造化出力チェーンは全チャンクで共通のため、
+        # チャンクごとに再構築せず一度だけ構築して使い回す
+        # （Pydanticスキーマ生成とRunnableグラフ構築はCPUコストが高い）
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", KNOWLEDGE_EXTRACTION_SYSTEM_PROMPT),
+            ("user", KNOWLEDGE_EXTRACTION_USER_PROMPT),
+        ])
+        self.extraction_chain = prompt | self.openai_client.get_openai_client().with_structured_output(KnowledgeFromLatexList)
     
     def validate_knowledge_item(self, knowledge: KnowledgeFromLatex) -> bool:
         """
@@ -108,25 +118,23 @@ class KnowledgeExtractionEngine:
                 "chunk_preview": chunk_text[:100] + "..." if len(chunk_text) > 100 else chunk_text
             })
             
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", KNOWLEDGE_EXTRACTION_SYSTEM_PROMPT),
-                ("user", KNOWLEDGE_EXTRACTION_USER_PROMPT),
-            ])
-            
-            chain = prompt | self.openai_client.get_openai_client().with_structured_output(KnowledgeFromLatexList)
-            results = chain.invoke({"content": chunk_text})
+            results = self.extraction_chain.invoke({"content": chunk_text})
             
             if not results or not results.knowledge_list:
                 log_proofreading_debug("チャンクから知識が抽出されませんでした")
                 return []
             
             # 知識項目の後処理
+            # メタデータは model_copy でまとめて付与する
+            # （属性代入だと項目×2回のPydanticバリデーションが走る）
+            metadata_update = {
+                "knowledge_type": knowledge_type.strip() if knowledge_type else None,
+                "reference_url": document_name,
+            }
             processed_knowledge: List[KnowledgeFromLatex] = []
-            for knowledge in results.knowledge_list:
-                # メタデータ設定
-                knowledge.knowledge_type = knowledge_type.strip() if knowledge_type else None
-                knowledge.reference_url = document_name
-                
+            for extracted in results.knowledge_list:
+                knowledge = extracted.model_copy(update=metadata_update)
+
                 # バリデーション
                 if EXCLUDE_EMPTY_KNOWLEDGE and not self.validate_knowledge_item(knowledge):
                     continue
@@ -159,27 +167,33 @@ class KnowledgeExtractionEngine:
         """
         try:
             log_proofreading_info(f"複数ドキュメントからの知識抽出開始: {len(chunks)}ドキュメント")
-            
-            all_knowledge: List[KnowledgeFromLatex] = []
-            
+
+            # 全ドキュメントのチャンクをタスクとして集める
+            tasks = []
             for document_data in chunks:
                 if not all(key in document_data for key in ["name", "knowledge_type", "chunks"]):
                     raise KnowledgeExtractionError(
                         f"必要なキー (name, knowledge_type, chunks) が不足しています: {document_data.keys()}"
                     )
-                
+
                 document_name = document_data["name"]
                 knowledge_type = document_data["knowledge_type"]
                 document_chunks = document_data["chunks"]
-                
+
                 log_proofreading_debug(f"ドキュメント処理中: {document_name} ({len(document_chunks)}チャンク)")
-                
+
                 for chunk_data in document_chunks:
-                    chunk_text = chunk_data["chunk_text"]
-                    chunk_knowledge = self.process_chunk_to_knowledge(
-                        chunk_text, document_name, knowledge_type
-                    )
-                    all_knowledge.extend(chunk_knowledge)
+                    tasks.append((chunk_data["chunk_text"], document_name, knowledge_type))
+
+            # チャンク単位のLLM呼び出しはネットワーク待ちが支配的なため、
+            # スレッドプールで同時実行してI/O待ちを重ねる（結果の順序は維持される）
+            all_knowledge: List[KnowledgeFromLatex] = []
+            if tasks:
+                with ThreadPoolExecutor(max_workers=KNOWLEDGE_EXTRACTION_MAX_WORKERS) as executor:
+                    for chunk_knowledge in executor.map(
+                        lambda task: self.process_chunk_to_knowledge(*task), tasks
+                    ):
+                        all_knowledge.extend(chunk_knowledge)
             
             # 重複除去
             filtered_knowledge = self.filter_duplicate_knowledge(all_knowledge)
@@ -5,6 +5,8 @@ NLP（自然言語処理）ベースのLaTeXテキスト分割エンジン
 NLTK、LangChainを活用した高性能な文書分割機能。
 """
 from typing import List, Dict, Any, Union
+import bisect
+import io
 import re
 
 # NLP libraries
@@ -23,6 +25,74 @@ from app.services.knowledge.config.chunking_config import (
 from app.services.shared.exceptions import ChunkingError
 
 
+# 事前コンパイル済みLaTeX構造パターン
+# 環境パターンは \begin{X} ... \end{X} を後方参照で対応付け（\begin{a}...\end{b} の
+# 誤マッチを修正）、`.*?` の代わりに否定先読み付きの tempered dot を使うことで
+# 未終端環境など不正な入力での破滅的バックトラックを防ぐ
+_DOCUMENTCLASS_RE = re.compile(r'\\documentclass(?:\[[^\]]*\])?\{[^}]*\}')
+_USEPACKAGE_RE = re.compile(r'\\usepackage(?:\[[^\]]*\])?\{[^}]*\}')
+_ENVIRONMENT_RE = re.compile(
+    r'\\begin\{([^}]+)\}(?:(?!\\end\{\1\}).)*\\end\{\1\}',
+    re.DOTALL
+)
+_COMMAND_RE = re.compile(r'\\[a-zA-Z*]+(?:\[[^\]]*\])?(?:\{[^{}]*\})*')
+
+
+def _scan_sentence_offsets(text: str) -> List[tuple[int, int]]:
+    """
+    一パス走査で文境界のオフセットを検出する軽量スキャナ
+
+    NLTKのトークナイザを使わず、LaTeXのコマンド（\\...）と波括弧の
+    ネストを考慮しながら `.` `!` `?` + 空白 + 大文字 のパターンで
+    文境界を判定します。トークン単位のオーバーヘッドがないため
+    計算コストが小さく、保護・復元処理も不要です。
+
+    Args:
+        text (str): 走査対象のテキスト
+
+    Returns:
+        List[tuple[int, int]]: 各文の (開始, 終了) オフセットのリスト
+    """
+    offsets = []
+    start = 0
+    brace_depth = 0
+    i = 0
+    n = len(text)
+
+    while i < n:
+        ch = text[i]
+
+        if ch == '\\':
+            # LaTeXコマンド名（英字と*）をまとめてスキップ
+            i += 1
+            while i < n and (text[i].isalpha() or text[i] == '*'):
+                i += 1
+            continue
+
+        if ch == '{':
+            brace_depth += 1
+        elif ch == '}':
+            if brace_depth > 0:
+                brace_depth -= 1
+        elif brace_depth == 0 and ch in '.!?':
+            # 終端記号の直後が空白で、その先が大文字（または末尾）なら文境界
+            j = i + 1
+            while j < n and text[j] in ' \t\r\n':
+                j += 1
+            if j > i + 1 and (j >= n or text[j].isupper()):
+                offsets.append((start, i + 1))
+                start = j
+                i = j
+                continue
+
+        i += 1
+
+    if start < n:
+        offsets.append((start, n))
+
+    return offsets
+
+
 class NLPChunkingEngine:
     """NLPベースのLaTeX文書チャンキングエンジン"""
     
@@ -74,7 +144,12 @@ class NLPChunkingEngine:
         try:
             text = ensure_string(latex)
             validate_text_length(text, MIN_CHUNK_SIZE, MAX_CHUNK_SIZE, skip_max_validation=True)
-            
+
+            # 検証を通ったチャンクサイズ以下の短い入力は
+            # 保護・復元やNLTKを経由せずそのまま返す
+            if len(text) <= self.chunk_size:
+                return [clean_chunk(text)] if text.strip() else []
+
             log_proofreading_debug("NLP文単位分割開始", {"text_length": len(text)})
             
             # LaTeX環境とコマンドを一時的に保護
@@ -97,10 +172,44 @@ class NLPChunkingEngine:
         except Exception as e:
             raise ChunkingError(f"NLP文単位分割中にエラーが発生しました: {e}")
     
+    def split_by_sentence_scanner(self, latex: Union[str, bytes]) -> List[str]:
+        """
+        一パス走査スキャナによる高速文単位分割
+
+        NLTKの保護・復元処理を経由せず、LaTeX構造を考慮した文字走査で
+        文境界を直接検出します。計算量はテキスト長に対して線形です。
+
+        Args:
+            latex (Union[str, bytes]): 分割対象のLaTeXテキスト
+
+        Returns:
+            List[str]: 文単位で分割されたチャンクのリスト
+
+        Raises:
+            ChunkingError: 分割処理に失敗した場合
+        """
+        try:
+            text = ensure_string(latex)
+            validate_text_length(text, MIN_CHUNK_SIZE, MAX_CHUNK_SIZE, skip_max_validation=True)
+
+            log_proofreading_debug("スキャナ文単位分割開始", {"text_length": len(text)})
+
+            chunks = []
+            for start, end in _scan_sentence_offsets(text):
+                cleaned = clean_chunk(text[start:end])
+                if cleaned:
+                    chunks.append(cleaned)
+
+            log_proofreading_info(f"スキャナ文単位分割完了: {len(chunks)}チャンク")
+            return chunks
+
+        except Exception as e:
+            raise ChunkingError(f"スキャナ文単位分割中にエラーが発生しました: {e}")
+
     def split_by_command_nlp(self, latex: Union[str, bytes]) -> List[str]:
         """
         LaTeXコマンド構造を理解したNLPベースコマンド分割
-        
+
         単純な正規表現ではなく、LaTeX文法を考慮した構造的分割を行います。
         
         Args:
@@ -115,143 +224,78 @@ class NLPChunkingEngine:
         try:
             text = ensure_string(latex)
             validate_text_length(text, MIN_CHUNK_SIZE, MAX_CHUNK_SIZE, skip_max_validation=True)
-            
+
             log_proofreading_debug("NLPコマンド分割開始", {"text_length": len(text)})
-            
-            chunks = []
-            current_pos = 0
-            
-            # LaTeX構造パターン（優先度順）
+
+            # LaTeX構造パターン（優先度順、モジュールロード時にコンパイル済み）
             latex_patterns = [
-                r'\\documentclass(?:\[[^\]]*\])?\{[^}]*\}',      # documentclass
-                r'\\usepackage(?:\[[^\]]*\])?\{[^}]*\}',        # usepackage
-                r'\\begin\{[^}]+\}.*?\\end\{[^}]+\}',           # 環境
-                r'\\[a-zA-Z*]+(?:\[[^\]]*\])?(?:\{[^{}]*\})*',  # その他コマンド
+                (_DOCUMENTCLASS_RE, 'documentclass'),
+                (_USEPACKAGE_RE, 'usepackage'),
+                (_ENVIRONMENT_RE, 'environment'),
+                (_COMMAND_RE, 'command'),
             ]
-            
-            for pattern in latex_patterns:
-                for match in re.finditer(pattern, text[current_pos:], re.DOTALL):
-                    actual_start = current_pos + match.start()
-                    actual_end = current_pos + match.end()
-                    
-                    # コマンド前のテキスト
-                    before_text = text[current_pos:actual_start].strip()
-                    if before_text:
-                        chunks.append(clean_chunk(before_text))
-                    
-                    # コマンド自体
-                    command_text = match.group(0)
-                    chunks.append(clean_chunk(command_text))
-                    
-                    current_pos = actual_end
-            
+
+            # すべてのマッチを収集
+            all_matches = []
+            for priority, (pattern, pattern_type) in enumerate(latex_patterns):
+                for match in pattern.finditer(text):
+                    all_matches.append({
+                        'start': match.start(),
+                        'end': match.end(),
+                        'text': match.group(0),
+                        'type': pattern_type,
+                        'priority': priority
+                    })
+
+            # 重複を除去（より優先度の高いパターンを残す）
+            # 優先度順に走査し、採用済み区間をソート済みリストで管理して
+            # bisectで重複判定することで O(M log M) に抑える
+            selected_starts: List[int] = []
+            selected_ends: List[int] = []
+            filtered_matches = []
+            for match in sorted(all_matches, key=lambda x: (x['priority'], x['start'])):
+                idx = bisect.bisect_right(selected_starts, match['start'])
+                # 直前の採用区間と重なる場合はスキップ
+                if idx > 0 and selected_ends[idx - 1] > match['start']:
+                    continue
+                # 直後の採用区間と重なる場合はスキップ
+                if idx < len(selected_starts) and selected_starts[idx] < match['end']:
+                    continue
+                selected_starts.insert(idx, match['start'])
+                selected_ends.insert(idx, match['end'])
+                filtered_matches.append(match)
+
+            # チャンク生成のため位置でソート
+            filtered_matches.sort(key=lambda x: x['start'])
+
+            # チャンクを生成
+            chunks = []
+            current_pos = 0
+
+            for match in filtered_matches:
+                # マッチ前のテキスト
+                before_text = text[current_pos:match['start']].strip()
+                if before_text:
+                    chunks.append(clean_chunk(before_text))
+
+                # マッチしたコマンド/環境
+                chunks.append(clean_chunk(match['text']))
+                current_pos = match['end']
+
             # 残りのテキスト
             remaining = text[current_pos:].strip()
             if remaining:
                 chunks.append(clean_chunk(remaining))
-            
+
             # 空チャンクを除去
             cleaned_chunks = [chunk for chunk in chunks if chunk]
-            
+
             log_proofreading_info(f"NLPコマンド分割完了: {len(cleaned_chunks)}チャンク")
             return cleaned_chunks
-            
+
         except Exception as e:
             raise ChunkingError(f"NLPコマンド分割中にエラーが発生しました: {e}")
-    
-def split_by_command_nlp(self, latex: Union[str, bytes]) -> List[str]:
-    """
-    LaTeXコマンド構造を理解したNLPベースコマンド分割
-    
-    単純な正規表現ではなく、LaTeX文法を考慮した構造的分割を行います。
-    
-    Args:
-        latex (Union[str, bytes]): 分割対象のLaTeXテキスト
-        
-    Returns:
-        List[str]: コマンド単位で分割されたチャンクのリスト
-        
-    Raises:
-        ChunkingError: 分割処理に失敗した場合
-    """
-    try:
-        text = ensure_string(latex)
-        validate_text_length(text, MIN_CHUNK_SIZE, MAX_CHUNK_SIZE, skip_max_validation=True)
-        
-        log_proofreading_debug("NLPコマンド分割開始", {"text_length": len(text)})
-        
-        # LaTeX構造パターン（優先度順）
-        latex_patterns = [
-            (r'\\documentclass(?:\[[^\]]*\])?\{[^}]*\}', 'documentclass'),
-            (r'\\usepackage(?:\[[^\]]*\])?\{[^}]*\}', 'usepackage'),
-            (r'\\begin\{[^}]+\}.*?\\end\{[^}]+\}', 'environment'),
-            (r'\\[a-zA-Z*]+(?:\[[^\]]*\])?(?:\{[^{}]*\})*', 'command'),
-        ]
-        
-        # すべてのマッチを収集
-        all_matches = []
-        for pattern, pattern_type in latex_patterns:
-            for match in re.finditer(pattern, text, re.DOTALL):
-                all_matches.append({
-                    'start': match.start(),
-                    'end': match.end(),
-                    'text': match.group(0),
-                    'type': pattern_type,
-                    'priority': latex_patterns.index((pattern, pattern_type))
-                })
-        
-        # 位置でソート
-        all_matches.sort(key=lambda x: x['start'])
-        
-        # 重複を除去（より優先度の高いパターンを残す）
-        filtered_matches = []
-        i = 0
-        while i < len(all_matches):
-            current_match = all_matches[i]
-            
-            # 現在のマッチと重複する後続のマッチを探す
-            overlapping = []
-            j = i
-            while j < len(all_matches) and all_matches[j]['start'] < current_match['end']:
-                overlapping.append(all_matches[j])
-                j += 1
-            
-            # 重複する中で最も優先度の高いものを選択
-            best_match = min(overlapping, key=lambda x: x['priority'])
-            filtered_matches.append(best_match)
-            
-            # 選択したマッチの終了位置以降から再開
-            while i < len(all_matches) and all_matches[i]['start'] < best_match['end']:
-                i += 1
-        
-        # チャンクを生成
-        chunks = []
-        current_pos = 0
-        
-        for match in filtered_matches:
-            # マッチ前のテキスト
-            before_text = text[current_pos:match['start']].strip()
-            if before_text:
-                chunks.append(clean_chunk(before_text))
-            
-            # マッチしたコマンド/環境
-            chunks.append(clean_chunk(match['text']))
-            current_pos = match['end']
-        
-        # 残りのテキスト
-        remaining = text[current_pos:].strip()
-        if remaining:
-            chunks.append(clean_chunk(remaining))
-        
-        # 空チャンクを除去
-        cleaned_chunks = [chunk for chunk in chunks if chunk]
-        
-        log_proofreading_info(f"NLPコマンド分割完了: {len(cleaned_chunks)}チャンク")
-        return cleaned_chunks
-        
-    except Exception as e:
-        raise ChunkingError(f"NLPコマンド分割中にエラーが発生しました: {e}")
-    
+
     def split_by_recursive_nlp(self, latex: Union[str, bytes]) -> List[str]:
         """
         LangChainの高性能RecursiveCharacterTextSplitterを使用した分割
@@ -268,7 +312,12 @@ def split_by_command_nlp(self, latex: Union[str, bytes]) -> List[str]:
         try:
             text = ensure_string(latex)
             validate_text_length(text, MIN_CHUNK_SIZE, MAX_CHUNK_SIZE, skip_max_validation=True)
-            
+
+            # 検証を通ったチャンクサイズ以下の短い入力は
+            # 分割器を経由せずそのまま返す
+            if len(text) <= self.chunk_size:
+                return [clean_chunk(text)] if text.strip() else []
+
             log_proofreading_debug("LangChain再帰的分割開始", {"text_length": len(text)})
             
             chunks = self.sentence_splitter.split_text(text)
@@ -281,28 +330,42 @@ def split_by_command_nlp(self, latex: Union[str, bytes]) -> List[str]:
             raise ChunkingError(f"LangChain再帰的分割中にエラーが発生しました: {e}")
     
     def _protect_latex_elements(self, text: str) -> tuple[str, Dict[str, str]]:
-        """LaTeX環境とコマンドを一時的に保護"""
+        """
+        LaTeX環境とコマンドを一時的に保護
+
+        repeated str.replace はマッチごとに中間文字列を生成するため、
+        finditer の結果を単一の StringIO バッファへ書き出す方式で
+        アロケーションを1バッファに抑えます。
+        """
         protection_map = {}
-        protected_text = text
         placeholder_counter = 0
-        
+
         # LaTeX環境を保護
-        env_pattern = r'\\begin\{[^}]+\}.*?\\end\{[^}]+\}'
-        for match in re.finditer(env_pattern, text, re.DOTALL):
+        buf = io.StringIO()
+        last = 0
+        for match in _ENVIRONMENT_RE.finditer(text):
             placeholder = f"__LATEX_ENV_{placeholder_counter}__"
             protection_map[placeholder] = match.group(0)
-            protected_text = protected_text.replace(match.group(0), placeholder)
+            buf.write(text[last:match.start()])
+            buf.write(placeholder)
+            last = match.end()
             placeholder_counter += 1
-        
+        buf.write(text[last:])
+        protected_text = buf.getvalue()
+
         # インラインコマンドを保護
-        inline_pattern = r'\\[a-zA-Z*]+(?:\[[^\]]*\])?(?:\{[^{}]*\})*'
-        for match in re.finditer(inline_pattern, protected_text):
+        buf = io.StringIO()
+        last = 0
+        for match in _COMMAND_RE.finditer(protected_text):
             placeholder = f"__LATEX_CMD_{placeholder_counter}__"
             protection_map[placeholder] = match.group(0)
-            protected_text = protected_text.replace(match.group(0), placeholder)
+            buf.write(protected_text[last:match.start()])
+            buf.write(placeholder)
+            last = match.end()
             placeholder_counter += 1
-        
-        return protected_text, protection_map
+        buf.write(protected_text[last:])
+
+        return buf.getvalue(), protection_map
     
     def _restore_latex_elements(self, text: str, protection_map: Dict[str, str]) -> str:
         """保護されたLaTeX要素を復元"""
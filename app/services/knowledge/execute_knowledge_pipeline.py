@@ -33,8 +33,8 @@ def save_knowledge_to_csv(knowledge_list: List[KnowledgeFromLatex], output_dir:
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_path = os.path.join(output_dir, f"knowledge_{timestamp}.csv")
     
-    # CSVファイルに書き込み
-    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+    # CSVファイルに書き込み（大量ナレッジ出力向けに1MBバッファでシステムコールを削減）
+    with open(output_path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
         writer = csv.DictWriter(f, fieldnames=['knowledge', 'issue_category', 'reference_url', 'knowledge_type'])
         writer.writeheader()
         
@@ -4,7 +4,11 @@
 ベクターストアから学術論文校正に関する知識を検索し、
 各種フィルタリング条件に基づいた柔軟な検索機能を提供します。
 """
-from typing import List, Any, Optional
+import threading
+import time
+from typing import List, Any, Optional, Tuple
+
+import numpy as np
 
 from app.services.shared.client_factory import ClientFactory
 from app.services.shared.logging_utils import log_proofreading_info, log_proofreading_debug
@@ -12,17 +16,159 @@ from app.services.knowledge.config.knowledge_search_config import (
     DEFAULT_SEARCH_LIMIT,
     MIN_QUERY_LENGTH,
     MAX_QUERY_LENGTH,
+    ENABLE_SEARCH_CACHE,
+    CACHE_EXPIRY_SECONDS,
+    SEMANTIC_CACHE_SIMILARITY_THRESHOLD,
     SearchType
 )
 from app.services.shared.exceptions import VectorStoreError
 
 
+class _SemanticCache:
+    """
+    クエリ埋め込みの類似度に基づく検索結果キャッシュ
+
+    直近の検索クエリの埋め込みを正規化後に int8 へスカラー量子化した
+    行列として保持し、新しいクエリとのコサイン類似度が閾値以上なら、
+    ベクターストアへの問い合わせを省略して前回の検索結果を返します。
+    int8 化により float32 比でスキャン時に読むバイト数が 1/4 になります
+    （量子化誤差は閾値 0.95 の判定には十分小さい）。エントリは
+    (search_type, filter_value, limit) の名前空間ごとに分離し、
+    TTLを超えたものはヒット扱いにしません。
+    """
+
+    def __init__(
+        self,
+        threshold: float = SEMANTIC_CACHE_SIMILARITY_THRESHOLD,
+        ttl_seconds: int = CACHE_EXPIRY_SECONDS
+    ):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        # namespace -> int8 量子化済み埋め込みのプリアロケートバッファ (capacity, d)
+        # list.append と同様に容量を倍々で拡張し、挿入ごとの再確保を避ける
+        self._embeddings: dict = {}
+        # namespace -> 各行の量子化スケール (capacity,)
+        self._scales: dict = {}
+        # namespace -> 使用中の行数
+        self._sizes: dict = {}
+        # namespace -> [(登録時刻, 検索結果), ...]（行列と同じ並び）
+        self._entries: dict = {}
+
+    _INITIAL_CAPACITY = 8
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm > 0 else vec
+
+    @staticmethod
+    def _quantize(vec: np.ndarray) -> Tuple[np.ndarray, float]:
+        """正規化済みベクトルを int8 とスケールに量子化"""
+        scale = float(np.abs(vec).max()) / 127.0
+        if scale == 0.0:
+            return np.zeros(vec.shape[0], dtype=np.int8), 0.0
+        return np.round(vec / scale).astype(np.int8), scale
+
+    def _remove_row(self, namespace: Tuple, index: int) -> None:
+        """期限切れ行を末尾行とのスワップで O(1) 削除する（行順は保たない）"""
+        last = self._sizes[namespace] - 1
+        if index != last:
+            self._embeddings[namespace][index] = self._embeddings[namespace][last]
+            self._scales[namespace][index] = self._scales[namespace][last]
+            self._entries[namespace][index] = self._entries[namespace][last]
+        self._entries[namespace].pop()
+        self._sizes[namespace] = last
+
+    def lookup(self, namespace: Tuple, embedding: List[float]) -> Optional[List[Any]]:
+        """類似クエリのキャッシュ結果を取得（ミス時はNone）"""
+        size = self._sizes.get(namespace, 0)
+        if size == 0:
+            return None
+
+        query_int8, query_scale = self._quantize(self._normalize(embedding))
+        # 使用中の行だけを対象に、1回の行列積で全エントリとの内積を計算し、
+        # 双方の量子化スケールでコサイン類似度に戻す
+        # （int8 同士の matmul は桁あふれするため int32 に上げて計算する）
+        int_products = self._embeddings[namespace][:size].astype(np.int32) @ query_int8.astype(np.int32)
+        similarities = int_products.astype(np.float32) * (self._scales[namespace][:size] * query_scale)
+
+        # argmax の1行だけ見ると、期限切れ行と再登録された同一埋め込みの
+        # 新行がタイになったとき先頭の古い行だけを見続けて恒久的にミスする。
+        # 閾値以上の候補を類似度の高い順に走査し、期限切れ行はその場で
+        # 削除して行列が無制限に成長しないようにする
+        now = time.time()
+        hit_results = None
+        hit_similarity = 0.0
+        expired_rows = []
+        for index in np.argsort(similarities)[::-1]:
+            if similarities[index] < self.threshold:
+                break
+            created_at, results = self._entries[namespace][index]
+            if now - created_at > self.ttl_seconds:
+                expired_rows.append(int(index))
+                continue
+            hit_results = results
+            hit_similarity = float(similarities[index])
+            break
+
+        # スワップ削除は末尾の行を詰めるため、大きいインデックスから消す
+        # （ヒット結果は取得済みなので行の入れ替わりは影響しない）
+        for index in sorted(expired_rows, reverse=True):
+            self._remove_row(namespace, index)
+
+        if hit_results is None:
+            return None
+
+        log_proofreading_debug("セマンティックキャッシュヒット", {
+            "namespace": namespace,
+            "similarity": hit_similarity
+        })
+        return hit_results
+
+    def insert(self, namespace: Tuple, embedding: List[float], results: List[Any]) -> None:
+        """検索結果をキャッシュに登録"""
+        query_int8, query_scale = self._quantize(self._normalize(embedding))
+        matrix = self._embeddings.get(namespace)
+        size = self._sizes.get(namespace, 0)
+
+        if matrix is None:
+            matrix = np.empty((self._INITIAL_CAPACITY, query_int8.shape[0]), dtype=np.int8)
+            scales = np.empty(self._INITIAL_CAPACITY, dtype=np.float32)
+            self._embeddings[namespace] = matrix
+            self._scales[namespace] = scales
+            self._entries[namespace] = []
+        elif size == matrix.shape[0]:
+            # 容量不足時は倍々で拡張（挿入あたり償却 O(1)）
+            grown = np.empty((matrix.shape[0] * 2, matrix.shape[1]), dtype=np.int8)
+            grown[:size] = matrix[:size]
+            matrix = grown
+            self._embeddings[namespace] = matrix
+            grown_scales = np.empty(matrix.shape[0], dtype=np.float32)
+            grown_scales[:size] = self._scales[namespace][:size]
+            self._scales[namespace] = grown_scales
+
+        matrix[size] = query_int8
+        self._scales[namespace][size] = query_scale
+        self._sizes[namespace] = size + 1
+        self._entries[namespace].append((time.time(), results))
+
+
 class KnowledgeSearchService:
     """知識ベース検索サービス"""
-    
+
+    __slots__ = ("vector_store", "semantic_cache", "_dispatch")
+
     def __init__(self):
         self.vector_store = None
-    
+        self.semantic_cache = _SemanticCache() if ENABLE_SEARCH_CACHE else None
+        # SearchType → ハンドラの O(1) ディスパッチテーブル
+        self._dispatch = {
+            SearchType.GENERAL: self._search_general,
+            SearchType.BY_ISSUE_CATEGORY: self._search_by_issue_category,
+            SearchType.BY_KNOWLEDGE_TYPE: self._search_by_knowledge_type,
+        }
+
     def get_vector_store(self):
         """ベクターストアを取得（遅延初期化）"""
         if self.vector_store is None:
@@ -30,7 +176,7 @@ class KnowledgeSearchService:
                 self.vector_store = ClientFactory.get_vector_store()
                 log_proofreading_debug("ベクターストアを初期化")
             except Exception as e:
-                raise VectorStoreError(f"ベクターストアの初期化に失敗しました: {e}")
+                raise VectorStoreError("ベクターストアの初期化に失敗しました") from e
         return self.vector_store
     
     def validate_query(self, query: str) -> None:
@@ -43,19 +189,57 @@ class KnowledgeSearchService:
         Raises:
             VectorStoreError: クエリが無効な場合
         """
-        if not query or not query.strip():
+        # strip は1回だけ実行し、その長さで全バリデーションを判定する
+        stripped = query.strip() if query else ""
+        query_length = len(stripped)
+
+        if query_length == 0:
             raise VectorStoreError("検索クエリが空です")
-        
-        query_length = len(query.strip())
+
         if query_length < MIN_QUERY_LENGTH:
             raise VectorStoreError(f"検索クエリが短すぎます (最小: {MIN_QUERY_LENGTH}文字)")
-        
+
         if query_length > MAX_QUERY_LENGTH:
             raise VectorStoreError(f"検索クエリが長すぎます (最大: {MAX_QUERY_LENGTH}文字)")
     
+    def _search_with_semantic_cache(self, namespace: Tuple, query: str, search_fn) -> List[Any]:
+        """
+        セマンティックキャッシュ越しに検索を実行
+
+        類似クエリのキャッシュがあればベクターストアへの問い合わせを
+        省略し、ミス時は検索を実行して結果をキャッシュに登録します。
+
+        Args:
+            namespace (Tuple): (検索タイプ, フィルタ値, limit) のキャッシュ名前空間
+            query (str): 検索クエリ
+            search_fn: 実際の検索を行う関数。キャッシュ判定用に計算した
+                クエリ埋め込みを受け取り、None のときだけクエリ文字列から
+                embed し直す（ミス時に同じクエリを二重に embed しないため）
+
+        Returns:
+            List[Any]: 検索された知識のリスト
+        """
+        if self.semantic_cache is None:
+            return search_fn(None)
+
+        try:
+            embedding = self.get_vector_store().openai_embeddings.embed_query(query)
+        except Exception:
+            # 埋め込みが取得できない場合はキャッシュを諦めて通常検索
+            log_proofreading_debug("クエリ埋め込みの取得に失敗したためキャッシュをスキップ")
+            return search_fn(None)
+
+        cached = self.semantic_cache.lookup(namespace, embedding)
+        if cached is not None:
+            return cached
+
+        results = search_fn(embedding)
+        self.semantic_cache.insert(namespace, embedding, results)
+        return results
+
     def search_knowledge_from_vector_store(
-        self, 
-        query: str, 
+        self,
+        query: str,
         limit: int = DEFAULT_SEARCH_LIMIT
     ) -> List[Any]:
         """
@@ -78,13 +262,19 @@ class KnowledgeSearchService:
             log_proofreading_debug("検索パラメータ", {"query": query, "limit": limit})
             
             vector_store = self.get_vector_store()
-            knowledge_list = vector_store.get_knowledge_from_vector_store(query, k=limit)
-            
+            knowledge_list = self._search_with_semantic_cache(
+                (SearchType.GENERAL, None, limit),
+                query,
+                lambda embedding: vector_store.get_knowledge_from_vector_store(
+                    query, k=limit, embedding=embedding
+                )
+            )
+
             log_proofreading_info(f"一般知識検索完了: {len(knowledge_list)}件")
             return knowledge_list
             
         except Exception as e:
-            raise VectorStoreError(f"一般知識検索中にエラーが発生しました: {e}")
+            raise VectorStoreError("一般知識検索中にエラーが発生しました") from e
     
     def search_knowledge_from_vector_store_by_issue_category(
         self, 
@@ -120,15 +310,19 @@ class KnowledgeSearchService:
             })
             
             vector_store = self.get_vector_store()
-            knowledge_list = vector_store.get_knowledge_from_vector_store_by_issue_category(
-                query, issue_category
+            knowledge_list = self._search_with_semantic_cache(
+                (SearchType.BY_ISSUE_CATEGORY, issue_category, limit),
+                query,
+                lambda embedding: vector_store.get_knowledge_from_vector_store_by_issue_category(
+                    query, issue_category, embedding=embedding
+                )
             )
-            
+
             log_proofreading_info(f"カテゴリ別知識検索完了: {len(knowledge_list)}件")
             return knowledge_list
             
         except Exception as e:
-            raise VectorStoreError(f"カテゴリ別知識検索中にエラーが発生しました: {e}")
+            raise VectorStoreError("カテゴリ別知識検索中にエラーが発生しました") from e
     
     def search_knowledge_from_vector_store_by_knowledge_type(
         self, 
@@ -164,15 +358,19 @@ class KnowledgeSearchService:
             })
             
             vector_store = self.get_vector_store()
-            knowledge_list = vector_store.get_knowledge_from_vector_store_by_knowledge_type(
-                query, knowledge_type
+            knowledge_list = self._search_with_semantic_cache(
+                (SearchType.BY_KNOWLEDGE_TYPE, knowledge_type, limit),
+                query,
+                lambda embedding: vector_store.get_knowledge_from_vector_store_by_knowledge_type(
+                    query, knowledge_type, embedding=embedding
+                )
             )
-            
+
             log_proofreading_info(f"タイプ別知識検索完了: {len(knowledge_list)}件")
             return knowledge_list
             
         except Exception as e:
-            raise VectorStoreError(f"タイプ別知識検索中にエラーが発生しました: {e}")
+            raise VectorStoreError("タイプ別知識検索中にエラーが発生しました") from e
     
     def delete_all_knowledge_from_vector_store(self) -> bool:
         """
@@ -198,7 +396,7 @@ class KnowledgeSearchService:
             return result
             
         except Exception as e:
-            raise VectorStoreError(f"全知識削除中にエラーが発生しました: {e}")
+            raise VectorStoreError("全知識削除中にエラーが発生しました") from e
     
     def search_knowledge_with_options(
         self,
@@ -222,51 +420,82 @@ class KnowledgeSearchService:
         Raises:
             VectorStoreError: 検索処理に失敗した場合
         """
-        try:
-            if search_type == SearchType.GENERAL:
-                return self.search_knowledge_from_vector_store(query, limit)
-            elif search_type == SearchType.BY_ISSUE_CATEGORY:
-                if not filter_value:
-                    raise VectorStoreError("カテゴリ検索にはfilter_valueが必要です")
-                return self.search_knowledge_from_vector_store_by_issue_category(
-                    query, filter_value, limit
-                )
-            elif search_type == SearchType.BY_KNOWLEDGE_TYPE:
-                if not filter_value:
-                    raise VectorStoreError("タイプ検索にはfilter_valueが必要です")
-                return self.search_knowledge_from_vector_store_by_knowledge_type(
-                    query, filter_value, limit
-                )
-            else:
-                raise VectorStoreError(f"サポートされていない検索タイプです: {search_type}")
-                
-        except Exception as e:
-            raise VectorStoreError(f"オプション指定検索中にエラーが発生しました: {e}")
+        # 各検索メソッドが既に VectorStoreError へ変換して送出するため、
+        # ここで再ラップすると例外チェーンと整形コストが二重になる。
+        # ディスパッチテーブルでハンドラを引き、内側の例外はそのまま伝播させる。
+        handler = self._dispatch.get(search_type)
+        if handler is None:
+            raise VectorStoreError(f"サポートされていない検索タイプです: {search_type}")
+        return handler(query, filter_value, limit)
 
+    def _search_general(
+        self, query: str, filter_value: Optional[str], limit: int
+    ) -> List[Any]:
+        """一般検索のディスパッチハンドラ"""
+        return self.search_knowledge_from_vector_store(query, limit)
+
+    def _search_by_issue_category(
+        self, query: str, filter_value: Optional[str], limit: int
+    ) -> List[Any]:
+        """カテゴリ検索のディスパッチハンドラ"""
+        if not filter_value:
+            raise VectorStoreError("カテゴリ検索にはfilter_valueが必要です")
+        return self.search_knowledge_from_vector_store_by_issue_category(
+            query, filter_value, limit
+        )
+
+    def _search_by_knowledge_type(
+        self, query: str, filter_value: Optional[str], limit: int
+    ) -> List[Any]:
+        """タイプ検索のディスパッチハンドラ"""
+        if not filter_value:
+            raise VectorStoreError("タイプ検索にはfilter_valueが必要です")
+        return self.search_knowledge_from_vector_store_by_knowledge_type(
+            query, filter_value, limit
+        )
+
+
+# 下位互換性のためのサービスインスタンス（初回利用時に遅延生成）
+_service: Optional[KnowledgeSearchService] = None
+_service_lock = threading.Lock()
+
+
+def _get_service() -> KnowledgeSearchService:
+    """
+    互換ラッパー用のサービスインスタンスを取得（遅延初期化）
+
+    インポート時にインスタンスを生成すると、ラッパーを使わない
+    ワーカーでも初期化コストを払うことになるため、初回呼び出しまで
+    生成を遅らせる。
+    """
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = KnowledgeSearchService()
+    return _service
 
-# 下位互換性のためのサービスインスタンス
-_service = KnowledgeSearchService()
 
 def search_knowledge_from_vector_store(query: str) -> List[Any]:
     """
     下位互換性のための関数ラッパー
     """
-    return _service.search_knowledge_from_vector_store(query)
+    return _get_service().search_knowledge_from_vector_store(query)
 
 def search_knowledge_from_vector_store_by_issue_category(query: str, issue_category: str) -> List[Any]:
     """
     下位互換性のための関数ラッパー
     """
-    return _service.search_knowledge_from_vector_store_by_issue_category(query, issue_category)
+    return _get_service().search_knowledge_from_vector_store_by_issue_category(query, issue_category)
 
 def search_knowledge_from_vector_store_by_knowledge_type(query: str, knowledge_type: str) -> List[Any]:
     """
     下位互換性のための関数ラッパー
     """
-    return _service.search_knowledge_from_vector_store_by_knowledge_type(query, knowledge_type)
+    return _get_service().search_knowledge_from_vector_store_by_knowledge_type(query, knowledge_type)
 
 def delete_all_knowledge_from_vector_store() -> bool:
     """
     下位互換性のための関数ラッパー
     """
-    return _service.delete_all_knowledge_from_vector_store()
\ No newline at end of file
+    return _get_service().delete_all_knowledge_from_vector_store()
\ No newline at end of file
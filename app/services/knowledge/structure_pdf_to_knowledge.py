@@ -2,162 +2,232 @@ from libs.azure_client import AzureDocumentIntelligenceClient, AzureOpenAIClient
 from langchain_core.prompts import ChatPromptTemplate
 from app.schemas.schemas import KnowledgeFromLatexList, KnowledgeFromLatex
 from app.services.knowledge.prompts.pdf_knowledge_extraction_prompts import SYSTEM_PROMPT, USER_PROMPT
-from typing import List, Dict, Any
+from app.services.shared.logging_utils import (
+    log_proofreading_info,
+    log_proofreading_debug,
+    log_proofreading_error,
+)
+from typing import Iterator, List, Dict, Any
+import threading
 
+# ページ単位LLM抽出の同時実行数（Azureレート制限内に収める）
+PDF_PAGE_MAX_CONCURRENCY = 8
 
-def structure_pdf_files_to_knowledge(pdf_files: List[Dict[str, Any]]) -> List[KnowledgeFromLatex]:
+# 構造化出力チェーンはプロセス内で共通のため一度だけ構築して使い回す
+# （with_structured_output はPydanticスキーマのJSONスキーマ生成を伴い、
+# 呼び出しごとに再構築するとCPUコストが高い）
+_extraction_chain = None
+_chain_lock = threading.Lock()
+
+
+def _get_extraction_chain():
+    """ナレッジ抽出用の構造化出力チェーンを取得（遅延初期化）"""
+    global _extraction_chain
+    if _extraction_chain is None:
+        with _chain_lock:
+            if _extraction_chain is None:
+                prompt = ChatPromptTemplate.from_messages([
+                    ("system", SYSTEM_PROMPT),
+                    ("user", USER_PROMPT),
+                ])
+                _extraction_chain = prompt | AzureOpenAIClient().get_openai_client().with_structured_output(KnowledgeFromLatexList)
+    return _extraction_chain
+
+
+def iter_knowledge_from_pdfs(pdf_files: List[Dict[str, Any]]) -> Iterator[KnowledgeFromLatex]:
     """
-    複数のPDFファイルからナレッジを抽出する
-    
+    複数のPDFファイルからナレッジを逐次抽出するジェネレータ
+
+    全ファイル・全ページ分のナレッジをメモリに貯めず、抽出でき次第
+    1件ずつ yield します。リストが必要な場合は
+    structure_pdf_files_to_knowledge を使ってください。
+
     Args:
         pdf_files: PDF ファイルの情報とバイトデータを含むリスト
-        
-    Returns:
-        List[KnowledgeFromLatex]: 抽出されたナレッジのリスト
+
+    Yields:
+        KnowledgeFromLatex: 抽出されたナレッジ
     """
-    aggregated: List[KnowledgeFromLatex] = []
-    azure_openai_client = AzureOpenAIClient()
+    total_count = 0
     azure_doc_intel_client = AzureDocumentIntelligenceClient()
-    
+    chain = _get_extraction_chain()
+
+    # Document Intelligence処理はファイルをまたいで一括投入する
+    # （ファイル単位の逐次呼び出しだとファイル境界ごとに並列度が落ちる）
+    files = []
     for pdf_file in pdf_files:
+        # bytes/memoryview はコピーせずそのまま渡す（bytearray 等のみ変換）
+        raw_content = pdf_file["content"]
+        file_bytes = raw_content if isinstance(raw_content, (bytes, memoryview)) else bytes(raw_content)
+        files.append((file_bytes, pdf_file["name"]))
+    all_pages_content = azure_doc_intel_client.analyze_pdf_pages_batch(files)
+
+    for pdf_file, pages_content in zip(pdf_files, all_pages_content):
         file_name = pdf_file["name"]
-        file_bytes = pdf_file["content"]
         knowledge_type = pdf_file.get("knowledge_type", "一般的な論文")
-        
-        print(f"処理中のファイル: {file_name}")
-        
+
+        log_proofreading_info(f"処理中のファイル: {file_name}")
+
         try:
-            # Document Intelligenceでページごとの内容を抽出
-            pages_content = azure_doc_intel_client.analyze_pdf_pages(file_bytes, file_name)
-            
-            print(f"PDFから{len(pages_content)}ページの内容を抽出しました")
-            
-            # 各ページからナレッジを抽出
-            for page_data in pages_content:
+            log_proofreading_info(f"PDFから{len(pages_content)}ページの内容を抽出しました")
+
+            # 各ページのLLM抽出を並列バッチ実行（ネットワーク待ちを重ねて短縮）
+            payloads = [{"content": page_data["content"]} for page_data in pages_content]
+            batch_results = chain.batch(
+                payloads,
+                config={"max_concurrency": PDF_PAGE_MAX_CONCURRENCY},
+                return_exceptions=True,
+            )
+
+            for page_data, results in zip(pages_content, batch_results):
                 page_number = page_data["page_number"]
                 page_content = page_data["content"]
                 source_file = page_data["source_file"]
-                
-                print(f"ページ {page_number} を処理中...")
-                print("--------------------------------")
-                print("page_content:")
-                print(page_content)
-                print("--------------------------------")
-                
-                # プロンプトを作成してLLMでナレッジを抽出
-                prompt = ChatPromptTemplate.from_messages([
-                    ("system", SYSTEM_PROMPT),
-                    ("user", USER_PROMPT),
-                ])
-                chain = prompt | azure_openai_client.get_openai_client().with_structured_output(KnowledgeFromLatexList)
-                
-                try:
-                    results = chain.invoke({"content": page_content})
-                    
-                    # 抽出したナレッジにメタデータを追加
-                    for result in results.knowledge_list:
-                        result.knowledge_type = knowledge_type.strip() if knowledge_type else None
-                        result.reference_url = f"{source_file} (Page {page_number})"
-                        print("--------------------------------")
-                        print("result:")
-                        print(result)
-                        print("--------------------------------")
-                        aggregated.append(result)
-                        
-                except Exception as e:
-                    print(f"ページ {page_number} の処理中にエラーが発生しました: {e}")
+
+                if isinstance(results, Exception):
+                    log_proofreading_error(f"ページ {page_number} の処理中にエラーが発生しました", results)
                     continue
-                    
+
+                log_proofreading_debug("ページ処理中", {
+                    "file": file_name,
+                    "page": page_number,
+                    "content_length": len(page_content)
+                })
+
+                # メタデータは model_copy でまとめて付与する
+                # （属性代入だと項目×2回のPydanticバリデーションが走る）
+                metadata_update = {
+                    "knowledge_type": knowledge_type.strip() if knowledge_type else None,
+                    "reference_url": f"{source_file} (Page {page_number})",
+                }
+                for result in results.knowledge_list:
+                    item = result.model_copy(update=metadata_update)
+                    log_proofreading_debug("ナレッジ抽出", {
+                        "page": page_number,
+                        "knowledge_preview": item.knowledge[:50]
+                    })
+                    total_count += 1
+                    yield item
+
         except Exception as e:
-            print(f"ファイル {file_name} の処理中にエラーが発生しました: {e}")
+            log_proofreading_error(f"ファイル {file_name} の処理中にエラーが発生しました", e)
             continue
-    
-    print(f"合計 {len(aggregated)} 個のナレッジを抽出しました")
-    return aggregated
 
+    log_proofreading_info(f"合計 {total_count} 個のナレッジを抽出しました")
 
 
+def structure_pdf_files_to_knowledge(pdf_files: List[Dict[str, Any]]) -> List[KnowledgeFromLatex]:
+    """
+    複数のPDFファイルからナレッジを抽出する
 
+    下位互換のためリストを返す薄いラッパー。ストリーム処理したい
+    場合は iter_knowledge_from_pdfs を直接使ってください。
 
-def structure_pdf_files_to_knowledge_with_enhanced_cache(pdf_files: List[Dict[str, Any]]) -> List[KnowledgeFromLatex]:
-    """
-    強化キャッシュシステムを使用してPDFファイルからナレッジを抽出（コスト最適化版）
-    
     Args:
         pdf_files: PDF ファイルの情報とバイトデータを含むリスト
-        
+
     Returns:
         List[KnowledgeFromLatex]: 抽出されたナレッジのリスト
     """
-    aggregated: List[KnowledgeFromLatex] = []
-    azure_openai_client = AzureOpenAIClient()
+    return list(iter_knowledge_from_pdfs(pdf_files))
+
+
+def iter_knowledge_from_pdfs_with_enhanced_cache(pdf_files: List[Dict[str, Any]]) -> Iterator[KnowledgeFromLatex]:
+    """
+    強化キャッシュシステムを使用してPDFからナレッジを逐次抽出するジェネレータ
+
+    Args:
+        pdf_files: PDF ファイルの情報とバイトデータを含むリスト
+
+    Yields:
+        KnowledgeFromLatex: 抽出されたナレッジ
+    """
+    total_count = 0
     azure_doc_intel_client = AzureDocumentIntelligenceClient(enable_cache=True, use_enhanced_cache=True)
-    
-    print(f"💎 強化キャッシュシステムでPDF処理開始: {len(pdf_files)} ファイル")
-    
+    chain = _get_extraction_chain()
+
+    log_proofreading_info(f"💎 強化キャッシュシステムでPDF処理開始: {len(pdf_files)} ファイル")
+
     for pdf_file in pdf_files:
         file_name = pdf_file["name"]
-        file_bytes = pdf_file["content"]
+        # bytes/memoryview はコピーせずそのまま渡す（bytearray 等のみ変換）
+        raw_content = pdf_file["content"]
+        file_bytes = raw_content if isinstance(raw_content, (bytes, memoryview)) else bytes(raw_content)
         knowledge_type = pdf_file.get("knowledge_type", "一般的な論文")
-        
-        print(f"処理中のファイル: {file_name}")
-        
+
+        log_proofreading_info(f"処理中のファイル: {file_name}")
+
         try:
             # 強化キャッシュシステムでページ処理
             pages_content = azure_doc_intel_client.analyze_pdf_pages_with_enhanced_cache(file_bytes, file_name)
-            
-            print(f"PDFから{len(pages_content)}ページの内容を抽出しました")
-            
-            # 各ページからナレッジを抽出
-            for page_data in pages_content:
+
+            log_proofreading_info(f"PDFから{len(pages_content)}ページの内容を抽出しました")
+
+            # 各ページのLLM抽出を並列バッチ実行（ネットワーク待ちを重ねて短縮）
+            payloads = [{"content": page_data["content"]} for page_data in pages_content]
+            batch_results = chain.batch(
+                payloads,
+                config={"max_concurrency": PDF_PAGE_MAX_CONCURRENCY},
+                return_exceptions=True,
+            )
+
+            for page_data, results in zip(pages_content, batch_results):
                 page_number = page_data["page_number"]
                 page_content = page_data["content"]
                 source_file = page_data["source_file"]
-                
-                print(f"ページ {page_number} からナレッジ抽出中...")
-                print("--------------------------------")
-                print("page_content:")
-                print(page_content)
-                print("--------------------------------")
-                
-                # プロンプトを作成してLLMでナレッジを抽出
-                prompt = ChatPromptTemplate.from_messages([
-                    ("system", SYSTEM_PROMPT),
-                    ("user", USER_PROMPT),
-                ])
-                chain = prompt | azure_openai_client.get_openai_client().with_structured_output(KnowledgeFromLatexList)
-                
-                try:
-                    results = chain.invoke({"content": page_content})
-                    
-                    # 抽出したナレッジにメタデータを追加
-                    for result in results.knowledge_list:
-                        result.knowledge_type = knowledge_type.strip() if knowledge_type else None
-                        result.reference_url = f"{source_file} (Page {page_number})"
-                        print("--------------------------------")
-                        print("result:")
-                        print(result)
-                        print("--------------------------------")
-                        aggregated.append(result)
-                        
-                except Exception as e:
-                    print(f"ページ {page_number} のナレッジ抽出中にエラーが発生しました: {e}")
+
+                if isinstance(results, Exception):
+                    log_proofreading_error(f"ページ {page_number} のナレッジ抽出中にエラーが発生しました", results)
                     continue
-                    
+
+                log_proofreading_debug("ページからナレッジ抽出中", {
+                    "file": file_name,
+                    "page": page_number,
+                    "content_length": len(page_content)
+                })
+
+                # メタデータは model_copy でまとめて付与する
+                # （属性代入だと項目×2回のPydanticバリデーションが走る）
+                metadata_update = {
+                    "knowledge_type": knowledge_type.strip() if knowledge_type else None,
+                    "reference_url": f"{source_file} (Page {page_number})",
+                }
+                for result in results.knowledge_list:
+                    item = result.model_copy(update=metadata_update)
+                    log_proofreading_debug("ナレッジ抽出", {
+                        "page": page_number,
+                        "knowledge_preview": item.knowledge[:50]
+                    })
+                    total_count += 1
+                    yield item
+
         except Exception as e:
-            print(f"ファイル {file_name} の処理中にエラーが発生しました: {e}")
+            log_proofreading_error(f"ファイル {file_name} の処理中にエラーが発生しました", e)
             continue
-    
+
     # キャッシュ統計を表示
     cache_stats = azure_doc_intel_client.get_cache_stats()
     if "session" in cache_stats:
         session_stats = cache_stats["session"]
-        from app.services.shared.logging_utils import log_proofreading_info
         log_proofreading_info(f"[structure_pdf_files_to_knowledge_with_enhanced_cache] セッション統計:")
         log_proofreading_info(f"[structure_pdf_files_to_knowledge_with_enhanced_cache]   キャッシュヒット: {session_stats['cache_hits']}")
         log_proofreading_info(f"[structure_pdf_files_to_knowledge_with_enhanced_cache]   キャッシュミス: {session_stats['cache_misses']}")
         log_proofreading_info(f"[structure_pdf_files_to_knowledge_with_enhanced_cache]   節約されたAPI呼び出し: {session_stats['api_calls_saved']}")
     
-    from app.services.shared.logging_utils import log_proofreading_info
-    log_proofreading_info(f"[structure_pdf_files_to_knowledge_with_enhanced_cache] 強化キャッシュシステムでの処理完了: 合計 {len(aggregated)} 個のナレッジを抽出しました")
-    return aggregated
\ No newline at end of file
+    log_proofreading_info(f"[structure_pdf_files_to_knowledge_with_enhanced_cache] 強化キャッシュシステムでの処理完了: 合計 {total_count} 個のナレッジを抽出しました")
+
+
+def structure_pdf_files_to_knowledge_with_enhanced_cache(pdf_files: List[Dict[str, Any]]) -> List[KnowledgeFromLatex]:
+    """
+    強化キャッシュシステムを使用してPDFファイルからナレッジを抽出（コスト最適化版）
+
+    下位互換のためリストを返す薄いラッパー。ストリーム処理したい
+    場合は iter_knowledge_from_pdfs_with_enhanced_cache を直接使ってください。
+
+    Args:
+        pdf_files: PDF ファイルの情報とバイトデータを含むリスト
+
+    Returns:
+        List[KnowledgeFromLatex]: 抽出されたナレッジのリスト
+    """
+    return list(iter_knowledge_from_pdfs_with_enhanced_cache(pdf_files))
\ No newline at end of file
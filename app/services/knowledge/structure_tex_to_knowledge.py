@@ -4,7 +4,8 @@ LaTeX文書から構造化された知識を抽出するサービス
 学術論文の校正に必要な具体的な指示・ルール・仕様を
 LaTeX文書から自動抽出し、構造化データとして提供します。
 """
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Optional
 
 from app.schemas.schemas import KnowledgeFromLatex
 from app.services.knowledge.core.knowledge_extraction_engine import KnowledgeExtractionEngine
@@ -14,7 +15,9 @@ from app.services.shared.exceptions import KnowledgeExtractionError
 
 class KnowledgeExtractionService:
     """LaTeX知識抽出サービス"""
-    
+
+    __slots__ = ("engine",)
+
     def __init__(self):
         self.engine = KnowledgeExtractionEngine()
     
@@ -78,8 +81,25 @@ class KnowledgeExtractionService:
             raise KnowledgeExtractionError(f"単一チャンク知識抽出中にエラーが発生しました: {e}")
 
 
-# 下位互換性のためのサービスインスタンス
-_service = KnowledgeExtractionService()
+# 下位互換性のためのサービスインスタンス（初回利用時に遅延生成）
+_service: Optional[KnowledgeExtractionService] = None
+_service_lock = threading.Lock()
+
+
+def _get_service() -> KnowledgeExtractionService:
+    """
+    互換ラッパー用のサービスインスタンスを取得（遅延初期化）
+
+    KnowledgeExtractionService はエンジン経由でLLMクライアントを
+    構築するため、インポート時ではなく初回呼び出し時に生成する。
+    """
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = KnowledgeExtractionService()
+    return _service
+
 
 def structure_tex_to_knowledge(chunks: List[Dict[str, Any]]) -> List[KnowledgeFromLatex]:
     """
@@ -91,7 +111,7 @@ def structure_tex_to_knowledge(chunks: List[Dict[str, Any]]) -> List[KnowledgeFr
     Returns:
         List[KnowledgeFromLatex]: 抽出された知識項目の集約リスト
     """
-    return _service.structure_tex_to_knowledge(chunks)
+    return _get_service().structure_tex_to_knowledge(chunks)
 
 def _process_document_chunk(
     chunk_text: str, 
@@ -109,4 +129,4 @@ def _process_document_chunk(
     Returns:
         List[KnowledgeFromLatex]: 抽出された知識項目リスト
     """
-    return _service.process_document_chunk(chunk_text, document_name, knowledge_type)
\ No newline at end of file
+    return _get_service().process_document_chunk(chunk_text, document_name, knowledge_type)
\ No newline at end of file
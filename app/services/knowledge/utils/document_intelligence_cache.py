@@ -1,9 +1,16 @@
+import atexit
+import heapq
 import os
 import json
 import hashlib
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from pathlib import Path
+from app.services.shared.logging_utils import (
+    log_proofreading_debug,
+    log_proofreading_error,
+    log_proofreading_info,
+)
 
 
 class DocumentIntelligenceCache:
@@ -12,21 +19,39 @@ class DocumentIntelligenceCache:
     ファイルのハッシュ値をキーとして JSON 形式で保存・取得する
     """
     
-    def __init__(self, cache_dir: str = "document_intelligence_cache"):
+    def __init__(
+        self,
+        cache_dir: str = "document_intelligence_cache",
+        model_id: str = "prebuilt-read",
+        max_entries: int = 1000,
+        max_bytes: int = 10 * 1024 ** 3,
+    ):
         """
         キャッシュシステムを初期化
-        
+
         Args:
             cache_dir: キャッシュファイルを保存するディレクトリ
+            model_id: Document Intelligence のモデルID（キーの名前空間に使用）
+            max_entries: 保持する最大エントリ数（超過時はLRUで削除）
+            max_bytes: 保持する元ファイルサイズの合計上限（バイト）
         """
+        self.model_id = model_id
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
         
         # メタデータファイルのパス
         self.metadata_file = self.cache_dir / "cache_metadata.json"
         
         # メタデータを初期化または読み込み
         self._load_metadata()
+
+        # メタデータの書き込みはダーティフラグで遅延させ、保存系の操作か
+        # プロセス終了時にまとめて1回だけ行う（アクセス時刻の更新ごとに
+        # ファイル全体を書き直さない）
+        self._metadata_dirty = False
+        atexit.register(self.flush_metadata)
     
     def _load_metadata(self):
         """メタデータファイルを読み込む"""
@@ -38,11 +63,44 @@ class DocumentIntelligenceCache:
                 self.metadata = {}
         else:
             self.metadata = {}
+
+        # 統計用の累計カウンタ（保存・削除で増減させ、集計を O(1) にする）
+        self._total_size = sum(m.get("file_size", 0) for m in self.metadata.values())
+        self._total_pages = sum(m.get("pages_count", 0) for m in self.metadata.values())
+
+        # 作成時刻順の最小ヒープ索引。cleanup_old_cache が全走査と
+        # ISO文字列の逐次パースをせず、先頭から期限切れ分だけ取り出せる。
+        # 要素は (作成エポック秒, ハッシュ, 作成時刻ISO文字列)
+        self._age_heap = []
+        for file_hash, entry in self.metadata.items():
+            created_iso = entry.get("created_at")
+            try:
+                created_epoch = datetime.fromisoformat(created_iso).timestamp()
+            except (TypeError, ValueError):
+                # 不正なメタデータは最優先で掃除されるようにする
+                created_epoch, created_iso = 0.0, created_iso or ""
+            self._age_heap.append((created_epoch, file_hash, created_iso))
+        heapq.heapify(self._age_heap)
     
     def _save_metadata(self):
-        """メタデータファイルを保存する"""
-        with open(self.metadata_file, 'w', encoding='utf-8') as f:
-            json.dump(self.metadata, f, ensure_ascii=False, indent=2)
+        """メタデータファイルを保存する（一時ファイル経由で原子的に置換）"""
+        tmp_file = self.metadata_file.with_suffix('.json.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            # 機械が読むだけのファイルなので整形しない（indent はサイズと
+            # エンコードCPUをほぼ倍にする）
+            json.dump(self.metadata, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp_file, self.metadata_file)
+        self._metadata_dirty = False
+
+    def flush_metadata(self):
+        """未保存のメタデータ更新があればファイルへ書き出す"""
+        if self._metadata_dirty:
+            try:
+                self._save_metadata()
+            except Exception:
+                # 終了時のフラッシュ失敗は致命的ではない（次回起動時に
+                # last_accessed が少し古いだけ）
+                pass
     
     def _get_file_hash(self, file_bytes: bytes) -> str:
         """
@@ -54,7 +112,11 @@ class DocumentIntelligenceCache:
         Returns:
             ハッシュ値（16進数文字列）
         """
-        return hashlib.sha256(file_bytes).hexdigest()
+        digest = hashlib.sha256(file_bytes)
+        # モデルが変わると出力形式も変わるため、キーにモデルIDを含めて
+        # 古いモデルのキャッシュが誤ってヒットしないようにする
+        digest.update(self.model_id.encode("utf-8"))
+        return digest.hexdigest()
     
     def _get_cache_file_path(self, file_hash: str) -> Path:
         """
@@ -68,57 +130,89 @@ class DocumentIntelligenceCache:
         """
         return self.cache_dir / f"{file_hash}.json"
     
-    def has_cache(self, file_bytes: bytes, file_name: str) -> bool:
+    def has_cache(self, file_bytes: bytes, file_name: str, file_hash: Optional[str] = None) -> bool:
         """
         指定ファイルのキャッシュが存在するかチェック
         
         Args:
             file_bytes: ファイルのバイトデータ
             file_name: ファイル名
+            file_hash: 計算済みハッシュ値（省略時はここで計算）
             
         Returns:
             キャッシュが存在する場合True
         """
-        file_hash = self._get_file_hash(file_bytes)
-        cache_file = self._get_cache_file_path(file_hash)
-        
-        return cache_file.exists() and file_hash in self.metadata
+        if file_hash is None:
+            file_hash = self._get_file_hash(file_bytes)
+        # メタデータが存在を保証しているため、ここでの stat は省略する。
+        # ファイルが欠けていた場合は get_cache の読み込み失敗側で
+        # エントリごと掃除される
+        return file_hash in self.metadata
     
-    def get_cache(self, file_bytes: bytes, file_name: str) -> Optional[List[Dict[str, Any]]]:
+    def get_if_present(self, file_bytes: bytes, file_name: str, file_hash: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        存在すればキャッシュ結果を返す（存在確認と取得を1回のハッシュで行う）
+
+        has_cache + get_cache と分けて呼ぶと利用側でハッシュの引き回しが
+        必要になるため、ヒット判定と読み出しを1呼び出しにまとめる。
+
+        Args:
+            file_bytes: ファイルのバイトデータ
+            file_name: ファイル名
+            file_hash: 計算済みハッシュ値（省略時はここで計算）
+
+        Returns:
+            キャッシュされた処理結果、存在しない場合None
+        """
+        if file_hash is None:
+            file_hash = self._get_file_hash(file_bytes)
+        if file_hash not in self.metadata:
+            return None
+        return self.get_cache(file_bytes, file_name, file_hash=file_hash)
+
+    def get_cache(self, file_bytes: bytes, file_name: str, file_hash: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
         """
         キャッシュされた処理結果を取得
         
         Args:
             file_bytes: ファイルのバイトデータ
             file_name: ファイル名
+            file_hash: 計算済みハッシュ値（省略時はここで計算）
             
         Returns:
             キャッシュされた処理結果、存在しない場合None
         """
-        if not self.has_cache(file_bytes, file_name):
+        # ハッシュは一度だけ計算し、has_cache にもそのまま渡す
+        # （従来は存在確認と読み出しで同じバイト列を二度ハッシュしていた）
+        if file_hash is None:
+            file_hash = self._get_file_hash(file_bytes)
+        if not self.has_cache(file_bytes, file_name, file_hash=file_hash):
             return None
         
-        file_hash = self._get_file_hash(file_bytes)
         cache_file = self._get_cache_file_path(file_hash)
         
         try:
             with open(cache_file, 'r', encoding='utf-8') as f:
                 cached_data = json.load(f)
                 
-            # メタデータの最終アクセス時刻を更新
-            self.metadata[file_hash]["last_accessed"] = datetime.now().isoformat()
-            self._save_metadata()
+            # メタデータの最終アクセス時刻はメモリ上でのみ更新し、
+            # 書き出しは次の保存操作か終了時フラッシュに相乗りさせる
+            # （dict は挿入順を保持するため、末尾へ移し替えてLRU順も維持する）
+            entry = self.metadata.pop(file_hash)
+            entry["last_accessed"] = datetime.now().isoformat()
+            self.metadata[file_hash] = entry
+            self._metadata_dirty = True
             
-            print(f"キャッシュから取得: {file_name} (hash: {file_hash[:8]}...)")
+            log_proofreading_debug(f"キャッシュから取得: {file_name} (hash: {file_hash[:8]}...)")
             return cached_data["pages_content"]
             
         except (json.JSONDecodeError, FileNotFoundError, KeyError) as e:
-            print(f"キャッシュ読み込みエラー: {e}")
+            log_proofreading_error("キャッシュ読み込みエラー", e)
             # 破損したキャッシュファイルを削除
             self._remove_cache_file(file_hash)
             return None
     
-    def save_cache(self, file_bytes: bytes, file_name: str, pages_content: List[Dict[str, Any]]) -> bool:
+    def save_cache(self, file_bytes: bytes, file_name: str, pages_content: List[Dict[str, Any]], file_hash: Optional[str] = None) -> bool:
         """
         処理結果をキャッシュに保存
         
@@ -126,44 +220,68 @@ class DocumentIntelligenceCache:
             file_bytes: ファイルのバイトデータ
             file_name: ファイル名
             pages_content: Document Intelligence の処理結果
+            file_hash: 計算済みハッシュ値（省略時はここで計算）
             
         Returns:
             保存成功時True
         """
-        file_hash = self._get_file_hash(file_bytes)
+        if file_hash is None:
+            file_hash = self._get_file_hash(file_bytes)
         cache_file = self._get_cache_file_path(file_hash)
         
         try:
+            # タイムスタンプは1回だけ生成して全フィールドで共有する
+            # （processed_at / created_at / last_accessed の整合も保たれる）
+            now = datetime.now()
+            now_iso = now.isoformat()
+
             # キャッシュデータを構築
             cache_data = {
                 "file_name": file_name,
                 "file_hash": file_hash,
-                "processed_at": datetime.now().isoformat(),
+                "processed_at": now_iso,
                 "pages_content": pages_content
             }
             
-            # キャッシュファイルに保存
+            # キャッシュファイルに保存（機械が読むだけなので整形しない）
             with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
+                json.dump(cache_data, f, ensure_ascii=False, separators=(',', ':'))
             
-            # メタデータを更新
+            # メタデータを更新（既存エントリの上書き時は旧カウンタ分を戻す）
+            previous = self.metadata.get(file_hash)
+            if previous is not None:
+                self._total_size -= previous.get("file_size", 0)
+                self._total_pages -= previous.get("pages_count", 0)
+            self._total_size += len(file_bytes)
+            self._total_pages += len(pages_content)
             self.metadata[file_hash] = {
                 "file_name": file_name,
                 "cache_file": str(cache_file),
-                "created_at": datetime.now().isoformat(),
-                "last_accessed": datetime.now().isoformat(),
+                "created_at": now_iso,
+                "last_accessed": now_iso,
                 "file_size": len(file_bytes),
                 "pages_count": len(pages_content)
             }
+            heapq.heappush(self._age_heap, (now.timestamp(), file_hash, now_iso))
+            # 上限を超えた分はLRU順（dict の先頭側）に削除する
+            self._evict_if_needed()
             self._save_metadata()
             
-            print(f"キャッシュに保存: {file_name} (hash: {file_hash[:8]}...)")
+            log_proofreading_debug(f"キャッシュに保存: {file_name} (hash: {file_hash[:8]}...)")
             return True
             
         except Exception as e:
-            print(f"キャッシュ保存エラー: {e}")
+            log_proofreading_error("キャッシュ保存エラー", e)
             return False
     
+    def _evict_if_needed(self):
+        """エントリ数・合計サイズが上限を超えている間、最古参照のものを削除"""
+        while len(self.metadata) > self.max_entries or (
+            len(self.metadata) > 1 and self._total_size > self.max_bytes
+        ):
+            oldest_hash = next(iter(self.metadata))
+            self._remove_cache_file(oldest_hash)
+
     def _remove_cache_file(self, file_hash: str):
         """キャッシュファイルとメタデータを削除"""
         cache_file = self._get_cache_file_path(file_hash)
@@ -172,8 +290,12 @@ class DocumentIntelligenceCache:
             cache_file.unlink()
         
         if file_hash in self.metadata:
-            del self.metadata[file_hash]
-            self._save_metadata()
+            removed = self.metadata.pop(file_hash)
+            self._total_size -= removed.get("file_size", 0)
+            self._total_pages -= removed.get("pages_count", 0)
+            # 書き出しは呼び出し元の保存処理か終了時フラッシュに任せる
+            # （連続削除のたびにメタデータ全体を書き直さない）
+            self._metadata_dirty = True
     
     def cleanup_old_cache(self, days: int = 30):
         """
@@ -182,23 +304,24 @@ class DocumentIntelligenceCache:
         Args:
             days: 保持期間（日数）
         """
-        from datetime import timedelta
-        
-        cutoff_date = datetime.now() - timedelta(days=days)
+        import time
+
+        cutoff_epoch = time.time() - days * 86400
         removed_count = 0
-        
-        for file_hash, metadata in list(self.metadata.items()):
-            try:
-                created_at = datetime.fromisoformat(metadata["created_at"])
-                if created_at < cutoff_date:
-                    self._remove_cache_file(file_hash)
-                    removed_count += 1
-            except (ValueError, KeyError):
-                # 不正なメタデータの場合も削除
-                self._remove_cache_file(file_hash)
-                removed_count += 1
-        
-        print(f"古いキャッシュファイル {removed_count} 個を削除しました")
+
+        # ヒープ先頭が期限内になった時点で打ち切れるため、全エントリの
+        # 走査も ISO 文字列のパースも不要
+        while self._age_heap and self._age_heap[0][0] < cutoff_epoch:
+            _, file_hash, created_iso = heapq.heappop(self._age_heap)
+            entry = self.metadata.get(file_hash)
+            if entry is None or entry.get("created_at") != created_iso:
+                # 既に削除済み・上書き済みの古いヒープ要素は読み飛ばす
+                continue
+            self._remove_cache_file(file_hash)
+            removed_count += 1
+
+        self.flush_metadata()
+        log_proofreading_info(f"古いキャッシュファイル {removed_count} 個を削除しました")
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """
@@ -207,9 +330,10 @@ class DocumentIntelligenceCache:
         Returns:
             キャッシュの統計情報
         """
+        # 累計カウンタを返すだけなのでエントリ数に依存しない
         total_files = len(self.metadata)
-        total_size = sum(metadata.get("file_size", 0) for metadata in self.metadata.values())
-        total_pages = sum(metadata.get("pages_count", 0) for metadata in self.metadata.values())
+        total_size = self._total_size
+        total_pages = self._total_pages
         
         return {
             "total_cached_files": total_files,
@@ -5,15 +5,24 @@
 両方のレベルでキャッシュを管理する洗練されたシステム。
 """
 
-import os
+import atexit
 import json
 import hashlib
+import mmap
 import sqlite3
+import threading
+import zlib
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 from dataclasses import dataclass, asdict
 from enum import Enum
+from app.services.shared.logging_utils import (
+    log_proofreading_debug,
+    log_proofreading_error,
+    log_proofreading_info,
+)
 
 
 class CacheLevel(Enum):
@@ -48,6 +57,24 @@ class EnhancedDocumentIntelligenceCache:
     - コスト最適化機能
     - アクセス統計とレポート
     """
+
+    # これ以上のサイズの旧サイドカーJSONはmmapで読む
+    _MMAP_THRESHOLD_BYTES = 1024 * 1024
+
+    # INSERT OR REPLACE は行を削除して再挿入するため access_count が
+    # リセットされ、インデックスの無効化も起きる。ON CONFLICT DO UPDATE
+    # なら既存行をその場で更新でき、アクセス統計が保たれる
+    _UPSERT_METADATA_SQL = '''
+        INSERT INTO cache_metadata 
+        (file_hash, cache_type, original_filename, page_number, parent_document_hash,
+         file_size, processing_time, created_at, last_accessed, access_count, content_length)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(file_hash) DO UPDATE SET
+            last_accessed = excluded.last_accessed,
+            file_size = excluded.file_size,
+            processing_time = excluded.processing_time,
+            content_length = excluded.content_length
+    '''
     
     def __init__(self, cache_dir: str = "enhanced_di_cache"):
         """
@@ -68,6 +95,27 @@ class EnhancedDocumentIntelligenceCache:
         # SQLiteデータベース初期化
         self.db_path = self.cache_dir / "cache_metadata.db"
         self._init_database()
+
+        # メタデータ操作のたびに接続を張り直すとハンドシェイクと
+        # ページキャッシュの暖め直しで小さなUPDATE/SELECTが支配される
+        # ため、接続は1本を使い回しロックで直列化する
+        # （isolation_level=None の自動コミットモード。複文トランザク
+        # ションは明示的な BEGIN/COMMIT で張る）
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, isolation_level=None
+        )
+        # journal_mode=WAL 以外のチューニング PRAGMA は接続ごとの設定で
+        # DB には永続化されないため、実作業を担うこの接続にも発行する
+        # （_init_database の使い捨て接続に発行しただけでは効かない）
+        self._apply_connection_pragmas(self._conn)
+        atexit.register(self._conn.close)
+        # プランナ統計を初期化時と終了時に更新し、書き込みが積み重なって
+        # も ANALYZE 相当の統計が古くならないようにする
+        # （atexit はLIFOのため optimize は close より先に走る）
+        self._conn.execute('PRAGMA optimize')
+        atexit.register(self._run_optimize)
+        self._writes_since_optimize = 0
         
         # 統計情報
         self.session_stats = {
@@ -77,12 +125,45 @@ class EnhancedDocumentIntelligenceCache:
             "api_calls_saved": 0
         }
     
+    @staticmethod
+    def _apply_connection_pragmas(conn: sqlite3.Connection) -> None:
+        """
+        接続ごとのチューニング PRAGMA を発行する
+
+        journal_mode=WAL だけが DB ファイルに永続化され、それ以外は
+        接続単位の設定なので、開いた接続すべてに対して呼ぶ必要がある。
+        """
+        # WAL + synchronous=NORMAL でコミットごとの fsync を減らし、
+        # 読み取りと書き込みの競合を回避する
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-65536')  # 64MBページキャッシュ
+        conn.execute('PRAGMA mmap_size=1073741824')  # 1GBまでmmap読み取り
+        # 複数インスタンス/プロセスが同一DBへ書き込むため、競合時は
+        # 即 SQLITE_BUSY にせず一定時間リトライする
+        conn.execute('PRAGMA busy_timeout=3000')
+        conn.execute('PRAGMA wal_autocheckpoint=1000')
+
     def _init_database(self):
         """SQLiteデータベースを初期化"""
         with sqlite3.connect(self.db_path) as conn:
+            # journal_mode=WAL は DB ファイルに永続化されるため、
+            # スキーマ初期化時の一度の設定が以降の接続にも効く
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._apply_connection_pragmas(conn)
+
+            # file_hash が主キーなので WITHOUT ROWID で行を主キーB-treeに
+            # 直接格納する（暗黙のrowid経由だと点検索が2回のB-tree探索になる）
+            # 旧形式（rowidあり）のテーブルが残っていれば一度だけ移行する
+            existing_sql = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type='table' AND name='cache_metadata'"
+            ).fetchone()
+            if existing_sql and 'WITHOUT ROWID' not in existing_sql[0]:
+                conn.execute('ALTER TABLE cache_metadata RENAME TO cache_metadata_rowid')
+
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS cache_metadata (
-                    file_hash TEXT PRIMARY KEY,
+                    file_hash TEXT NOT NULL,
                     cache_type TEXT NOT NULL,
                     original_filename TEXT NOT NULL,
                     page_number INTEGER,
@@ -92,14 +173,33 @@ class EnhancedDocumentIntelligenceCache:
                     created_at TEXT NOT NULL,
                     last_accessed TEXT NOT NULL,
                     access_count INTEGER DEFAULT 0,
-                    content_length INTEGER DEFAULT 0
-                )
+                    content_length INTEGER DEFAULT 0,
+                    PRIMARY KEY (file_hash)
+                ) WITHOUT ROWID
+            ''')
+
+            if existing_sql and 'WITHOUT ROWID' not in existing_sql[0]:
+                conn.execute('INSERT INTO cache_metadata SELECT * FROM cache_metadata_rowid')
+                conn.execute('DROP TABLE cache_metadata_rowid')
+
+            # ペイロード本体もSQLiteに置く（サイドカーJSONだとキャッシュ
+            # ヒットごとにメタデータ照会＋open/readの2往復になる）
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS cache_blobs (
+                    file_hash TEXT NOT NULL,
+                    data BLOB NOT NULL,
+                    PRIMARY KEY (file_hash)
+                ) WITHOUT ROWID
             ''')
             
             # インデックス作成
             conn.execute('CREATE INDEX IF NOT EXISTS idx_cache_type ON cache_metadata(cache_type)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_parent_hash ON cache_metadata(parent_document_hash)')
             conn.execute('CREATE INDEX IF NOT EXISTS idx_filename ON cache_metadata(original_filename)')
+            # クリーンアップ・推奨事項スキャン用（全表走査を避ける）
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_last_accessed ON cache_metadata(last_accessed)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_access_count ON cache_metadata(access_count)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_file_size ON cache_metadata(file_size)')
             
             conn.commit()
     
@@ -119,6 +219,17 @@ class EnhancedDocumentIntelligenceCache:
             hasher.update(prefix.encode('utf-8'))
         hasher.update(file_bytes)
         return hasher.hexdigest()
+
+    @staticmethod
+    def _get_page_hash(parent_hash: str, page_number: int) -> str:
+        """
+        ページキャッシュ鍵を親文書ハッシュとページ番号から導出
+
+        親ハッシュが内容を一意に識別しているため、ページのバイト列を
+        再度SHA-256に通す必要はない（N ページ分のハッシュ計算を定数時間
+        の鍵導出に置き換える）。
+        """
+        return hashlib.sha256(f"{parent_hash}:page:{page_number}".encode('utf-8')).hexdigest()
     
     def _get_cache_file_path(self, file_hash: str, cache_level: CacheLevel) -> Path:
         """キャッシュファイルのパスを取得"""
@@ -127,15 +238,85 @@ class EnhancedDocumentIntelligenceCache:
         else:
             return self.page_cache_dir / f"{file_hash}.json"
     
+    # BLOB圧縮レベル（DIのJSONはbbox等の繰り返しが多く5〜10倍縮む）
+    _BLOB_COMPRESS_LEVEL = 3
+
+    def _store_blob(self, file_hash: str, payload: bytes) -> None:
+        """キャッシュペイロードを圧縮BLOBとして保存"""
+        compressed = zlib.compress(payload, self._BLOB_COMPRESS_LEVEL)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO cache_blobs (file_hash, data) VALUES (?, ?)',
+                (file_hash, sqlite3.Binary(compressed))
+            )
+
+    def _load_blob(self, file_hash: str) -> Optional[bytes]:
+        """キャッシュペイロードのBLOBを取得（なければNone）"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data FROM cache_blobs WHERE file_hash = ?', (file_hash,)
+            ).fetchone()
+        if row is None:
+            return None
+        blob = bytes(row[0])
+        try:
+            return zlib.decompress(blob)
+        except zlib.error:
+            # 圧縮導入前に保存された非圧縮BLOB
+            return blob
+
+    def _load_payload(self, file_hash: str, cache_level: CacheLevel) -> Optional[Dict[str, Any]]:
+        """
+        キャッシュペイロードを取得（BLOB優先、旧サイドカーJSONにフォールバック）
+        """
+        blob = self._load_blob(file_hash)
+        if blob is not None:
+            return json.loads(blob)
+
+        # 旧形式: サイドカーJSONファイル
+        # 大きなペイロードは TextIOWrapper 経由の逐次読みを避け、
+        # mmap してバイト列から直接パースする（二重コピーもなくなる）
+        cache_file = self._get_cache_file_path(file_hash, cache_level)
+        if cache_file.exists():
+            if cache_file.stat().st_size >= self._MMAP_THRESHOLD_BYTES:
+                with open(cache_file, 'rb') as f:
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        return json.loads(mm[:])
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return None
+
+    def _payload_exists(self, file_hash: str, cache_level: CacheLevel) -> bool:
+        """ペイロードがBLOBまたは旧サイドカーJSONとして存在するか"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT 1 FROM cache_blobs WHERE file_hash = ?', (file_hash,)
+            ).fetchone()
+        if row:
+            return True
+        return self._get_cache_file_path(file_hash, cache_level).exists()
+
+    # この回数の書き込みごとに PRAGMA optimize を実行する
+    _OPTIMIZE_WRITE_INTERVAL = 1000
+
+    def _run_optimize(self) -> None:
+        """クエリプランナ統計を更新（失敗しても無視）"""
+        try:
+            self._conn.execute('PRAGMA optimize')
+        except sqlite3.Error:
+            pass
+
+    def _count_writes_and_maybe_optimize(self, count: int) -> None:
+        """書き込み回数を数え、一定間隔でプランナ統計を更新"""
+        self._writes_since_optimize += count
+        if self._writes_since_optimize >= self._OPTIMIZE_WRITE_INTERVAL:
+            self._writes_since_optimize = 0
+            self._run_optimize()
+
     def _save_cache_metadata(self, metadata: CacheMetadata):
         """メタデータをデータベースに保存"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''
-                INSERT OR REPLACE INTO cache_metadata 
-                (file_hash, cache_type, original_filename, page_number, parent_document_hash,
-                 file_size, processing_time, created_at, last_accessed, access_count, content_length)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+        with self._lock:
+            self._conn.execute(self._UPSERT_METADATA_SQL, (
                 metadata.file_hash,
                 metadata.cache_type.value,
                 metadata.original_filename,
@@ -148,12 +329,12 @@ class EnhancedDocumentIntelligenceCache:
                 metadata.access_count,
                 metadata.content_length
             ))
-            conn.commit()
+            self._count_writes_and_maybe_optimize(1)
     
     def _get_cache_metadata(self, file_hash: str) -> Optional[CacheMetadata]:
         """メタデータをデータベースから取得"""
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
+        with self._lock:
+            cursor = self._conn.execute(
                 'SELECT * FROM cache_metadata WHERE file_hash = ?',
                 (file_hash,)
             )
@@ -177,100 +358,147 @@ class EnhancedDocumentIntelligenceCache:
     
     def _update_access_info(self, file_hash: str):
         """アクセス情報を更新"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute('''
+        with self._lock:
+            self._conn.execute('''
                 UPDATE cache_metadata 
                 SET last_accessed = ?, access_count = access_count + 1
                 WHERE file_hash = ?
             ''', (datetime.now().isoformat(), file_hash))
-            conn.commit()
     
+    def _exists_by_hash(self, file_hash: str, cache_level: CacheLevel) -> bool:
+        """計算済みハッシュでキャッシュの存在を判定（再ハッシュなし）"""
+        metadata = self._get_cache_metadata(file_hash)
+        return metadata is not None and self._payload_exists(file_hash, cache_level)
+
     def has_full_document_cache(self, file_bytes: bytes, filename: str) -> bool:
         """PDF全体のキャッシュが存在するかチェック"""
-        file_hash = self._get_file_hash(file_bytes)
-        cache_file = self._get_cache_file_path(file_hash, CacheLevel.FULL_DOCUMENT)
-        metadata = self._get_cache_metadata(file_hash)
-        
-        return cache_file.exists() and metadata is not None
+        return self._exists_by_hash(self._get_file_hash(file_bytes), CacheLevel.FULL_DOCUMENT)
     
     def has_page_cache(self, page_bytes: bytes, filename: str, page_number: int, parent_hash: str) -> bool:
         """個別ページのキャッシュが存在するかチェック"""
-        page_hash = self._get_file_hash(page_bytes, f"page_{page_number}")
-        cache_file = self._get_cache_file_path(page_hash, CacheLevel.INDIVIDUAL_PAGE)
-        metadata = self._get_cache_metadata(page_hash)
-        
-        return cache_file.exists() and metadata is not None
+        page_hash = self._get_page_hash(parent_hash, page_number)
+        return self._exists_by_hash(page_hash, CacheLevel.INDIVIDUAL_PAGE)
     
-    def get_full_document_cache(self, file_bytes: bytes, filename: str) -> Optional[List[Dict[str, Any]]]:
-        """PDF全体のキャッシュを取得"""
-        file_hash = self._get_file_hash(file_bytes)
+    def get_if_present(self, file_bytes: bytes, file_name: str, file_hash: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        存在すれば全文書キャッシュを返す（旧キャッシュと共通のインターフェース）
+
+        AzureDocumentIntelligenceClient はどちらのキャッシュ実装を
+        保持していても同じ呼び出しで照会できる必要があるため、
+        DocumentIntelligenceCache.get_if_present と同名・同シグネチャで
+        全文書キャッシュへ委譲する。
+
+        Args:
+            file_bytes: ファイルのバイトデータ
+            file_name: ファイル名
+            file_hash: 計算済みハッシュ値（省略時はここで計算）
+
+        Returns:
+            キャッシュされた処理結果、存在しない場合None
+        """
+        return self.get_full_document_cache(file_bytes, file_name, file_hash=file_hash)
+
+    def get_full_document_cache(self, file_bytes: bytes, filename: str, file_hash: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+        """PDF全体のキャッシュを取得（file_hash 指定時は再ハッシュしない）"""
+        # ハッシュは一度だけ計算して存在チェックと取得の両方に使う
+        # （has_* 経由だと同じバイト列を二度SHA-256に通すことになる）
+        if file_hash is None:
+            file_hash = self._get_file_hash(file_bytes)
         
-        if not self.has_full_document_cache(file_bytes, filename):
+        if not self._exists_by_hash(file_hash, CacheLevel.FULL_DOCUMENT):
             self.session_stats["cache_misses"] += 1
             return None
         
         try:
-            cache_file = self._get_cache_file_path(file_hash, CacheLevel.FULL_DOCUMENT)
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                cached_data = json.load(f)
+            cached_data = self._load_payload(file_hash, CacheLevel.FULL_DOCUMENT)
+            if cached_data is None:
+                self.session_stats["cache_misses"] += 1
+                return None
             
             # アクセス情報更新
             self._update_access_info(file_hash)
             self.session_stats["cache_hits"] += 1
             self.session_stats["api_calls_saved"] += 1
             
-            print(f"📋 全文書キャッシュヒット: {filename}")
+            log_proofreading_debug(f"全文書キャッシュヒット: {filename}")
             return cached_data["pages_content"]
             
         except Exception as e:
-            print(f"❌ 全文書キャッシュ読み込みエラー: {e}")
+            log_proofreading_error("全文書キャッシュ読み込みエラー", e)
             self.session_stats["cache_misses"] += 1
             return None
     
     def get_page_cache(self, page_bytes: bytes, filename: str, page_number: int, parent_hash: str) -> Optional[Dict[str, Any]]:
         """個別ページのキャッシュを取得"""
-        page_hash = self._get_file_hash(page_bytes, f"page_{page_number}")
+        # 鍵は親ハッシュから定数時間で導出（ページバイト列は走査しない）
+        page_hash = self._get_page_hash(parent_hash, page_number)
         
-        if not self.has_page_cache(page_bytes, filename, page_number, parent_hash):
+        if not self._exists_by_hash(page_hash, CacheLevel.INDIVIDUAL_PAGE):
             self.session_stats["cache_misses"] += 1
             return None
         
         try:
-            cache_file = self._get_cache_file_path(page_hash, CacheLevel.INDIVIDUAL_PAGE)
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                cached_data = json.load(f)
+            cached_data = self._load_payload(page_hash, CacheLevel.INDIVIDUAL_PAGE)
+            if cached_data is None:
+                self.session_stats["cache_misses"] += 1
+                return None
             
             # アクセス情報更新
             self._update_access_info(page_hash)
             self.session_stats["cache_hits"] += 1
             self.session_stats["api_calls_saved"] += 1
             
-            print(f"📄 ページキャッシュヒット: {filename} ページ{page_number}")
+            log_proofreading_debug(f"ページキャッシュヒット: {filename} ページ{page_number}")
             return cached_data["page_content"]
             
         except Exception as e:
-            print(f"❌ ページキャッシュ読み込みエラー: {e}")
+            log_proofreading_error("ページキャッシュ読み込みエラー", e)
             self.session_stats["cache_misses"] += 1
             return None
     
-    def save_full_document_cache(self, file_bytes: bytes, filename: str, pages_content: List[Dict[str, Any]], processing_time: float = 0.0) -> bool:
-        """PDF全体のキャッシュを保存"""
-        file_hash = self._get_file_hash(file_bytes)
+    def save_cache(self, file_bytes: bytes, file_name: str, pages_content: List[Dict[str, Any]], file_hash: Optional[str] = None) -> bool:
+        """
+        処理結果を全文書キャッシュとして保存（旧キャッシュと共通のインターフェース）
+
+        get_if_present と対になる保存側の委譲。クライアントがキャッシュ
+        実装を意識せず save_cache を呼べるようにする。
+
+        Args:
+            file_bytes: ファイルのバイトデータ
+            file_name: ファイル名
+            pages_content: Document Intelligence の処理結果
+            file_hash: 計算済みハッシュ値（省略時はここで計算）
+
+        Returns:
+            保存成功時True
+        """
+        return self.save_full_document_cache(
+            file_bytes, file_name, pages_content, file_hash=file_hash
+        )
+
+    def save_full_document_cache(self, file_bytes: bytes, filename: str, pages_content: List[Dict[str, Any]], processing_time: float = 0.0, file_hash: Optional[str] = None) -> bool:
+        """PDF全体のキャッシュを保存（file_hash 指定時は再ハッシュしない）"""
+        if file_hash is None:
+            file_hash = self._get_file_hash(file_bytes)
         
         try:
+            # タイムスタンプは1回だけ生成して全フィールドで共有する
+            # （created_at == last_accessed の整合も保たれる）
+            now_iso = datetime.now().isoformat()
+
             # キャッシュデータ構築
             cache_data = {
                 "file_hash": file_hash,
                 "filename": filename,
-                "cached_at": datetime.now().isoformat(),
+                "cached_at": now_iso,
                 "cache_type": "full_document",
                 "pages_content": pages_content
             }
             
-            # ファイル保存
-            cache_file = self._get_cache_file_path(file_hash, CacheLevel.FULL_DOCUMENT)
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
+            # シリアライズは1回だけ行い、同じバイト列を
+            # BLOB保存と content_length の両方に使う
+            payload = json.dumps(cache_data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            self._store_blob(file_hash, payload)
             
             # メタデータ保存
             metadata = CacheMetadata(
@@ -279,86 +507,115 @@ class EnhancedDocumentIntelligenceCache:
                 original_filename=filename,
                 file_size=len(file_bytes),
                 processing_time=processing_time,
-                created_at=datetime.now().isoformat(),
-                last_accessed=datetime.now().isoformat(),
+                created_at=now_iso,
+                last_accessed=now_iso,
                 access_count=0,
-                content_length=len(json.dumps(pages_content))
+                content_length=len(payload)
             )
             self._save_cache_metadata(metadata)
             
-            print(f"💾 全文書キャッシュ保存: {filename}")
+            log_proofreading_debug(f"全文書キャッシュ保存: {filename}")
             return True
             
         except Exception as e:
-            print(f"❌ 全文書キャッシュ保存エラー: {e}")
+            log_proofreading_error("全文書キャッシュ保存エラー", e)
             return False
     
     def save_page_cache(self, page_bytes: bytes, filename: str, page_number: int, parent_hash: str, page_content: Dict[str, Any], processing_time: float = 0.0) -> bool:
         """個別ページのキャッシュを保存"""
-        page_hash = self._get_file_hash(page_bytes, f"page_{page_number}")
-        
-        try:
-            # キャッシュデータ構築
-            cache_data = {
-                "page_hash": page_hash,
-                "filename": filename,
-                "page_number": page_number,
-                "parent_document_hash": parent_hash,
-                "cached_at": datetime.now().isoformat(),
-                "cache_type": "individual_page",
-                "page_content": page_content
-            }
-            
-            # ファイル保存
-            cache_file = self._get_cache_file_path(page_hash, CacheLevel.INDIVIDUAL_PAGE)
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
-            
-            # メタデータ保存
-            metadata = CacheMetadata(
-                file_hash=page_hash,
-                cache_type=CacheLevel.INDIVIDUAL_PAGE,
-                original_filename=filename,
-                page_number=page_number,
-                parent_document_hash=parent_hash,
-                file_size=len(page_bytes),
-                processing_time=processing_time,
-                created_at=datetime.now().isoformat(),
-                last_accessed=datetime.now().isoformat(),
-                access_count=0,
-                content_length=len(json.dumps(page_content))
-            )
-            self._save_cache_metadata(metadata)
-            
-            print(f"💾 ページキャッシュ保存: {filename} ページ{page_number}")
-            return True
-            
-        except Exception as e:
-            print(f"❌ ページキャッシュ保存エラー: {e}")
-            return False
+        return self.save_page_cache_batch(
+            [(page_bytes, filename, page_number, parent_hash, page_content, processing_time)]
+        ) == 1
+
+    def save_page_cache_batch(
+        self,
+        pages: List[Tuple[bytes, str, int, str, Dict[str, Any], float]]
+    ) -> int:
+        """
+        複数ページのキャッシュを1トランザクションでまとめて保存
+
+        ページごとに接続＋INSERT＋コミットを繰り返すと fsync がページ数分
+        発生するため、JSON書き出し後にメタデータを executemany で一括挿入
+        して fsync を1回に抑えます。
+
+        Args:
+            pages: (page_bytes, filename, page_number, parent_hash,
+                    page_content, processing_time) のリスト
+
+        Returns:
+            保存に成功したページ数
+        """
+        metadata_rows = []
+        # タイムスタンプはバッチで1回だけ生成する
+        now_iso = datetime.now().isoformat()
+
+        for page_bytes, filename, page_number, parent_hash, page_content, processing_time in pages:
+            page_hash = self._get_page_hash(parent_hash, page_number)
+
+            try:
+                # キャッシュデータ構築
+                cache_data = {
+                    "page_hash": page_hash,
+                    "filename": filename,
+                    "page_number": page_number,
+                    "parent_document_hash": parent_hash,
+                    "cached_at": now_iso,
+                    "cache_type": "individual_page",
+                    "page_content": page_content
+                }
+
+                # シリアライズは1回だけ行い、同じバイト列を
+                # BLOB保存と content_length の両方に使う
+                payload = json.dumps(cache_data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+                self._store_blob(page_hash, payload)
+
+                metadata_rows.append((
+                    page_hash,
+                    CacheLevel.INDIVIDUAL_PAGE.value,
+                    filename,
+                    page_number,
+                    parent_hash,
+                    len(page_bytes),
+                    processing_time,
+                    now_iso,
+                    now_iso,
+                    0,
+                    len(payload)
+                ))
+
+                log_proofreading_debug(f"ページキャッシュ保存: {filename} ページ{page_number}")
+
+            except Exception as e:
+                log_proofreading_error("ページキャッシュ保存エラー", e)
+
+        if metadata_rows:
+            with self._lock:
+                self._conn.execute('BEGIN IMMEDIATE')
+                try:
+                    self._conn.executemany(self._UPSERT_METADATA_SQL, metadata_rows)
+                    self._conn.execute('COMMIT')
+                    self._count_writes_and_maybe_optimize(len(metadata_rows))
+                except Exception:
+                    self._conn.execute('ROLLBACK')
+                    raise
+
+        return len(metadata_rows)
     
     def get_cache_recommendations(self) -> Dict[str, Any]:
         """キャッシュ最適化の推奨事項を生成"""
-        with sqlite3.connect(self.db_path) as conn:
-            # 全体統計
-            total_count = conn.execute('SELECT COUNT(*) FROM cache_metadata').fetchone()[0]
-            
-            # アクセス頻度分析
-            low_access = conn.execute(
-                'SELECT COUNT(*) FROM cache_metadata WHERE access_count <= 1'
-            ).fetchone()[0]
-            
-            # サイズ分析
-            large_files = conn.execute(
-                'SELECT COUNT(*) FROM cache_metadata WHERE file_size > 5242880'  # 5MB
-            ).fetchone()[0]
-            
-            # 古いファイル
-            cutoff_date = (datetime.now() - timedelta(days=30)).isoformat()
-            old_files = conn.execute(
-                'SELECT COUNT(*) FROM cache_metadata WHERE last_accessed < ?',
-                (cutoff_date,)
-            ).fetchone()[0]
+        cutoff_date = (datetime.now() - timedelta(days=30)).isoformat()
+        
+        with self._lock:
+            # 4本の個別COUNTだとテーブルを4回走査するため、
+            # 条件付きSUMの1クエリ1パスに集約する
+            total_count, low_access, large_files, old_files = self._conn.execute('''
+                SELECT
+                    COUNT(*),
+                    COALESCE(SUM(CASE WHEN access_count <= 1 THEN 1 ELSE 0 END), 0),
+                    COALESCE(SUM(CASE WHEN file_size > 5242880 THEN 1 ELSE 0 END), 0),
+                    COALESCE(SUM(CASE WHEN last_accessed < ? THEN 1 ELSE 0 END), 0)
+                FROM cache_metadata
+            ''', (cutoff_date,)).fetchone()  # 5242880 = 5MB
         
         recommendations = []
         
@@ -385,16 +642,23 @@ class EnhancedDocumentIntelligenceCache:
         removed_count = 0
         cutoff_date = (datetime.now() - timedelta(days=days_old)).isoformat()
         
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock:
+            conn = self._conn
             # 削除対象を特定
+            # 列をまたぐ OR は単一インデックスでは引けないため、
+            # 各条件をインデックスが効く個別クエリにして UNION で束ねる
             query = '''
-                SELECT file_hash, cache_type FROM cache_metadata 
-                WHERE (last_accessed < ? OR access_count < ?)
+                SELECT file_hash, cache_type FROM cache_metadata WHERE last_accessed < ?
+                UNION
+                SELECT file_hash, cache_type FROM cache_metadata WHERE access_count < ?
             '''
             params = [cutoff_date, min_access_count]
             
             if max_size_mb:
-                query += ' OR file_size > ?'
+                query += '''
+                UNION
+                SELECT file_hash, cache_type FROM cache_metadata WHERE file_size > ?
+                '''
                 params.append(max_size_mb * 1024 * 1024)
             
             cursor = conn.execute(query, params)
@@ -408,21 +672,21 @@ class EnhancedDocumentIntelligenceCache:
                     if cache_file.exists():
                         cache_file.unlink()
                     
-                    # メタデータ削除
+                    # BLOB・メタデータ削除
+                    conn.execute('DELETE FROM cache_blobs WHERE file_hash = ?', (file_hash,))
                     conn.execute('DELETE FROM cache_metadata WHERE file_hash = ?', (file_hash,))
                     removed_count += 1
                     
                 except Exception as e:
-                    print(f"キャッシュアイテム削除エラー {file_hash}: {e}")
-            
-            conn.commit()
+                    log_proofreading_error(f"キャッシュアイテム削除エラー {file_hash}", e)
         
-        print(f"🧹 {removed_count}個のキャッシュアイテムを削除しました")
+        log_proofreading_info(f"{removed_count}個のキャッシュアイテムを削除しました")
         return removed_count
     
     def get_comprehensive_stats(self) -> Dict[str, Any]:
         """包括的な統計情報を取得"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._lock:
+            conn = self._conn
             # 基本統計
             stats = {}
             
@@ -457,5 +721,18 @@ class EnhancedDocumentIntelligenceCache:
             
             # セッション統計追加
             stats["session"] = self.session_stats
-            
-        return stats
\ No newline at end of file
+
+        return stats
+
+
+@lru_cache(maxsize=None)
+def get_enhanced_cache(cache_dir: str = "enhanced_di_cache") -> EnhancedDocumentIntelligenceCache:
+    """
+    cache_dir ごとにプロセス共有のキャッシュインスタンスを返す
+
+    AzureDocumentIntelligenceClient はリクエストごとに生成されるため、
+    そのたびにキャッシュを作ると SQLite 接続と atexit 登録が呼び出し数
+    だけ積み上がる。インスタンスをモジュールレベルで共有し、接続と
+    atexit 登録をプロセスで cache_dir あたり1組に抑える。
+    """
+    return EnhancedDocumentIntelligenceCache(cache_dir)
\ No newline at end of file
@@ -5,9 +5,14 @@ PDFページ分割ユーティリティ
 """
 
 import fitz  # PyMuPDF
-from typing import List, Dict, Any
+from typing import Iterator, List, Dict, Any
 import io
 from pathlib import Path
+from app.services.shared.logging_utils import (
+    log_proofreading_debug,
+    log_proofreading_error,
+    log_proofreading_info,
+)
 
 
 class PDFPageSplitter:
@@ -16,65 +21,84 @@ class PDFPageSplitter:
     def __init__(self):
         pass
     
-    def split_pdf_to_pages(self, pdf_bytes: bytes, file_name: str) -> List[Dict[str, Any]]:
+    def iter_pdf_pages(self, pdf_bytes: bytes, file_name: str) -> Iterator[Dict[str, Any]]:
         """
-        PDFバイトデータを個別ページに分割
+        PDFバイトデータを個別ページに分割して逐次返すジェネレータ
+        
+        全ページ分のバイトデータを同時にメモリへ載せず、1ページずつ
+        yield します。リストが必要な場合は split_pdf_to_pages を
+        使ってください。
         
         Args:
             pdf_bytes: PDFファイルのバイトデータ
             file_name: 元のファイル名
             
-        Returns:
-            List[Dict]: 各ページの情報を含む辞書のリスト
+        Yields:
+            Dict: 各ページの情報を含む辞書
             - page_number: ページ番号（1から開始）
             - page_bytes: そのページのPDFバイトデータ
             - source_file: 元のファイル名
             - page_file_name: ページ固有のファイル名
         """
-        pages_data = []
+        page_count = 0
         
         try:
             # PDFバイトデータからドキュメントを開く
             pdf_document = fitz.open(stream=pdf_bytes, filetype="pdf")
-            
+            file_stem = Path(file_name).stem
+
             # 各ページを個別に処理
+            # （1ページ用ドキュメントはページごとに作り直す。delete_page で
+            # 使い回すとページツリーから外れたオブジェクトが xref に残り、
+            # garbage=0 ではそのままシリアライズされて後続ページの
+            # バイト列が O(N^2) で肥大化するため）
             for page_num in range(pdf_document.page_count):
-                # 新しいPDFドキュメントを作成し、1ページだけ挿入
                 single_page_doc = fitz.open()
                 single_page_doc.insert_pdf(pdf_document, from_page=page_num, to_page=page_num)
-                
+
                 # 1ページのPDFをバイトデータに変換
-                page_bytes = single_page_doc.write()
-                
-                # ページ情報を保存
-                page_info = {
+                # （clean=False でコンテンツ整形を省き、シリアライズを軽くする）
+                page_bytes = single_page_doc.tobytes(garbage=1, deflate=True, clean=False)
+                single_page_doc.close()
+
+                page_count += 1
+                yield {
                     "page_number": page_num + 1,
                     "page_bytes": page_bytes,
                     "source_file": file_name,
-                    "page_file_name": f"{Path(file_name).stem}_page_{page_num + 1}.pdf"
+                    "page_file_name": f"{file_stem}_page_{page_num + 1}.pdf"
                 }
-                
-                pages_data.append(page_info)
-                
-                # メモリ解放
-                single_page_doc.close()
-            
+
             # 元のドキュメントを閉じる
             pdf_document.close()
             
-            print(f"PDFを{len(pages_data)}ページに分割しました: {file_name}")
+            log_proofreading_debug(f"PDFを{page_count}ページに分割しました: {file_name}")
             
         except Exception as e:
-            print(f"PDF分割中にエラーが発生しました ({file_name}): {e}")
+            log_proofreading_error(f"PDF分割中にエラーが発生しました ({file_name})", e)
             # エラーが発生した場合は元のPDFをそのまま返す
-            pages_data = [{
+            yield {
                 "page_number": 1,
                 "page_bytes": pdf_bytes,
                 "source_file": file_name,
                 "page_file_name": file_name
-            }]
+            }
+    
+    def split_pdf_to_pages(self, pdf_bytes: bytes, file_name: str) -> List[Dict[str, Any]]:
+        """
+        PDFバイトデータを個別ページに分割
         
-        return pages_data
+        下位互換のためリストを返す薄いラッパー。ストリーム処理したい
+        場合は iter_pdf_pages を直接使ってください。
+        
+        Args:
+            pdf_bytes: PDFファイルのバイトデータ
+            file_name: 元のファイル名
+            
+        Returns:
+            List[Dict]: 各ページの情報を含む辞書のリスト
+        """
+        return list(self.iter_pdf_pages(pdf_bytes, file_name))
     
     def get_pdf_info(self, pdf_bytes: bytes) -> Dict[str, Any]:
         """
@@ -100,7 +124,7 @@ class PDFPageSplitter:
             return info
             
         except Exception as e:
-            print(f"PDF情報取得中にエラーが発生しました: {e}")
+            log_proofreading_error("PDF情報取得中にエラーが発生しました", e)
             return {
                 "page_count": 0,
                 "metadata": {},
@@ -129,15 +153,13 @@ def split_pdf_files_to_pages(pdf_files: List[Dict[str, Any]]) -> List[Dict[str,
         file_bytes = pdf_file["content"]
         knowledge_type = pdf_file.get("knowledge_type", "PDF")
         
-        print(f"PDFページ分割処理中: {file_name}")
-        
-        # PDFを個別ページに分割
-        pages_data = splitter.split_pdf_to_pages(file_bytes, file_name)
+        log_proofreading_debug(f"PDFページ分割処理中: {file_name}")
         
-        # 各ページにナレッジタイプを追加
-        for page_data in pages_data:
+        # PDFを個別ページに分割（ジェネレータで1ページずつ消費）
+        for page_data in splitter.iter_pdf_pages(file_bytes, file_name):
+            # 各ページにナレッジタイプを追加
             page_data["knowledge_type"] = knowledge_type
             all_pages.append(page_data)
     
-    print(f"合計 {len(all_pages)} ページに分割しました")
+    log_proofreading_info(f"合計 {len(all_pages)} ページに分割しました")
     return all_pages
\ No newline at end of file
@@ -1,48 +1,157 @@
+from collections import namedtuple
+
 from langchain_chroma import Chroma
 from langchain_openai import OpenAIEmbeddings
 from langchain.schema import Document as LangchainDocument
 from libs.azure_client import ChromaDBClient, AzureOpenAIEmbeddings
-from typing import List
+from typing import List, Optional
 from app.schemas.schemas import KnowledgeFromLatex
 
+# 検索結果の軽量表現。LangchainDocumentはメタデータ辞書ごと保持する
+# 重いオブジェクトなので、本文と参照元だけ使う呼び出し側にはこちらを返す
+KnowledgeSnippet = namedtuple("KnowledgeSnippet", ["content", "reference_url"])
+
+# 1回の埋め込み・投入リクエストに含めるドキュメント数
+# （埋め込みAPIのモデルレベルバッチングが効く範囲でまとめる）
+ADD_BATCH_SIZE = 128
+
+
 class VectorStoreService:
     def __init__(self):
         self.chroma_client = ChromaDBClient().get_chroma_client()
         self.openai_embeddings = AzureOpenAIEmbeddings().get_openai_embeddings()
         self.collection_name = "knowledge_base_db"
 
-    def add_knowledge_to_vector_store(self, knowledge_list: List[KnowledgeFromLatex]):
-            documents_to_add: List[LangchainDocument] = []
-            for knowledge_item in knowledge_list:
-                page_content = knowledge_item.knowledge
+    def _build_document(self, knowledge_item: KnowledgeFromLatex) -> LangchainDocument:
+        """知識項目をChroma登録用のLangchainDocumentに変換する"""
+        # ChromaDBのメタデータ値は string, int, float, bool である必要があります。
+        # issue_category はリストなので、文字列に変換します (例:カンマ区切り)。
+        issue_category_str = ", ".join(knowledge_item.issue_category) if knowledge_item.issue_category else None
 
-                # ChromaDBのメタデータ値は string, int, float, bool である必要があります。
-                # issue_category はリストなので、文字列に変換します (例:カンマ区切り)。
-                issue_category_str = ", ".join(knowledge_item.issue_category) if knowledge_item.issue_category else None
+        current_metadata = {
+            "issue_category": issue_category_str,
+            "reference_url": knowledge_item.reference_url,
+            "knowledge_type": knowledge_item.knowledge_type,
+        }
+        # None の値を持つキーをメタデータから除外する (ChromaDBがNoneを許容しない場合があるため)
+        filtered_metadata = {k: v for k, v in current_metadata.items() if v is not None}
 
-                current_metadata: Dict[str, Any] = {
-                    "issue_category": issue_category_str,
-                    "reference_url": knowledge_item.reference_url,
-                    "knowledge_type": knowledge_item.knowledge_type,
-                }
-                # None の値を持つキーをメタデータから除外する (ChromaDBがNoneを許容しない場合があるため)
-                filtered_metadata = {k: v for k, v in current_metadata.items() if v is not None}
+        return LangchainDocument(page_content=knowledge_item.knowledge, metadata=filtered_metadata)
 
-                doc = LangchainDocument(page_content=page_content, metadata=filtered_metadata)
-                documents_to_add.append(doc)
+    def add_knowledge_to_vector_store(self, knowledge_list: List[KnowledgeFromLatex]):
+        documents_to_add = [self._build_document(item) for item in knowledge_list]
 
-            if documents_to_add:
-                self.chroma_client.add_documents(documents=documents_to_add)
+        # 巨大リストを1リクエストで投げず、バッチ単位で埋め込み・投入する
+        # （add_documents はバッチ内の全文書を embed_documents 1回で
+        # 埋め込むため、HTTP往復はバッチごとに1回で済む）
+        for start in range(0, len(documents_to_add), ADD_BATCH_SIZE):
+            self.chroma_client.add_documents(
+                documents=documents_to_add[start:start + ADD_BATCH_SIZE]
+            )
 
-    def get_knowledge_from_vector_store(self, query: str, k: int = 10):
+    def get_knowledge_from_vector_store(self, query: str, k: int = 10, embedding: Optional[List[float]] = None):
+        # 計算済みのクエリ埋め込みがあればそのまま使う（セマンティック
+        # キャッシュが embed 済みのクエリを Chroma 側で再 embed しない）
+        if embedding is not None:
+            return self.chroma_client.similarity_search_by_vector(embedding, k)
         results = self.chroma_client.similarity_search(query, k)
         return results
-    
-    def get_knowledge_from_vector_store_by_issue_category(self, query: str, issue_category: str):
+
+    def get_knowledge_from_vector_store_batch(self, queries: List[str], k: int = 10):
+        """
+        複数クエリをまとめて検索する
+
+        クエリの埋め込みを1回のAPIリクエストでバッチ取得し、
+        ANN検索は得られたベクトルで個別に行う。クエリごとに
+        埋め込みAPIを往復するより呼び出し回数を大幅に減らせる。
+
+        Args:
+            queries (List[str]): 検索クエリのリスト
+            k (int): クエリごとの取得件数
+
+        Returns:
+            List[List[LangchainDocument]]: クエリごとの検索結果リスト（入力と同順）
+        """
+        if not queries:
+            return []
+        vectors = self.openai_embeddings.embed_documents(queries)
+        return [
+            self.chroma_client.similarity_search_by_vector(vector, k)
+            for vector in vectors
+        ]
+
+    def get_knowledge_snippets_batch(self, queries: List[str], k: int = 10):
+        """
+        複数クエリをまとめて検索し、軽量なスニペット表現で返す
+
+        校正パイプラインが使うのは本文と参照元だけなので、
+        LangchainDocumentをストア境界で KnowledgeSnippet に変換して
+        メタデータ辞書の保持と属性アクセスのコストを省く。
+
+        Args:
+            queries (List[str]): 検索クエリのリスト
+            k (int): クエリごとの取得件数
+
+        Returns:
+            List[List[KnowledgeSnippet]]: クエリごとのスニペットリスト（入力と同順）
+        """
+        return [
+            [
+                KnowledgeSnippet(doc.page_content, doc.metadata.get("reference_url", "Unknown"))
+                for doc in docs
+            ]
+            for docs in self.get_knowledge_from_vector_store_batch(queries, k)
+        ]
+
+    def get_knowledge_snippets_with_scores_batch(self, queries: List[str], k: int = 10):
+        """
+        複数クエリをまとめて検索し、関連度スコア付きスニペットで返す
+
+        埋め込みはバッチ取得し、検索結果は (KnowledgeSnippet, score) の
+        タプルで返す。score はコサイン距離を 1 - 距離 で変換した関連度
+        （大きいほど類似）で、呼び出し側がトークン予算内で上位から詰める
+        用途に使う。
+
+        Args:
+            queries (List[str]): 検索クエリのリスト
+            k (int): クエリごとの取得件数
+
+        Returns:
+            List[List[Tuple[KnowledgeSnippet, float]]]: クエリごとのスコア付き結果
+        """
+        if not queries:
+            return []
+        vectors = self.openai_embeddings.embed_documents(queries)
+        results = []
+        for vector in vectors:
+            scored_docs = self.chroma_client.similarity_search_by_vector_with_relevance_scores(
+                vector, k
+            )
+            results.append([
+                (
+                    KnowledgeSnippet(doc.page_content, doc.metadata.get("reference_url", "Unknown")),
+                    # similarity_search_by_vector_with_relevance_scores は名前に
+                    # 反してコサイン距離（小さいほど類似）を生のまま返すため、
+                    # ここで 1 - 距離 に変換して「大きいほど類似」に揃える
+                    1.0 - distance,
+                )
+                for doc, distance in scored_docs
+            ])
+        return results
+
+    def get_knowledge_from_vector_store_by_issue_category(self, query: str, issue_category: str, embedding: Optional[List[float]] = None):
+        if embedding is not None:
+            return self.chroma_client.similarity_search_by_vector(
+                embedding, filter={"issue_category": issue_category}
+            )
         results = self.chroma_client.similarity_search(query, filter={"issue_category": issue_category})
         return results
 
-    def get_knowledge_from_vector_store_by_knowledge_type(self, query: str, knowledge_type: str):
+    def get_knowledge_from_vector_store_by_knowledge_type(self, query: str, knowledge_type: str, embedding: Optional[List[float]] = None):
+        if embedding is not None:
+            return self.chroma_client.similarity_search_by_vector(
+                embedding, filter={"knowledge_type": knowledge_type}
+            )
         results = self.chroma_client.similarity_search(query, filter={"knowledge_type": knowledge_type})
         return results
     
@@ -1,3 +1,6 @@
+import asyncio
+from functools import lru_cache
+
 from fastapi import UploadFile, File
 from libs.azure_client import AzureDocumentIntelligenceClient, AzureOpenAIClient
 from app.services.shared.output_file import save_output_file
@@ -5,8 +8,16 @@ from langchain_core.prompts import ChatPromptTemplate
 from app.schemas.schemas import StructureResultResponse
 from app.services.proofreading.prompts.document_analysis_prompts import SYSTEM_PROMPT, USER_PROMPT
 
-openai_client = AzureOpenAIClient()
-client = openai_client.get_openai_client()
+
+@lru_cache(maxsize=1)
+def _get_openai_client():
+    """
+    OpenAIクライアントを取得（初回利用時に遅延生成）
+
+    インポート時に生成すると、認証情報の読み込みとHTTPセッション構築を
+    ワーカー起動時に必ず払うことになるため、初回呼び出しまで遅らせる。
+    """
+    return AzureOpenAIClient().get_openai_client()
 
 
 async def analyze_document_process(file: UploadFile = File(...)):
@@ -24,14 +35,20 @@ async def analyze_document_process(file: UploadFile = File(...)):
 
     file_bytes = await file.read()         
 
-    poller = doc_client.begin_analyze_document(
+    poller = await asyncio.to_thread(
+        doc_client.begin_analyze_document,
         model_id="prebuilt-read",
-        body=file_bytes,                    
-        output_content_format="markdown",  
+        body=file_bytes,
+        output_content_format="markdown",
     )
-    result = poller.result()
+    # poller.result() は完了まで数秒ブロックするため、完了を非同期に
+    # 待ってからワーカースレッドで結果を取り出し、イベントループを
+    # 塞がないようにする
+    while not poller.done():
+        await asyncio.sleep(0.5)
+    result = await asyncio.to_thread(poller.result)
     result_dict = result.as_dict()
-    save_output_file(result_dict)
+    await asyncio.to_thread(save_output_file, result_dict)
     return {"result": result_dict}
 
 
@@ -51,7 +68,7 @@ async def structure_markdown(result_dict: dict):
             ("user", USER_PROMPT)
         ]
     )
-    chain = prompt | client.with_structured_output(
+    chain = prompt | _get_openai_client().with_structured_output(
         StructureResultResponse
     )
     result = chain.invoke({"content": result_dict["result"]["content"]})
@@ -79,9 +96,13 @@ async def process_pdf(file: UploadFile = File(...)):
         'markdown' キーに整形済み Markdown テキストを含む
     """
     # Step 1: Azure Document Intelligence による文書分析・テキスト抽出
-    raw_analysis_result = await analyze_document_process(file)
-    
+    # 分析の待ち時間（数秒）に Step 2 で使う OpenAI クライアントの構築を
+    # 重ねておき、分析完了後の整形呼び出しを即座に始められるようにする
+    analysis_task = asyncio.create_task(analyze_document_process(file))
+    warmup_task = asyncio.create_task(asyncio.to_thread(_get_openai_client))
+    raw_analysis_result, _ = await asyncio.gather(analysis_task, warmup_task)
+
     # Step 2: LLM による学術文書として最適化された Markdown 整形
     structured_markdown_result = await structure_markdown(raw_analysis_result)
-    
+
     return structured_markdown_result
\ No newline at end of file
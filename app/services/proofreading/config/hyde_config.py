@@ -6,6 +6,10 @@ HyDE (Hypothetical Document Embeddings) 処理の設定値
 HYDE_DEFAULT_MAX_QUERIES = 10
 HYDE_DEFAULT_MIN_QUERIES = 3
 
+# 複数セクションをまとめて処理する際の同時リクエスト数
+# （Azure OpenAIのレート制限内に収める）
+HYDE_BATCH_MAX_CONCURRENCY = 8
+
 # セクション分析の設定
 SECTION_MIN_LENGTH = 10  # 最小セクション長
 SECTION_MAX_LENGTH = 5000  # 最大セクション長
@@ -5,6 +5,41 @@
 # ベクターストア検索設定
 KNOWLEDGE_SEARCH_TOP_K = 1
 
+# 知識ブロックのトークン予算
+# 検索結果を無制限に連結するとLLM入力が論文サイズに比例して膨らむため、
+# 関連度の高い順にこの予算まで詰めて打ち切る
+KNOWLEDGE_TOKEN_BUDGET = 4000
+
+# セクション校正の同時実行数（Azure OpenAIのレート制限内に収める）
+PROOFREADING_SECTION_MAX_WORKERS = 4
+
+# バッチ校正で1回のLLM呼び出しにまとめるセクション数
+# （プロンプトの共通部分をバッチ内で償却する。大きくしすぎると
+# 出力トークン上限に当たるため4程度に抑える）
+PROOFREADING_BATCH_SIZE = 4
+
+# 校正結果の完全一致キャッシュ設定
+# セクション本文のハッシュで照合し、同一内容の再校正を丸ごと省略する
+# （セマンティックキャッシュより手前で引く安価な層。JSONで永続化）
+ENABLE_PROOFREAD_EXACT_CACHE = True
+PROOFREAD_EXACT_CACHE_DIR = "proofread_section_cache"
+PROOFREAD_EXACT_CACHE_MAX_ENTRIES = 1024
+
+# 校正結果のセマンティックキャッシュ設定
+# セクションの埋め込みで照合し、軽微な編集しかない再実行では
+# HyDE・検索・LLM校正をすべて省略してキャッシュ済み結果を返す
+ENABLE_PROOFREAD_SEMANTIC_CACHE = True
+PROOFREAD_SEMANTIC_CACHE_THRESHOLD = 0.97
+PROOFREAD_SEMANTIC_CACHE_MAX_ENTRIES = 256
+
+# LLMカスケード設定
+# 有効にすると、まず既定の安価なモデルで校正し、自己評価信頼度が
+# 閾値を下回った場合のみ上位モデルで再校正する（コスト削減策）。
+# 修正なし（post == pre）の結果はそのまま採用する。
+ENABLE_LLM_CASCADE = False
+CASCADE_ESCALATION_MODEL = "gpt-4.1"
+CASCADE_CONFIDENCE_THRESHOLD = 0.7
+
 # ログ出力設定
 ENABLE_DEBUG_LOGGING = True
 
@@ -20,6 +20,13 @@ DEFAULT_CHUNK_OVERLAP = 100
 MIN_TEX_FILE_SIZE = 10  # bytes
 MAX_TEX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
 
+# チャンキングのプロセスプール設定
+# LaTeX分割はCPUバウンドでGILを握るため、この文字数以上の入力は
+# サブプロセスへオフロードして他リクエストの処理を妨げないようにする
+# （小さい入力はプロセス間のシリアライズコストの方が高くつく）
+CHUNKING_PROCESS_POOL_THRESHOLD = 200_000  # chars
+CHUNKING_POOL_MAX_WORKERS = os.cpu_count() or 2
+
 # 校正モード
 class ProofreadingMode:
     WITH_KNOWLEDGE = "with_knowledge"
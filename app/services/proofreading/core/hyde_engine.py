@@ -1,7 +1,8 @@
 """
 HyDE (Hypothetical Document Embeddings) クエリ生成エンジン
 """
-from typing import List
+import hashlib
+from typing import Dict, List
 from langchain.prompts import ChatPromptTemplate
 
 from app.schemas.schemas import CreateQueriesByHyDE
@@ -9,20 +10,42 @@ from app.services.shared.client_factory import ClientFactory
 from app.services.shared.logging_utils import log_proofreading_debug, log_proofreading_info
 from app.services.proofreading.prompts.hyde_prompts import HYDE_SYSTEM_PROMPT, HYDE_USER_PROMPT
 from app.services.proofreading.config.hyde_config import (
-    SECTION_MIN_LENGTH, 
+    SECTION_MIN_LENGTH,
     SECTION_MAX_LENGTH,
+    HYDE_BATCH_MAX_CONCURRENCY,
     HYDE_DEFAULT_MAX_QUERIES,
     HYDE_DEFAULT_MIN_QUERIES
 )
 from app.services.shared.exceptions import ProofreadingError
 
+# プロンプトテンプレートはプロセス内で不変のため、モジュールロード時に
+# 一度だけ構築する（インスタンス生成ごとの解析コストを省く）
+_HYDE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", HYDE_SYSTEM_PROMPT),
+    ("user", HYDE_USER_PROMPT),
+])
+
 
 class HyDEEngine:
     """HyDE手法によるクエリ生成エンジン"""
     
     def __init__(self):
         self.openai_client = ClientFactory.get_openai_client()
-    
+        # 構造化出力チェーンは全呼び出しで共通のため、一度だけ構築して使い回す
+        self.query_chain = (
+            _HYDE_PROMPT
+            | self.openai_client.get_openai_client().with_structured_output(CreateQueriesByHyDE)
+        )
+        # セクション内容のハッシュ -> 生成済みクエリのメモ化キャッシュ
+        # （同一セクションの再校正でHyDEのLLM呼び出しを省略する。
+        # エンジン層で持つことで、どの呼び出し経路でもヒットする）
+        self._query_cache: Dict[str, List[str]] = {}
+
+    @staticmethod
+    def _cache_key(section: str) -> str:
+        """セクション内容からキャッシュキーを生成する"""
+        return hashlib.blake2b(section.encode('utf-8'), digest_size=16).hexdigest()
+
     def validate_section(self, section: str) -> None:
         """
         セクションの妥当性を検証
@@ -58,19 +81,19 @@ class HyDEEngine:
         """
         try:
             self.validate_section(section)
-            
+
+            cache_key = self._cache_key(section)
+            cached = self._query_cache.get(cache_key)
+            if cached is not None:
+                log_proofreading_debug("HyDEクエリキャッシュヒット", {"queries": len(cached)})
+                return list(cached)
+
             log_proofreading_debug("HyDEクエリ生成開始", {
                 "section_length": len(section),
                 "section_preview": section[:100] + "..." if len(section) > 100 else section
             })
             
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", HYDE_SYSTEM_PROMPT),
-                ("user", HYDE_USER_PROMPT),
-            ])
-            
-            chain = prompt | self.openai_client.get_openai_client().with_structured_output(CreateQueriesByHyDE)
-            result = chain.invoke({"section_content": section})
+            result = self.query_chain.invoke({"section_content": section})
             
             queries = result.queries if result.queries else []
             
@@ -83,29 +106,67 @@ class HyDEEngine:
             
             log_proofreading_info(f"HyDEクエリ生成完了: {len(queries)}個のクエリを生成")
             log_proofreading_debug("生成されたクエリ", queries)
-            
-            return queries
+
+            self._query_cache[cache_key] = queries
+            return list(queries)
             
         except Exception as e:
             raise ProofreadingError(f"HyDEクエリ生成中にエラーが発生しました: {e}")
     
     def generate_queries_from_sections(self, sections: List[str]) -> List[List[str]]:
         """
-        複数のセクションからクエリを生成
-        
+        複数のセクションからクエリを生成（バッチLLM呼び出し）
+
+        セクションを1件ずつ逐次処理するとLLM往復がセクション数分
+        直列に並ぶため、キャッシュ未ヒット分をまとめて chain.batch に
+        渡し、同時リクエストとして重ねる。
+
         Args:
             sections (List[str]): セクションのリスト
-            
+
         Returns:
             List[List[str]]: 各セクションに対応するクエリリストのリスト
+
+        Raises:
+            ProofreadingError: クエリ生成に失敗した場合
         """
         log_proofreading_info(f"複数セクションのHyDEクエリ生成開始: {len(sections)}セクション")
-        
-        all_queries = []
+
+        all_queries: List[List[str]] = [[] for _ in sections]
+        pending_indices: List[int] = []
+        pending_keys: List[str] = []
+
         for i, section in enumerate(sections):
-            log_proofreading_debug(f"セクション {i+1}/{len(sections)} を処理中")
-            queries = self.generate_queries(section)
-            all_queries.append(queries)
-        
+            self.validate_section(section)
+            cache_key = self._cache_key(section)
+            cached = self._query_cache.get(cache_key)
+            if cached is not None:
+                log_proofreading_debug("HyDEクエリキャッシュヒット", {"queries": len(cached)})
+                all_queries[i] = list(cached)
+            else:
+                pending_indices.append(i)
+                pending_keys.append(cache_key)
+
+        if pending_indices:
+            payloads = [{"section_content": sections[i]} for i in pending_indices]
+            results = self.query_chain.batch(
+                payloads,
+                config={"max_concurrency": HYDE_BATCH_MAX_CONCURRENCY},
+                return_exceptions=True,
+            )
+            for index, cache_key, result in zip(pending_indices, pending_keys, results):
+                if isinstance(result, Exception):
+                    raise ProofreadingError(
+                        f"HyDEクエリ生成中にエラーが発生しました: {result}"
+                    )
+                queries = result.queries if result.queries else []
+                if len(queries) > HYDE_DEFAULT_MAX_QUERIES:
+                    log_proofreading_debug(
+                        f"生成されたクエリ数が多いため、上位{HYDE_DEFAULT_MAX_QUERIES}個に制限"
+                    )
+                    queries = queries[:HYDE_DEFAULT_MAX_QUERIES]
+                self._query_cache[cache_key] = queries
+                all_queries[index] = list(queries)
+
         log_proofreading_info("複数セクションのHyDEクエリ生成完了")
         return all_queries
\ No newline at end of file
@@ -1,32 +1,99 @@
 """
 校正処理のコアエンジン
 """
+import io
+import json
+from functools import lru_cache
 from typing import List, Tuple
+
+import tiktoken
 from langchain.prompts import ChatPromptTemplate
 
-from app.schemas.schemas import ProofreadResult
+from libs.azure_client import AzureOpenAIClient
+from app.schemas.schemas import BatchProofreadResult, ProofreadResult
 from app.services.shared.client_factory import ClientFactory
-from app.services.shared.logging_utils import log_proofreading_debug
-from app.services.proofreading.utils.proofreading_utils import (
-    format_knowledge_snippet, 
-    create_knowledge_block,
-    get_search_parameters
+from app.services.proofreading.config.proofreading_config import (
+    ENABLE_LLM_CASCADE,
+    CASCADE_ESCALATION_MODEL,
+    CASCADE_CONFIDENCE_THRESHOLD,
+    KNOWLEDGE_TOKEN_BUDGET
 )
+from app.services.shared.logging_utils import log_proofreading_debug
+from app.services.proofreading.utils.proofreading_utils import get_search_parameters
 from app.services.proofreading.prompts.proofreading_prompts import (
     PROOFREADING_SYSTEM_PROMPT,
     PROOFREADING_USER_PROMPT_WITH_KNOWLEDGE,
+    PROOFREADING_USER_PROMPT_WITH_KNOWLEDGE_BATCH,
     PROOFREADING_SYSTEM_PROMPT_WITHOUT_KNOWLEDGE,
     PROOFREADING_USER_PROMPT_WITHOUT_KNOWLEDGE
 )
 from app.services.shared.exceptions import ProofreadingError
 
+# プロンプトテンプレートはプロセス内で不変のため、モジュールロード時に
+# 一度だけ構築する（インスタンス生成ごとの解析コストを省く）
+_WITH_KNOWLEDGE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", PROOFREADING_SYSTEM_PROMPT),
+    ("user", PROOFREADING_USER_PROMPT_WITH_KNOWLEDGE),
+])
+_WITHOUT_KNOWLEDGE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", PROOFREADING_SYSTEM_PROMPT_WITHOUT_KNOWLEDGE),
+    ("user", PROOFREADING_USER_PROMPT_WITHOUT_KNOWLEDGE),
+])
+_BATCH_WITH_KNOWLEDGE_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", PROOFREADING_SYSTEM_PROMPT),
+    ("user", PROOFREADING_USER_PROMPT_WITH_KNOWLEDGE_BATCH),
+])
+
+
+@lru_cache(maxsize=1)
+def _get_token_encoder():
+    """知識ブロックのトークン数計測用エンコーダ（初回利用時に遅延生成）"""
+    return tiktoken.get_encoding("cl100k_base")
+
 class ProofreadingEngine:
     """校正処理のコアエンジンクラス"""
     
     def __init__(self):
         self.openai_client = ClientFactory.get_openai_client()
         self.vector_store = ClientFactory.get_vector_store()
-    
+        # 構造化出力チェーンはセクション間で共通のため、
+        # 呼び出しごとに再構築せず一度だけ構築して使い回す
+        structured_llm = self.openai_client.get_openai_client().with_structured_output(ProofreadResult)
+        self.with_knowledge_chain = _WITH_KNOWLEDGE_PROMPT | structured_llm
+        self.without_knowledge_chain = _WITHOUT_KNOWLEDGE_PROMPT | structured_llm
+        self.batch_with_knowledge_chain = (
+            _BATCH_WITH_KNOWLEDGE_PROMPT
+            | self.openai_client.get_openai_client().with_structured_output(BatchProofreadResult)
+        )
+        # LLMカスケード: 既定モデルの結果に自信がないときだけ上位モデルへ
+        # 昇格させる。無効時はチェーン自体を構築しない
+        self.escalation_chain = None
+        if ENABLE_LLM_CASCADE:
+            escalation_llm = AzureOpenAIClient(
+                model_name=CASCADE_ESCALATION_MODEL
+            ).get_openai_client().with_structured_output(ProofreadResult)
+            self.escalation_chain = _WITH_KNOWLEDGE_PROMPT | escalation_llm
+
+    def _needs_escalation(self, result: ProofreadResult) -> bool:
+        """
+        カスケードの上位モデルで再校正すべきか判定する
+
+        修正が不要だった結果はそのまま採用し、自己評価信頼度が
+        閾値を下回った場合のみ昇格させる。
+
+        Args:
+            result (ProofreadResult): 既定モデルの校正結果
+
+        Returns:
+            bool: 上位モデルで再校正すべき場合 True
+        """
+        if result.post_proofread == result.pre_proofread:
+            return False
+        return (
+            result.confidence is not None
+            and result.confidence < CASCADE_CONFIDENCE_THRESHOLD
+        )
+
     def retrieve_knowledge_snippets(self, queries: List[str]) -> str:
         """
         クエリリストから関連知識を検索し、整形済み文字列として返す
@@ -38,24 +105,59 @@ class ProofreadingEngine:
             str: 整形済み知識ブロック
         """
         try:
-            cited_snippets: List[str] = []
             search_params = get_search_parameters()
-            
-            for query in queries:
-                log_proofreading_debug("知識検索クエリ実行", query)
-                docs = self.vector_store.get_knowledge_from_vector_store(
-                    query, 
-                    k=search_params["k"]
-                )
-                
-                for doc in docs:
-                    snippet = format_knowledge_snippet(
-                        doc.page_content, 
-                        doc.metadata.get('reference_url', 'Unknown')
-                    )
-                    cited_snippets.append(snippet)
-            
-            return create_knowledge_block(cited_snippets)
+
+            if not queries:
+                return ""
+
+            # HyDEは重複・同義のクエリを返しがちなので、検索前に
+            # 順序を保ったまま重複クエリを除去して無駄な検索を省く
+            queries = list(dict.fromkeys(queries))
+
+            # 全クエリの埋め込みを1回のAPIリクエストでまとめて取得し、
+            # ANN検索はローカルのChromaに対してベクトルで行う
+            # （クエリごとに埋め込みAPIを往復するより大幅に速い）
+            log_proofreading_debug("知識検索クエリ実行", queries)
+            scored_per_query = self.vector_store.get_knowledge_snippets_with_scores_batch(
+                queries,
+                k=search_params["k"]
+            )
+
+            # 複数クエリが同じ知識を引くことが多いため、本文で重複排除する
+            # （重複した場合は最も高い関連度スコアを採用する）
+            best_by_content = {}
+            for scored_snippets in scored_per_query:
+                for snippet, score in scored_snippets:
+                    previous = best_by_content.get(snippet.content)
+                    if previous is None or score > previous[0]:
+                        best_by_content[snippet.content] = (score, snippet.reference_url)
+
+            # 関連度の高い順にトークン予算まで詰め、残りは切り捨てる
+            # （無制限に連結するとLLM入力コストとTTFTが論文サイズに比例して
+            # 膨らむため、入力長の上限を予測可能にする）
+            ranked = sorted(
+                best_by_content.items(),
+                key=lambda item: item[1][0],
+                reverse=True
+            )
+            encoder = _get_token_encoder()
+            buf = io.StringIO()
+            used_tokens = 0
+            for content, (_, reference_url) in ranked:
+                piece = f"{content} (参照: {reference_url})"
+                piece_tokens = len(encoder.encode(piece)) + (1 if used_tokens else 0)
+                if used_tokens and used_tokens + piece_tokens > KNOWLEDGE_TOKEN_BUDGET:
+                    log_proofreading_debug("知識ブロックをトークン予算で打ち切り", {
+                        "budget": KNOWLEDGE_TOKEN_BUDGET,
+                        "used_tokens": used_tokens
+                    })
+                    break
+                if used_tokens:
+                    buf.write("\n")
+                buf.write(piece)
+                used_tokens += piece_tokens
+
+            return buf.getvalue()
             
         except Exception as e:
             raise ProofreadingError(f"知識検索中にエラーが発生しました: {e}")
@@ -76,19 +178,23 @@ class ProofreadingEngine:
             ProofreadResult: 校正結果
         """
         try:
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", PROOFREADING_SYSTEM_PROMPT),
-                ("user", PROOFREADING_USER_PROMPT_WITH_KNOWLEDGE),
-            ])
-            
-            chain = prompt | self.openai_client.get_openai_client().with_structured_output(ProofreadResult)
-            
-            result: ProofreadResult = chain.invoke({
+            result: ProofreadResult = self.with_knowledge_chain.invoke({
                 "section_content": section_text,
                 "knowledge_contents": knowledge_block
             })
             result.pre_proofread = section_text
-            
+
+            if self.escalation_chain is not None and self._needs_escalation(result):
+                log_proofreading_debug("カスケード昇格", {
+                    "confidence": result.confidence,
+                    "escalation_model": CASCADE_ESCALATION_MODEL
+                })
+                result = self.escalation_chain.invoke({
+                    "section_content": section_text,
+                    "knowledge_contents": knowledge_block
+                })
+                result.pre_proofread = section_text
+
             log_proofreading_debug("校正完了", {
                 "original_length": len(section_text),
                 "result_length": len(result.post_proofread)
@@ -99,6 +205,50 @@ class ProofreadingEngine:
         except Exception as e:
             raise ProofreadingError(f"LLM校正処理中にエラーが発生しました: {e}")
     
+    def execute_proofreading_with_knowledge_batch(
+        self,
+        sections_with_knowledge: List[Tuple[str, str]]
+    ) -> List[ProofreadResult]:
+        """
+        複数セクションを1回のLLM呼び出しでまとめて校正する
+
+        プロンプトの共通部分（指示・出力仕様）をバッチ内で償却し、
+        往復回数を減らす。
+
+        Args:
+            sections_with_knowledge (List[Tuple[str, str]]):
+                (校正対象テキスト, 参照知識ブロック) のリスト
+
+        Returns:
+            List[ProofreadResult]: 入力と同順の校正結果リスト
+        """
+        try:
+            sections_json = json.dumps(
+                [
+                    {"id": i, "content": section_text, "knowledge": knowledge_block}
+                    for i, (section_text, knowledge_block) in enumerate(sections_with_knowledge)
+                ],
+                ensure_ascii=False
+            )
+            batch_result: BatchProofreadResult = self.batch_with_knowledge_chain.invoke({
+                "sections_json": sections_json
+            })
+            results = batch_result.results
+        except Exception as e:
+            raise ProofreadingError(f"バッチLLM校正処理中にエラーが発生しました: {e}")
+
+        if len(results) != len(sections_with_knowledge):
+            raise ProofreadingError(
+                f"バッチ校正の結果数が入力と一致しません "
+                f"(入力: {len(sections_with_knowledge)}, 出力: {len(results)})"
+            )
+
+        for (section_text, _), result in zip(sections_with_knowledge, results):
+            result.pre_proofread = section_text
+
+        log_proofreading_debug("バッチ校正完了", {"sections": len(results)})
+        return results
+
     def execute_proofreading_without_knowledge(self, section_text: str) -> ProofreadResult:
         """
         知識ベースを使用しないLLM校正を実行
@@ -110,14 +260,7 @@ class ProofreadingEngine:
             ProofreadResult: 校正結果
         """
         try:
-            prompt = ChatPromptTemplate.from_messages([
-                ("system", PROOFREADING_SYSTEM_PROMPT_WITHOUT_KNOWLEDGE),
-                ("user", PROOFREADING_USER_PROMPT_WITHOUT_KNOWLEDGE),
-            ])
-            
-            chain = prompt | self.openai_client.get_openai_client().with_structured_output(ProofreadResult)
-            
-            result: ProofreadResult = chain.invoke({
+            result: ProofreadResult = self.without_knowledge_chain.invoke({
                 "section_content": section_text
             })
             result.pre_proofread = section_text
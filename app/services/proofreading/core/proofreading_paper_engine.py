@@ -2,7 +2,9 @@
 英語論文校正のワークフローエンジン
 """
 import os
-from typing import List, Dict, Any
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional
 
 from app.services.knowledge.access_google_drive import download_pre_proofread_tex_file
 from app.services.knowledge.chunking_file import chunking_tex_file, split_latex_by_command, split_latex_by_sentence, split_latex_by_hybrid, split_latex_by_recursive_nlp
@@ -15,11 +17,43 @@ from app.services.proofreading.config.proofreading_paper_config import (
     ENGLISH_PAPER_FOLDER_ID_KEY,
     MIN_TEX_FILE_SIZE,
     MAX_TEX_FILE_SIZE,
+    CHUNKING_PROCESS_POOL_THRESHOLD,
+    CHUNKING_POOL_MAX_WORKERS,
     ProofreadingMode,
     SplitMode
 )
 from app.services.shared.exceptions import ProofreadingError
 
+# 分割モード -> 分割関数のディスパッチテーブル
+_SPLITTERS = {
+    SplitMode.SECTION: chunking_tex_file,
+    SplitMode.COMMAND: split_latex_by_command,
+    SplitMode.SENTENCE: split_latex_by_sentence,
+    SplitMode.HYBRID: split_latex_by_hybrid,
+    SplitMode.RECURSIVE_NLP: split_latex_by_recursive_nlp,
+}
+
+# 大きいLaTeXの分割をオフロードするプロセスプール（初回利用時に遅延生成）
+_chunking_pool: Optional[ProcessPoolExecutor] = None
+_chunking_pool_lock = threading.Lock()
+
+
+def _get_chunking_pool() -> ProcessPoolExecutor:
+    """
+    チャンキング用プロセスプールを取得（遅延初期化）
+
+    小さい入力しか来ないワーカーではプロセス起動コストを払わずに済む
+    よう、初回の大きい入力まで生成を遅らせる。
+    """
+    global _chunking_pool
+    if _chunking_pool is None:
+        with _chunking_pool_lock:
+            if _chunking_pool is None:
+                _chunking_pool = ProcessPoolExecutor(
+                    max_workers=CHUNKING_POOL_MAX_WORKERS
+                )
+    return _chunking_pool
+
 
 class ProofreadingPaperEngine:
     """英語論文校正ワークフローエンジン"""
@@ -44,21 +78,26 @@ class ProofreadingPaperEngine:
             )
         return folder_id
     
-    def _validate_tex_content(self, tex_content: str) -> None:
+    def _validate_tex_content(self, tex_content) -> None:
         """
         LaTeXコンテンツの妥当性を検証
-        
+
         Args:
-            tex_content (str): LaTeXコンテンツ
-            
+            tex_content (Union[str, bytes]): LaTeXコンテンツ
+
         Raises:
             ProofreadingError: コンテンツが無効な場合
         """
         if not tex_content or not tex_content.strip():
             raise ProofreadingError("LaTeXコンテンツが空です")
-        
-        content_size = len(tex_content.encode('utf-8'))
-        
+
+        # バイト列はそのまま長さを測り、文字列の場合のみエンコードして
+        # バイト数を求める（ダウンロード直後の検証で再エンコードを避ける）
+        if isinstance(tex_content, (bytes, bytearray)):
+            content_size = len(tex_content)
+        else:
+            content_size = len(tex_content.encode('utf-8'))
+
         if content_size < MIN_TEX_FILE_SIZE:
             raise ProofreadingError(f"ファイルサイズが小さすぎます (最小: {MIN_TEX_FILE_SIZE}bytes)")
         
@@ -97,18 +136,16 @@ class ProofreadingPaperEngine:
             
             # チャンキング
             log_proofreading_debug(f"LaTeXコンテンツを{split_mode}モードで分割")
-            if split_mode == SplitMode.SECTION:
-                sections = chunking_tex_file(tex_content)
-            elif split_mode == SplitMode.COMMAND:
-                sections = split_latex_by_command(tex_content)
-            elif split_mode == SplitMode.SENTENCE:
-                sections = split_latex_by_sentence(tex_content)
-            elif split_mode == SplitMode.HYBRID:
-                sections = split_latex_by_hybrid(tex_content)
-            elif split_mode == SplitMode.RECURSIVE_NLP:
-                sections = split_latex_by_recursive_nlp(tex_content)
-            else:
+            splitter = _SPLITTERS.get(split_mode)
+            if splitter is None:
                 raise ProofreadingError(f"サポートされていない分割モードです: {split_mode}")
+
+            # 大きい入力のLaTeX解析はCPUバウンドでGILを長時間握るため、
+            # サブプロセスへオフロードして他リクエストを妨げない
+            if len(tex_content) >= CHUNKING_PROCESS_POOL_THRESHOLD:
+                sections = _get_chunking_pool().submit(splitter, tex_content).result()
+            else:
+                sections = splitter(tex_content)
             
             log_proofreading_info(f"チャンク分割完了: {len(sections)}チャンク ({split_mode}モード)")
             
@@ -144,8 +181,12 @@ class ProofreadingPaperEngine:
             # Google Driveからファイルダウンロード
             log_proofreading_debug(f"Google Driveからファイルダウンロード: {self.folder_id}")
             tex_bytes = download_pre_proofread_tex_file(self.folder_id)
-            
-            # バイトをテキストに変換
+
+            # サイズ検証は生バイトのまま行い、不正なファイルは
+            # デコード前に弾く（10MB級の再エンコードを避ける）
+            self._validate_tex_content(tex_bytes)
+
+            # バイトをテキストに変換（デコードは一度だけ）
             tex_content = tex_bytes.decode('utf-8')
             
             # 校正処理
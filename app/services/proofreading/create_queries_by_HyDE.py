@@ -3,7 +3,8 @@ HyDE (Hypothetical Document Embeddings) 手法によるクエリ生成サービ
 
 英語学術論文の校正に必要な検索クエリを、仮想的な文書埋め込み手法により生成します。
 """
-from typing import List, Dict, Any
+import threading
+from typing import List, Dict, Any, Optional
 
 from app.services.proofreading.core.hyde_engine import HyDEEngine
 from app.services.shared.logging_utils import log_proofreading_info
@@ -66,8 +67,26 @@ class HyDEService:
             raise ProofreadingError(f"複数セクションHyDEクエリ生成中にエラーが発生しました: {e}")
 
 
-# 下位互換性のためのサービスインスタンス
-_service = HyDEService()
+# 下位互換性のためのサービスインスタンス（初回利用時に遅延生成）
+_service: Optional[HyDEService] = None
+_service_lock = threading.Lock()
+
+
+def _get_service() -> HyDEService:
+    """
+    互換ラッパー用のサービスインスタンスを取得（遅延初期化）
+
+    インポート時にインスタンスを生成すると、OpenAIクライアントの構築
+    コストをワーカー起動時に必ず払うことになるため、初回呼び出しまで
+    生成を遅らせる。
+    """
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = HyDEService()
+    return _service
+
 
 def create_queries_by_HyDE(section: str) -> List[str]:
     """
@@ -79,7 +98,7 @@ def create_queries_by_HyDE(section: str) -> List[str]:
     Returns:
         List[str]: 生成されたクエリリスト
     """
-    return _service.create_queries_by_HyDE(section)
+    return _get_service().create_queries_by_HyDE(section)
 
 def create_queries_by_HyDE_from_sections(sections: List[str]) -> List[List[str]]:
     """
@@ -91,4 +110,4 @@ def create_queries_by_HyDE_from_sections(sections: List[str]) -> List[List[str]]
     Returns:
         List[List[str]]: 各セクションに対応するクエリリストのリスト
     """
-    return _service.create_queries_by_HyDE_from_sections(sections)
\ No newline at end of file
+    return _get_service().create_queries_by_HyDE_from_sections(sections)
\ No newline at end of file
@@ -59,6 +59,43 @@ PROOFREADING_USER_PROMPT_WITH_KNOWLEDGE = """
 ```
 """
 
+PROOFREADING_USER_PROMPT_WITH_KNOWLEDGE_BATCH = """
+# 英語学術論文最高水準校正タスク（バッチ処理）
+以下のJSON配列に含まれる複数のLaTeXセクションを、それぞれ学術出版品質に引き上げるための校正を実行してください。
+
+## 入力形式
+- 各要素は {{"id": セクション番号, "content": 校正対象テキスト, "knowledge": 参照可能な校正知識ベース}} のオブジェクトです
+- 各セクションの校正には、そのセクションの knowledge のみを参照してください
+
+## 出力要求
+- **results**: 入力のid順に、各セクションの校正結果を1件ずつ含む配列
+- 各校正結果は以下のフィールドを持ちます：
+  - **pre_proofread**: 原文のセクション全体
+  - **post_proofread**: 校正後のセクション全体
+  - **description**: 校正全体の総括的な根拠・概要を**日本語**で簡潔に明記
+  - **sentences**: 校正箇所の英文（校正前後の対比オブジェクトの配列）
+
+## 重要な指示
+### sentencesフィールドについて
+- **sentences**は校正前後の英文を対比するオブジェクトの配列です
+- 各オブジェクトは以下の形式：
+  {{
+    "pre_proofread": "校正前の英文（LaTeXコマンドを除去した純粋な英文）",
+    "post_proofread": "校正後の英文（改善された英文）",
+    "description": "この文の具体的な修正理由・根拠（日本語）"
+  }}
+- 校正対象となった文のみを含め、変更がない文は除外してください
+- 各文は完全な形で出力し、文の途中で切らないでください
+- LaTeXコマンドは除去し、純粋な英文のみを抽出してください
+- 入力セクション数と出力結果数は必ず一致させてください
+---
+
+## 校正対象セクション一覧（JSON）
+```json
+{sections_json}
+```
+"""
+
 PROOFREADING_SYSTEM_PROMPT_WITHOUT_KNOWLEDGE = """
 あなたは英語学術論文の校正を専門とする世界最高水準の言語学エキスパートです。
 
@@ -121,10 +158,10 @@ PROOFREADING_USER_PROMPT_WITHOUT_KNOWLEDGE = """
 - **sentences**は校正前後の英文を対比するオブジェクトの配列です
 - 各オブジェクトは以下の形式：
   ```json
-  {
+  {{
     "pre_proofread": "校正前の英文（LaTeXコマンドを除去した純粋な英文）",
     "post_proofread": "校正後の英文（改善された英文）"
-  }
+  }}
   ```
 - 校正対象となった文のみを含め、変更がない文は除外してください
 - 各文は完全な形で出力し、文の途中で切らないでください
@@ -136,13 +173,13 @@ PROOFREADING_USER_PROMPT_WITHOUT_KNOWLEDGE = """
 - **表現の明瞭性**: 読みやすく理解しやすい表現
 - **一貫性**: 用語使用と文体の統一
 
+以下の校正対象テキストを分析し、学術論文として最適な英語に校正してください。
+校正の根拠は**日本語**で詳細に説明し、修正された英文は**sentences**フィールドに文単位で含めてください。
+
 ---
 
 ## 校正対象テキスト
 ```latex
 {section_content}
 ```
-
-上記テキストを分析し、学術論文として最適な英語に校正してください。
-校正の根拠は**日本語**で詳細に説明し、修正された英文は**sentences**フィールドに文単位で含めてください。
 """
\ No newline at end of file
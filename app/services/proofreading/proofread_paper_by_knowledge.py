@@ -3,24 +3,120 @@
 
 知識ベースを活用した英語学術論文の校正処理を提供します。
 """
-from typing import List, Dict, Any, Tuple
+import hashlib
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
 
 from app.schemas.schemas import ProofreadResult
-from app.services.proofreading.create_queries_by_HyDE import create_queries_by_HyDE
+from app.services.proofreading.create_queries_by_HyDE import (
+    create_queries_by_HyDE,
+    create_queries_by_HyDE_from_sections,
+)
 from app.services.proofreading.core.proofreading_engine import ProofreadingEngine
 from app.services.shared.logging_utils import log_proofreading_info, log_proofreading_debug
+from app.services.proofreading.config.proofreading_config import (
+    PROOFREADING_SECTION_MAX_WORKERS,
+    PROOFREADING_BATCH_SIZE,
+    ENABLE_PROOFREAD_EXACT_CACHE,
+    PROOFREAD_EXACT_CACHE_DIR,
+    PROOFREAD_EXACT_CACHE_MAX_ENTRIES,
+    ENABLE_PROOFREAD_SEMANTIC_CACHE,
+    PROOFREAD_SEMANTIC_CACHE_THRESHOLD,
+    PROOFREAD_SEMANTIC_CACHE_MAX_ENTRIES
+)
+from app.services.shared.semantic_cache import SemanticCache
+from app.services.proofreading.utils.section_result_cache import SectionResultCache
 from app.services.proofreading.utils.proofreading_utils import (
     create_proofread_section_dict,
     create_proofread_section_dict_without_knowledge
 )
 from app.services.shared.exceptions import ProofreadingError
 
+# 校正対象の英文を含まない定型セクション（図表環境・書誌・目次など）を
+# 判定する正規表現。これらは検索もLLM校正もスキップしてそのまま返す
+_BOILERPLATE_RE = re.compile(
+    r'^\s*(?:'
+    r'\\begin\{(?:figure|table)\*?\}.*?\\end\{(?:figure|table)\*?\}'
+    r'|\\bibliography(?:style)?\{[^}]*\}'
+    r'|\\(?:printbibliography|tableofcontents|listoffigures|listoftables|'
+    r'maketitle|newpage|clearpage)\b'
+    r'|%[^\n]*'
+    r'|\s'
+    r')+\s*$',
+    re.DOTALL
+)
+
+
+def _is_boilerplate(section: str) -> bool:
+    """図表・書誌などの定型のみで校正不要なセクションか判定する"""
+    return bool(_BOILERPLATE_RE.match(section))
+
 
 class ProofreadingService:
     """論文校正サービスクラス"""
     
     def __init__(self):
         self.engine = ProofreadingEngine()
+        # セクション内容のハッシュ -> HyDEクエリのメモ化キャッシュ
+        # （改稿中の論文では同一セクションが繰り返し現れるため、
+        # 同じ内容に対するLLM呼び出しを省略できる）
+        self._hyde_query_cache: Dict[str, List[str]] = {}
+        # セクション埋め込みで照合するセマンティックキャッシュ
+        # （軽微な編集での再実行時にHyDE・検索・LLM校正を丸ごと省略する）
+        self._semantic_cache: Optional[SemanticCache] = None
+        if ENABLE_PROOFREAD_SEMANTIC_CACHE:
+            self._semantic_cache = SemanticCache(
+                similarity_threshold=PROOFREAD_SEMANTIC_CACHE_THRESHOLD,
+                max_entries=PROOFREAD_SEMANTIC_CACHE_MAX_ENTRIES
+            )
+        # セクション本文の完全一致キャッシュ（セマンティックキャッシュより
+        # 手前で引く。埋め込み取得すら不要なため最も安価な層）
+        self._exact_cache: Optional[SectionResultCache] = None
+        if ENABLE_PROOFREAD_EXACT_CACHE:
+            self._exact_cache = SectionResultCache(
+                cache_dir=PROOFREAD_EXACT_CACHE_DIR,
+                max_entries=PROOFREAD_EXACT_CACHE_MAX_ENTRIES
+            )
+
+    def _embed_section(self, section: str) -> Optional[List[float]]:
+        """
+        セマンティックキャッシュ照合用にセクションの埋め込みを取得する
+
+        埋め込み取得に失敗してもキャッシュを諦めるだけで、校正処理
+        自体は続行できるようにする。
+
+        Args:
+            section (str): 校正対象セクション
+
+        Returns:
+            Optional[List[float]]: 埋め込みベクトル（失敗時は None）
+        """
+        try:
+            return self.engine.vector_store.openai_embeddings.embed_query(section)
+        except Exception as e:
+            log_proofreading_debug("セクション埋め込みの取得に失敗", str(e))
+            return None
+
+    def _get_queries_for_section(self, section: str) -> List[str]:
+        """
+        セクションのHyDEクエリを取得（内容ハッシュでメモ化）
+        
+        Args:
+            section (str): 校正対象セクション
+            
+        Returns:
+            List[str]: 生成された検索クエリリスト
+        """
+        cache_key = hashlib.sha256(section.encode('utf-8')).hexdigest()
+        queries = self._hyde_query_cache.get(cache_key)
+        if queries is None:
+            queries = create_queries_by_HyDE(section)
+            self._hyde_query_cache[cache_key] = queries
+        else:
+            log_proofreading_debug("HyDEクエリキャッシュヒット")
+        return queries
     
     def proofread_section_by_knowledge(
         self, 
@@ -70,22 +166,116 @@ class ProofreadingService:
             List[Dict[str, Any]]: 校正結果を含む論文のセクションリスト
         """
         log_proofreading_info(f"論文全体校正を開始 ({len(sections)}セクション)")
-        proofread_sections = []
         
-        for i, section in enumerate(sections):
+        def _process_section(indexed: Tuple[int, str]) -> Dict[str, Any]:
+            i, section = indexed
             log_proofreading_debug(f"セクション {i+1}/{len(sections)} を処理中")
-            
-            queries = create_queries_by_HyDE(section)
+
+            # 図表・書誌のみの定型セクションは校正対象の英文を含まないため、
+            # 検索もLLM呼び出しもせずそのまま返す
+            if _is_boilerplate(section):
+                log_proofreading_debug("定型セクションのため校正をスキップ")
+                skipped = ProofreadResult(
+                    pre_proofread=section,
+                    post_proofread=section,
+                    description="図表・書誌などの定型セクションのため校正をスキップしました",
+                    sentences=[]
+                )
+                return create_proofread_section_dict_without_knowledge(skipped)
+
+            # 完全一致キャッシュ照合（同一内容の再校正なら埋め込み取得も
+            # 含めて一切のAPI呼び出しなしで返せる）
+            exact_key = None
+            if self._exact_cache is not None:
+                exact_key = SectionResultCache.make_key(section)
+                cached = self._exact_cache.get(exact_key)
+                if cached is not None:
+                    log_proofreading_debug("完全一致キャッシュヒット")
+                    return cached
+
+            # セマンティックキャッシュ照合（軽微な編集しかない再実行では
+            # ここでヒットし、以降のLLM呼び出しをすべて省略できる）
+            embedding = None
+            if self._semantic_cache is not None:
+                embedding = self._embed_section(section)
+                if embedding is not None:
+                    cached = self._semantic_cache.lookup(embedding)
+                    if cached is not None:
+                        log_proofreading_debug("セマンティックキャッシュヒット")
+                        return dict(cached)
+
+            queries = self._get_queries_for_section(section)
             log_proofreading_debug("生成されたクエリ", queries)
-            
-            proofread_result, knowledge = self.proofread_section_by_knowledge(section, queries)
-            
-            section_dict = create_proofread_section_dict(proofread_result, queries, knowledge)
-            proofread_sections.append(section_dict)
+
+            # クエリが得られなかった場合はベクターストアへの往復を省き、
+            # 知識なし校正へフォールバックする
+            if not queries:
+                proofread_result = self.proofread_section_without_knowledge(section)
+                section_dict = create_proofread_section_dict_without_knowledge(proofread_result)
+            else:
+                proofread_result, knowledge = self.proofread_section_by_knowledge(section, queries)
+                section_dict = create_proofread_section_dict(proofread_result, queries, knowledge)
+
+            if self._exact_cache is not None and exact_key is not None:
+                self._exact_cache.store(exact_key, section_dict)
+            if self._semantic_cache is not None and embedding is not None:
+                self._semantic_cache.store(embedding, section_dict)
+
+            return section_dict
+        
+        # 各セクションのHyDE→検索→LLM校正は完全に独立したI/O主体の
+        # パイプラインのため、スレッドで並列化する（結果順は維持される）
+        with ThreadPoolExecutor(max_workers=PROOFREADING_SECTION_MAX_WORKERS) as executor:
+            proofread_sections = list(executor.map(_process_section, enumerate(sections)))
         
         log_proofreading_info("論文全体校正が完了")
         return proofread_sections
     
+    def proofread_paper_by_knowledge_batched(self, sections: List[str]) -> List[Dict[str, Any]]:
+        """
+        論文全体を知識ベースを用いて校正する（バッチLLM呼び出し版）
+
+        セクションごとのHyDE・知識検索は並列に行い、LLM校正は
+        PROOFREADING_BATCH_SIZE セクションずつ1回の呼び出しにまとめる。
+        共通プロンプト部分がバッチ内で償却されるため、セクション数の
+        多い論文で入力トークンと往復回数を削減できる。
+
+        Args:
+            sections (List[str]): 論文のセクションリスト
+
+        Returns:
+            List[Dict[str, Any]]: 校正結果を含む論文のセクションリスト
+        """
+        log_proofreading_info(f"論文全体バッチ校正を開始 ({len(sections)}セクション)")
+
+        # HyDEクエリは全セクション分を1回のバッチ呼び出しでまとめて生成する
+        # （セクションごとの逐次LLM往復を同時リクエストに畳み込む）
+        queries_per_section = create_queries_by_HyDE_from_sections(sections)
+
+        def _retrieve_knowledge(indexed: Tuple[str, List[str]]) -> Tuple[str, List[str], str]:
+            section, queries = indexed
+            knowledge = self.engine.retrieve_knowledge_snippets(queries)
+            return section, queries, knowledge
+
+        with ThreadPoolExecutor(max_workers=PROOFREADING_SECTION_MAX_WORKERS) as executor:
+            prepared = list(
+                executor.map(_retrieve_knowledge, zip(sections, queries_per_section))
+            )
+
+        proofread_sections: List[Dict[str, Any]] = []
+        for start in range(0, len(prepared), PROOFREADING_BATCH_SIZE):
+            batch = prepared[start:start + PROOFREADING_BATCH_SIZE]
+            results = self.engine.execute_proofreading_with_knowledge_batch(
+                [(section, knowledge) for section, _, knowledge in batch]
+            )
+            for (section, queries, knowledge), result in zip(batch, results):
+                proofread_sections.append(
+                    create_proofread_section_dict(result, queries, knowledge)
+                )
+
+        log_proofreading_info("論文全体バッチ校正が完了")
+        return proofread_sections
+
     def proofread_paper_without_knowledge(self, sections: List[str]) -> List[Dict[str, Any]]:
         """
         論文全体を知識ベースからの情報を用いずに校正する
@@ -110,8 +300,26 @@ class ProofreadingService:
         return proofread_sections
 
 
-# 下位互換性のための関数ラッパー
-_service = ProofreadingService()
+# 下位互換性のためのサービスインスタンス（初回利用時に遅延生成）
+_service: Optional[ProofreadingService] = None
+_service_lock = threading.Lock()
+
+
+def _get_service() -> ProofreadingService:
+    """
+    互換ラッパー用のサービスインスタンスを取得（遅延初期化）
+
+    インポート時にインスタンスを生成すると、OpenAIクライアントと
+    ベクターストアの構築コストをワーカー起動時に必ず払うことになる
+    ため、初回呼び出しまで生成を遅らせる。
+    """
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = ProofreadingService()
+    return _service
+
 
 def proofread_section_by_knowledge(
     section_text: str, 
@@ -120,22 +328,28 @@ def proofread_section_by_knowledge(
     """
     下位互換性のための関数ラッパー
     """
-    return _service.proofread_section_by_knowledge(section_text, queries)
+    return _get_service().proofread_section_by_knowledge(section_text, queries)
 
 def proofread_paper_by_knowledge(sections: List[str]) -> List[Dict[str, Any]]:
     """
     下位互換性のための関数ラッパー
     """
-    return _service.proofread_paper_by_knowledge(sections)
+    return _get_service().proofread_paper_by_knowledge(sections)
+
+def proofread_paper_by_knowledge_batched(sections: List[str]) -> List[Dict[str, Any]]:
+    """
+    下位互換性のための関数ラッパー
+    """
+    return _get_service().proofread_paper_by_knowledge_batched(sections)
 
 def proofread_section_without_knowledge(section: str) -> ProofreadResult:
     """
     下位互換性のための関数ラッパー
     """
-    return _service.proofread_section_without_knowledge(section)
+    return _get_service().proofread_section_without_knowledge(section)
 
 def proofread_paper_without_knowledge(sections: List[str]) -> List[Dict[str, Any]]:
     """
     下位互換性のための関数ラッパー
     """
-    return _service.proofread_paper_without_knowledge(sections)
\ No newline at end of file
+    return _get_service().proofread_paper_without_knowledge(sections)
\ No newline at end of file
@@ -1,7 +1,7 @@
 """
 校正処理用のユーティリティ関数
 """
-from typing import List, Dict, Any, Tuple
+from typing import Iterable, List, Dict, Any, Tuple
 from app.schemas.schemas import ProofreadResult
 from app.services.proofreading.config.proofreading_config import KNOWLEDGE_SEARCH_TOP_K
 
@@ -18,17 +18,23 @@ def format_knowledge_snippet(page_content: str, reference_url: str) -> str:
     """
     return f"{page_content} (参照: {reference_url})"
 
-def create_knowledge_block(cited_snippets: List[str]) -> str:
+def create_knowledge_block(snippet_pairs: Iterable[Tuple[str, str]]) -> str:
     """
-    引用スニペットリストから知識ブロックを作成
-    
+    (本文, 参照元) のペア列から知識ブロックを作成
+
+    整形済み文字列の中間リストを経由せず、ジェネレータを直接
+    join に渡して1パスで連結する。
+
     Args:
-        cited_snippets (List[str]): 引用スニペットのリスト
-        
+        snippet_pairs (Iterable[Tuple[str, str]]): (本文, 参照元URL) のペア列
+
     Returns:
         str: 整形済み知識ブロック
     """
-    return "\n".join(cited_snippets)
+    return "\n".join(
+        f"{content} (参照: {reference_url})"
+        for content, reference_url in snippet_pairs
+    )
 
 def create_proofread_section_dict(
     result: ProofreadResult, 
@@ -46,14 +52,12 @@ def create_proofread_section_dict(
     Returns:
         Dict[str, Any]: レスポンス辞書
     """
-    return {
-        "pre_proofread": result.pre_proofread,
-        "post_proofread": result.post_proofread,
-        "description": result.description,
-        "sentences": result.sentences,
-        "queries": queries,
-        "knowledge": knowledge
-    }
+    # スキーマにフィールドが増えても追従できるよう model_dump で一括変換する
+    # （confidence はカスケード判定用の内部値のためレスポンスには含めない）
+    section_dict = result.model_dump(exclude={"confidence"})
+    section_dict["queries"] = queries
+    section_dict["knowledge"] = knowledge
+    return section_dict
 
 def create_proofread_section_dict_without_knowledge(result: ProofreadResult) -> Dict[str, Any]:
     """
@@ -65,14 +69,8 @@ def create_proofread_section_dict_without_knowledge(result: ProofreadResult) ->
     Returns:
         Dict[str, Any]: レスポンス辞書
     """
-    return {
-        "pre_proofread": result.pre_proofread,
-        "post_proofread": result.post_proofread,
-        "description": result.description,
-        "sentences": result.sentences,
-        "queries": [],
-        "knowledge": ""
-    }
+    # 空リストを呼び出しごとに確保せず、知識あり版の単一経路に委譲する
+    return create_proofread_section_dict(result, [], "")
 
 def get_search_parameters() -> Dict[str, int]:
     """
@@ -0,0 +1,93 @@
+"""
+セクション校正結果の完全一致キャッシュ
+
+セクション本文のハッシュをキーに校正結果の辞書を保持し、JSONファイルに
+永続化します。同一内容のセクションが再度校正された場合（同一論文内の
+再掲や再実行）に、HyDE・ベクター検索・LLM校正を丸ごと省略できます。
+セマンティックキャッシュより手前で照合する安価な完全一致層です。
+"""
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from app.services.shared.logging_utils import log_proofreading_debug
+
+
+class SectionResultCache:
+    """セクション本文のハッシュで照合する永続化付きキャッシュ"""
+
+    def __init__(self, cache_dir: str = "proofread_section_cache", max_entries: int = 1024):
+        """
+        Args:
+            cache_dir (str): キャッシュファイルを保存するディレクトリ
+            max_entries (int): 保持する最大エントリ数（超過時は古い半分を破棄）
+        """
+        self._cache_dir = Path(cache_dir)
+        self._cache_file = self._cache_dir / "sections.json"
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        # dict は挿入順を保持するため、そのままFIFO圧縮に使える
+        self._entries: Dict[str, Dict[str, Any]] = self._load()
+
+    @staticmethod
+    def make_key(section: str) -> str:
+        """セクション本文からキャッシュキーを計算する（blake2bはsha256より高速）"""
+        return hashlib.blake2b(section.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """永続化済みキャッシュを読み込む（破損・不在時は空から開始）"""
+        try:
+            with open(self._cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                return data
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            log_proofreading_debug("セクションキャッシュの読み込みに失敗", str(e))
+        return {}
+
+    def _persist(self) -> None:
+        """現在のエントリをJSONファイルへ書き出す（一時ファイル経由で原子的に）"""
+        try:
+            self._cache_dir.mkdir(exist_ok=True)
+            tmp_path = self._cache_file.with_suffix(".json.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self._cache_file)
+        except Exception as e:
+            # 永続化に失敗してもインメモリキャッシュとしては機能し続ける
+            log_proofreading_debug("セクションキャッシュの保存に失敗", str(e))
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        キーに対応する校正結果を取得する
+
+        Args:
+            key (str): make_key で計算したキャッシュキー
+
+        Returns:
+            Optional[Dict[str, Any]]: ヒット時は校正結果辞書のコピー、なければ None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return dict(entry) if entry is not None else None
+
+    def store(self, key: str, section_dict: Dict[str, Any]) -> None:
+        """
+        校正結果を登録し、ファイルへ永続化する
+
+        Args:
+            key (str): make_key で計算したキャッシュキー
+            section_dict (Dict[str, Any]): 校正結果の辞書
+        """
+        with self._lock:
+            if len(self._entries) >= self._max_entries:
+                # 満杯時は古い半分を破棄する（挿入順を利用した単純なFIFO圧縮）
+                keep_keys = list(self._entries)[len(self._entries) // 2:]
+                self._entries = {k: self._entries[k] for k in keep_keys}
+            self._entries[key] = dict(section_dict)
+            self._persist()
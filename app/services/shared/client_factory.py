@@ -1,22 +1,30 @@
+import threading
+
 from libs.azure_client import AzureOpenAIClient
 from app.services.knowledge.utils.vector_store_service import VectorStoreService
 
 class ClientFactory:
     """クライアントインスタンスの一元管理"""
-    
+
     _openai_client = None
     _vector_store = None
-    
+    # 並行リクエストから同時に初期化されても二重生成しないようロックで保護する
+    _lock = threading.Lock()
+
     @classmethod
     def get_openai_client(cls) -> AzureOpenAIClient:
         """Azure OpenAIクライアントのシングルトンインスタンスを取得"""
         if cls._openai_client is None:
-            cls._openai_client = AzureOpenAIClient()
+            with cls._lock:
+                if cls._openai_client is None:
+                    cls._openai_client = AzureOpenAIClient()
         return cls._openai_client
-    
-    @classmethod  
+
+    @classmethod
     def get_vector_store(cls) -> VectorStoreService:
         """ベクターストアサービスのシングルトンインスタンスを取得"""
         if cls._vector_store is None:
-            cls._vector_store = VectorStoreService()
-        return cls._vector_store
\ No newline at end of file
+            with cls._lock:
+                if cls._vector_store is None:
+                    cls._vector_store = VectorStoreService()
+        return cls._vector_store
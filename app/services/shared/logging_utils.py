@@ -50,9 +50,9 @@ def log_proofreading_debug(message: str, data: Any = None) -> None:
         message (str): ログメッセージ
         data (Any, optional): 出力するデータ
     """
-    if ENABLE_DEBUG_LOGGING:
-        log_msg = f"[DEBUG] {message}: {data}" if data is not None else f"[DEBUG] {message}"
-        print(log_msg)  # 標準出力に直接出力
+    # ハンドラー側で標準出力へ書き出すため print による二重出力は行わない。
+    # isEnabledFor を先に確認し、出力されないログの文字列整形を省く
+    if ENABLE_DEBUG_LOGGING and logger.isEnabledFor(logging.DEBUG):
         logger.debug(f"{message}: {data}" if data is not None else message)
 
 def log_proofreading_info(message: str) -> None:
@@ -62,7 +62,6 @@ def log_proofreading_info(message: str) -> None:
     Args:
         message (str): ログメッセージ
     """
-    print(f"[INFO] {message}")  # 標準出力に直接出力
     logger.info(message)
 
 def log_proofreading_error(message: str, error: Exception = None) -> None:
@@ -73,8 +72,6 @@ def log_proofreading_error(message: str, error: Exception = None) -> None:
         message (str): ログメッセージ
         error (Exception, optional): 例外オブジェクト
     """
-    error_msg = f"[ERROR] {message}: {error}" if error else f"[ERROR] {message}"
-    print(error_msg)  # 標準出力に直接出力
     if error:
         logger.error(f"{message}: {error}")
     else:
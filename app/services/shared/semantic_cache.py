@@ -0,0 +1,89 @@
+"""
+埋め込みベースのセマンティックキャッシュ
+
+テキストの埋め込みベクトルをキーに、コサイン類似度がしきい値以上の
+既存エントリの値を返すインメモリキャッシュを提供します。
+軽微な編集（空白・誤字修正など）で再実行された処理の結果を
+再利用する用途を想定しています。
+"""
+import threading
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+
+
+class SemanticCache:
+    """コサイン類似度で照合するインメモリのセマンティックキャッシュ"""
+
+    def __init__(self, similarity_threshold: float = 0.97, max_entries: int = 256):
+        """
+        Args:
+            similarity_threshold (float): ヒットとみなすコサイン類似度の下限
+            max_entries (int): 保持する最大エントリ数（超過時は古い半分を破棄）
+        """
+        self._threshold = similarity_threshold
+        self._max_entries = max_entries
+        # 正規化済み埋め込みの行列（償却的に拡張し、先頭 _size 行が有効）
+        self._matrix: Optional[np.ndarray] = None
+        self._values: List[Any] = []
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding: Sequence[float]) -> np.ndarray:
+        """埋め込みをfloat32の単位ベクトルに変換する"""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm > 0.0:
+            vector = vector / norm
+        return vector
+
+    def lookup(self, embedding: Sequence[float]) -> Optional[Any]:
+        """
+        類似エントリを検索し、しきい値以上なら値を返す
+
+        Args:
+            embedding (Sequence[float]): 照会テキストの埋め込み
+
+        Returns:
+            Optional[Any]: ヒットした場合はキャッシュ済みの値、なければ None
+        """
+        query = self._normalize(embedding)
+        with self._lock:
+            if self._size == 0:
+                return None
+            similarities = self._matrix[:self._size] @ query
+            best_index = int(np.argmax(similarities))
+            if float(similarities[best_index]) >= self._threshold:
+                return self._values[best_index]
+        return None
+
+    def store(self, embedding: Sequence[float], value: Any) -> None:
+        """
+        埋め込みと値のペアを登録する
+
+        Args:
+            embedding (Sequence[float]): キーとなる埋め込み
+            value (Any): キャッシュする値
+        """
+        vector = self._normalize(embedding)
+        with self._lock:
+            if self._size >= self._max_entries:
+                # 満杯時は古い半分を破棄する（単純なFIFO圧縮）
+                keep = self._max_entries // 2
+                self._matrix[:keep] = self._matrix[self._size - keep:self._size]
+                self._values = self._values[self._size - keep:]
+                self._size = keep
+
+            if self._matrix is None:
+                initial_rows = min(16, self._max_entries)
+                self._matrix = np.zeros((initial_rows, vector.shape[0]), dtype=np.float32)
+            elif self._size >= self._matrix.shape[0]:
+                grown_rows = min(self._matrix.shape[0] * 2, self._max_entries)
+                grown = np.zeros((grown_rows, vector.shape[0]), dtype=np.float32)
+                grown[:self._size] = self._matrix[:self._size]
+                self._matrix = grown
+
+            self._matrix[self._size] = vector
+            self._values.append(value)
+            self._size += 1
@@ -1,10 +1,22 @@
 """
 テキスト処理用のユーティリティ関数
 """
+import re
 from typing import Union
 from app.services.knowledge.config.chunking_config import SUPPORTED_ENCODINGS, FALLBACK_ENCODING
 from app.services.shared.exceptions import ChunkingError
 
+# 3行以上連続する空白行を圧縮するパターン（呼び出しごとの再コンパイルを避ける）
+_MULTI_BLANK_RE = re.compile(r'\n\s*\n\s*\n+')
+
+# BOM → エンコーディングの対応表（先頭バイトで即座に判定できるケース）
+_BOM_ENCODINGS = (
+    (b"\xef\xbb\xbf", "utf-8-sig"),
+    # utf-16 コーデックは BOM からバイト順を自動判定し、BOM自体も除去する
+    (b"\xff\xfe", "utf-16"),
+    (b"\xfe\xff", "utf-16"),
+)
+
 
 def ensure_string(data: Union[str, bytes]) -> str:
     """
@@ -24,8 +36,24 @@ def ensure_string(data: Union[str, bytes]) -> str:
     
     if not isinstance(data, bytes):
         raise ChunkingError(f"サポートされていないデータ型です: {type(data)}")
-    
+
+    # BOM があればエンコーディングを即決できる（総当たりを省略）
+    for bom, encoding in _BOM_ENCODINGS:
+        if data.startswith(bom):
+            try:
+                return data.decode(encoding)
+            except UnicodeDecodeError:
+                break
+
+    # 実際の入力はほぼ UTF-8 のため、まず UTF-8 を直接試す
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        pass
+
     for encoding in SUPPORTED_ENCODINGS:
+        if encoding == "utf-8":
+            continue
         try:
             return data.decode(encoding)
         except UnicodeDecodeError:
@@ -51,11 +79,18 @@ def validate_text_length(text: str, min_length: int, max_length: int, skip_max_v
     Raises:
         ChunkingError: テキスト長が範囲外の場合
     """
-    if not text or not text.strip():
+    # strip() は全文コピーを割り当てるため、長さの検証だけなら
+    # 先頭・末尾から空白を読み飛ばして実効長を数える方が安い
+    start, end = 0, len(text)
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    text_length = end - start
+
+    if text_length == 0:
         raise ChunkingError("テキストが空です")
-    
-    text_length = len(text.strip())
-    
+
     if text_length < min_length:
         raise ChunkingError(f"テキストが短すぎます (最小: {min_length}文字)")
     
@@ -78,9 +113,6 @@ def clean_chunk(chunk: str) -> str:
     
     # 先頭末尾の空白削除と、複数行の空白行を単一に
     cleaned = chunk.strip()
-    cleaned = re.sub(r'\n\s*\n\s*\n+', '\n\n', cleaned)
-    
-    return cleaned
-
+    cleaned = _MULTI_BLANK_RE.sub('\n\n', cleaned)
 
-import re
\ No newline at end of file
+    return cleaned
\ No newline at end of file
@@ -1,19 +1,70 @@
+import atexit
+from concurrent.futures import ThreadPoolExecutor
+
 from azure.core.credentials import AzureKeyCredential
 from azure.ai.documentintelligence import DocumentIntelligenceClient
 from azure.ai.documentintelligence.models import AnalyzeDocumentRequest
 from langchain_openai import ChatOpenAI
+import httpx
 import openai
 import os
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import List, Dict, Any, Optional
 from langchain.tools import BaseTool
 from dotenv import load_dotenv
 from langchain_chroma import Chroma
 from langchain_openai import OpenAIEmbeddings
 from app.services.knowledge.utils.document_intelligence_cache import DocumentIntelligenceCache
-from app.services.knowledge.utils.enhanced_cache_system import EnhancedDocumentIntelligenceCache
+from app.services.knowledge.utils.enhanced_cache_system import get_enhanced_cache
+from app.services.knowledge.config.knowledge_search_config import (
+    EMBEDDING_MODEL,
+    EMBEDDING_DIMENSIONS,
+    HNSW_SPACE,
+    HNSW_CONSTRUCTION_EF,
+    HNSW_SEARCH_EF,
+)
+from app.services.shared.logging_utils import (
+    log_proofreading_debug,
+    log_proofreading_error,
+    log_proofreading_info,
+)
 
 load_dotenv(".env.local")
 
+# ページ単位のDocument Intelligence呼び出しの同時実行数
+# （ページ処理はHTTPS往復待ちが支配的なためスレッドで重ねられる）
+DI_PAGE_MAX_WORKERS = 8
+
+
+@lru_cache(maxsize=1)
+def _get_cache_write_pool() -> ThreadPoolExecutor:
+    """
+    キャッシュ保存用のバックグラウンドスレッドプールを取得（遅延生成）
+
+    AzureDocumentIntelligenceClient はリクエストごとに生成されるため、
+    インスタンスごとにプールを持つと呼び出しのたびにスレッドと atexit
+    登録が積み上がる。プロセスで1本だけ持ち、終了時に wait=True で
+    書き切る。DocumentIntelligenceCache は内部ロックを持たないため、
+    書き込み自体は max_workers=1 で直列化する。
+    """
+    pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="di-cache")
+    atexit.register(pool.shutdown, wait=True)
+    return pool
+
+
+@lru_cache(maxsize=1)
+def _get_shared_http_client() -> httpx.Client:
+    """
+    OpenAI系クライアントで共有するHTTPクライアントを取得（遅延生成）
+
+    クライアントインスタンスごとに接続プールを持つと、並列フォールアウト時に
+    TCP+TLSハンドシェイクを払い直すことになるため、プロセス内で1つの
+    プールをkeep-aliveで使い回す。
+    """
+    return httpx.Client(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+    )
+
 class AzureDocumentIntelligenceClient:
     def __init__(self, enable_cache: bool = True, use_enhanced_cache: bool = True) -> None:
         self.client = DocumentIntelligenceClient(
@@ -24,7 +75,9 @@ class AzureDocumentIntelligenceClient:
         # キャッシュシステムを初期化
         if enable_cache:
             if use_enhanced_cache:
-                self.cache = EnhancedDocumentIntelligenceCache()
+                # クライアントはリクエストごとに生成されるため、SQLite接続を
+                # 持つキャッシュ本体はプロセス共有のインスタンスを使い回す
+                self.cache = get_enhanced_cache()
                 self.cache_type = "enhanced"
             else:
                 self.cache = DocumentIntelligenceCache()
@@ -32,7 +85,8 @@ class AzureDocumentIntelligenceClient:
         else:
             self.cache = None
             self.cache_type = "disabled"
-        
+
+
     def analyze_document_client(self) -> DocumentIntelligenceClient:
         return self.client
     
@@ -48,78 +102,188 @@ class AzureDocumentIntelligenceClient:
             List[Dict]: ページごとのコンテンツとメタデータ
         """
         from app.services.knowledge.utils.pdf_page_splitter import PDFPageSplitter
-        
+
+        # ハッシュは入口で一度だけ計算し、存在確認・取得・保存で使い回す
+        # （多MBのPDFを呼び出しごとに再ハッシュしない）
+        file_hash = self.cache._get_file_hash(file_bytes) if self.cache else None
+
         # キャッシュが有効で、キャッシュが存在する場合は取得
-        if self.cache and self.cache.has_cache(file_bytes, file_name):
-            cached_result = self.cache.get_cache(file_bytes, file_name)
+        if self.cache:
+            cached_result = self.cache.get_if_present(file_bytes, file_name, file_hash=file_hash)
             if cached_result is not None:
                 return cached_result
         
-        print(f"Document Intelligence で複数ページ処理中: {file_name}")
+        log_proofreading_info(f"Document Intelligence で複数ページ処理中: {file_name}")
         
         # PDFを物理的にページごとに分割
         splitter = PDFPageSplitter()
         pdf_info = splitter.get_pdf_info(file_bytes)
-        print(f"PDF情報: {pdf_info['page_count']} ページ - {file_name}")
-        
+        log_proofreading_info(f"PDF情報: {pdf_info['page_count']} ページ - {file_name}")
+
         # PDFを個別ページに分割
         pages_data = splitter.split_pdf_to_pages(file_bytes, file_name)
-        
+
         # 各ページを個別に Document Intelligence で処理
-        pages_content = []
-        for page_data in pages_data:
-            page_number = page_data["page_number"]
-            page_bytes = page_data["page_bytes"]
-            page_file_name = page_data["page_file_name"]
-            
-            print(f"ページ {page_number} を Document Intelligence で処理中...")
-            
+        # ページ間に依存はなくDIのLRO待ちが支配的なため、逐次ではなく
+        # スレッドプールで並列に投げる（強化キャッシュ版と同じ方式）
+        with ThreadPoolExecutor(max_workers=DI_PAGE_MAX_WORKERS) as executor:
+            # executor.map は入力順を保つため、ページ順はそのまま維持される
+            results = list(executor.map(
+                lambda page_data: self._analyze_page(page_data, file_name),
+                pages_data,
+            ))
+        pages_content = [page for page in results if page is not None]
+
+        log_proofreading_info(f"合計 {len(pages_content)} ページの処理が完了しました")
+
+        # 結果をキャッシュに保存（書き込みは呼び出し側をブロックしない）
+        if self.cache:
+            self._submit_cache_save(file_bytes, file_name, pages_content, file_hash)
+
+        return pages_content
+
+    def _submit_cache_save(
+        self,
+        file_bytes: bytes,
+        file_name: str,
+        pages_content: List[Dict[str, Any]],
+        file_hash: Optional[str],
+    ) -> None:
+        """キャッシュ保存をバックグラウンドスレッドに積む（失敗はログのみ）"""
+        def _save():
             try:
-                # 個別ページを Document Intelligence で分析
-                poller = self.client.begin_analyze_document(
-                    model_id="prebuilt-read",
-                    body=page_bytes,
-                    output_content_format="markdown",
+                self.cache.save_cache(
+                    file_bytes, file_name, pages_content, file_hash=file_hash
                 )
-                result = poller.result()
-                
-                # ページ内容を抽出
-                page_content = ""
-                if hasattr(result, 'content') and result.content:
-                    page_content = result.content.strip()
-                elif hasattr(result, 'pages') and result.pages:
-                    # fallback: ページオブジェクトから抽出
-                    for page in result.pages:
-                        if hasattr(page, 'lines') and page.lines:
-                            for line in page.lines:
-                                if hasattr(line, 'content'):
-                                    page_content += line.content + "\n"
-                    page_content = page_content.strip()
-                
-                # ページにコンテンツがある場合のみ追加
-                if page_content:
-                    pages_content.append({
-                        "page_number": page_number,
-                        "content": page_content,
-                        "source_file": file_name,
-                        "page_file_name": page_file_name
-                    })
-                    print(f"ページ {page_number} の処理が完了しました ({len(page_content)} 文字)")
-                else:
-                    print(f"ページ {page_number} にコンテンツがありませんでした")
-                    
             except Exception as e:
-                print(f"ページ {page_number} の処理中にエラーが発生しました: {e}")
+                log_proofreading_error(
+                    f"ファイル {file_name} のキャッシュ保存に失敗しました", e
+                )
+
+        _get_cache_write_pool().submit(_save)
+
+    def _analyze_page(self, page_data: Dict[str, Any], file_name: str) -> Optional[Dict[str, Any]]:
+        """
+        単一ページを Document Intelligence で分析する
+
+        Args:
+            page_data: PDFPageSplitter が返すページ情報
+            file_name: 参照用の元ファイル名
+
+        Returns:
+            ページのコンテンツとメタデータ（コンテンツが無い／失敗時は None）
+        """
+        page_number = page_data["page_number"]
+        page_bytes = page_data["page_bytes"]
+        page_file_name = page_data["page_file_name"]
+
+        log_proofreading_debug(f"ページ {page_number} を Document Intelligence で処理中")
+
+        try:
+            # 個別ページを Document Intelligence で分析
+            poller = self.client.begin_analyze_document(
+                model_id="prebuilt-read",
+                body=page_bytes,
+                output_content_format="markdown",
+            )
+            result = poller.result()
+
+            # ページ内容を抽出
+            # （行ごとの hasattr は属性参照2回分のコストが #lines 倍で効くため、
+            # getattr の既定値で欠損ケースをまとめて吸収する）
+            content = getattr(result, 'content', None)
+            if content:
+                page_content = content.strip()
+            else:
+                # fallback: ページオブジェクトから抽出
+                page_content = "\n".join(
+                    line.content
+                    for page in getattr(result, 'pages', None) or ()
+                    for line in getattr(page, 'lines', None) or ()
+                ).strip()
+
+            # ページにコンテンツがある場合のみ返す
+            if page_content:
+                log_proofreading_debug(f"ページ {page_number} の処理が完了しました ({len(page_content)} 文字)")
+                return {
+                    "page_number": page_number,
+                    "content": page_content,
+                    "source_file": file_name,
+                    "page_file_name": page_file_name
+                }
+            log_proofreading_debug(f"ページ {page_number} にコンテンツがありませんでした")
+            return None
+
+        except Exception as e:
+            log_proofreading_error(f"ページ {page_number} の処理中にエラーが発生しました", e)
+            return None
+
+    def analyze_pdf_pages_batch(self, files: List[tuple]) -> List[List[Dict[str, Any]]]:
+        """
+        複数のPDFをまとめてページ分析する（キャッシュ機能付き）
+
+        ファイルごとに analyze_pdf_pages を呼ぶと、プールが埋まらない
+        端数ページのぶんだけ並列度が落ちる。キャッシュ未ヒットの全ファイルの
+        ページを1つのスレッドプールに平坦化して投入し、ファイル間でも
+        Document Intelligence のLRO待ちを重ねる。
+
+        Args:
+            files: (file_bytes, file_name) のタプルのリスト
+
+        Returns:
+            List[List[Dict]]: 入力と同順の、ファイルごとのページコンテンツリスト
+            （分割に失敗したファイルは空リスト）
+        """
+        from app.services.knowledge.utils.pdf_page_splitter import PDFPageSplitter
+
+        results: List[List[Dict[str, Any]]] = [[] for _ in files]
+        splitter = PDFPageSplitter()
+        # キャッシュ未ヒットのファイル: (入力インデックス, ハッシュ, ページ情報リスト)
+        pending: List[tuple] = []
+
+        for index, (file_bytes, file_name) in enumerate(files):
+            file_hash = self.cache._get_file_hash(file_bytes) if self.cache else None
+            if self.cache:
+                cached_result = self.cache.get_if_present(file_bytes, file_name, file_hash=file_hash)
+                if cached_result is not None:
+                    results[index] = cached_result
+                    continue
+            try:
+                pages_data = splitter.split_pdf_to_pages(file_bytes, file_name)
+            except Exception as e:
+                log_proofreading_error(f"ファイル {file_name} のページ分割中にエラーが発生しました", e)
                 continue
-        
-        print(f"合計 {len(pages_content)} ページの処理が完了しました")
-        
-        # 結果をキャッシュに保存
-        if self.cache:
-            self.cache.save_cache(file_bytes, file_name, pages_content)
-        
-        return pages_content
-    
+            pending.append((index, file_hash, pages_data))
+
+        if pending:
+            # 全ファイルのページを平坦化して1つのプールで処理する
+            tasks = [
+                (index, page_data)
+                for index, _, pages_data in pending
+                for page_data in pages_data
+            ]
+            log_proofreading_info(
+                f"Document Intelligence で {len(pending)} ファイル {len(tasks)} ページを一括処理中"
+            )
+            with ThreadPoolExecutor(max_workers=DI_PAGE_MAX_WORKERS) as executor:
+                outcomes = list(executor.map(
+                    lambda task: self._analyze_page(task[1], files[task[0]][1]),
+                    tasks,
+                ))
+            # executor.map は入力順を保つため、ファイル内のページ順はそのまま維持される
+            for (index, _), page in zip(tasks, outcomes):
+                if page is not None:
+                    results[index].append(page)
+
+            if self.cache:
+                for index, file_hash, _ in pending:
+                    file_bytes, file_name = files[index]
+                    self._submit_cache_save(
+                        file_bytes, file_name, results[index], file_hash
+                    )
+
+        return results
+
     def analyze_pdf_pages_with_enhanced_cache(self, file_bytes: bytes, file_name: str) -> List[Dict[str, Any]]:
         """
         強化キャッシュシステムを使用してPDFをページごとに分析（コスト最適化版）
@@ -138,28 +302,32 @@ class AzureDocumentIntelligenceClient:
         from app.services.knowledge.utils.pdf_page_splitter import PDFPageSplitter
         import time
         
-        print(f"💎 強化キャッシュシステムでPDF処理開始: {file_name}")
+        log_proofreading_info(f"強化キャッシュシステムでPDF処理開始: {file_name}")
         
+        # ハッシュは入口で一度だけ計算し、全文書キャッシュの照合・保存と
+        # ページ鍵の導出（parent_hash）で使い回す
+        parent_hash = self.cache._get_file_hash(file_bytes)
+
         # まず全文書レベルのキャッシュをチェック
-        full_doc_cached_result = self.cache.get_full_document_cache(file_bytes, file_name)
+        full_doc_cached_result = self.cache.get_full_document_cache(
+            file_bytes, file_name, file_hash=parent_hash
+        )
         if full_doc_cached_result is not None:
-            print(f"🎯 全文書キャッシュヒット: {file_name}")
+            log_proofreading_info(f"全文書キャッシュヒット: {file_name}")
             return full_doc_cached_result
         
         # 全文書キャッシュがない場合、ページ分割して個別キャッシュをチェック
         splitter = PDFPageSplitter()
         pdf_info = splitter.get_pdf_info(file_bytes)
-        print(f"PDF情報: {pdf_info['page_count']} ページ - {file_name}")
+        log_proofreading_info(f"PDF情報: {pdf_info['page_count']} ページ - {file_name}")
         
         # PDFを個別ページに分割
         pages_data = splitter.split_pdf_to_pages(file_bytes, file_name)
-        parent_hash = self.cache._get_file_hash(file_bytes)
         
         # 各ページを処理（キャッシュチェック + 必要に応じてAPI呼び出し）
-        pages_content = []
-        total_processing_time = 0.0
-        
-        for page_data in pages_data:
+        # ページ間に依存はなくDI呼び出しはI/O待ちが支配的なため、
+        # スレッドプールで並列化する（キャッシュはロックでスレッド安全）
+        def _process_page(page_data):
             page_number = page_data["page_number"]
             page_bytes = page_data["page_bytes"]
             page_file_name = page_data["page_file_name"]
@@ -173,11 +341,10 @@ class AzureDocumentIntelligenceClient:
             
             if cached_page_content is not None:
                 # キャッシュヒット
-                pages_content.append(cached_page_content)
-                continue
+                return cached_page_content, None, 0.0
             
             # キャッシュミス: Document Intelligence API呼び出し
-            print(f"🔄 ページ {page_number} を Document Intelligence で処理中...")
+            log_proofreading_debug(f"ページ {page_number} を Document Intelligence で処理中")
             
             try:
                 # Document Intelligence で処理
@@ -188,20 +355,19 @@ class AzureDocumentIntelligenceClient:
                 )
                 result = poller.result()
                 
-                # ページ内容を抽出
-                page_content = ""
-                if hasattr(result, 'content') and result.content:
-                    page_content = result.content.strip()
-                elif hasattr(result, 'pages') and result.pages:
-                    for page in result.pages:
-                        if hasattr(page, 'lines') and page.lines:
-                            for line in page.lines:
-                                if hasattr(line, 'content'):
-                                    page_content += line.content + "\n"
-                    page_content = page_content.strip()
+                # ページ内容を抽出（_analyze_page と同じく getattr の既定値で
+                # 欠損ケースを吸収し、行ごとの hasattr を省く）
+                content = getattr(result, 'content', None)
+                if content:
+                    page_content = content.strip()
+                else:
+                    page_content = "\n".join(
+                        line.content
+                        for page in getattr(result, 'pages', None) or ()
+                        for line in getattr(page, 'lines', None) or ()
+                    ).strip()
                 
                 processing_time = time.time() - start_time
-                total_processing_time += processing_time
                 
                 if page_content:
                     page_result = {
@@ -211,28 +377,46 @@ class AzureDocumentIntelligenceClient:
                         "page_file_name": page_file_name
                     }
                     
-                    pages_content.append(page_result)
-                    
-                    # 個別ページキャッシュに保存
-                    self.cache.save_page_cache(
+                    log_proofreading_debug(f"ページ {page_number} 処理完了 ({processing_time:.2f}秒)")
+                    cache_entry = (
                         page_bytes, file_name, page_number, parent_hash,
                         page_result, processing_time
                     )
-                    
-                    print(f"✅ ページ {page_number} 処理完了 ({processing_time:.2f}秒)")
-                else:
-                    print(f"⚠️ ページ {page_number} にコンテンツがありませんでした")
+                    return page_result, cache_entry, processing_time
+                
+                log_proofreading_debug(f"ページ {page_number} にコンテンツがありませんでした")
+                return None, None, processing_time
                     
             except Exception as e:
-                print(f"❌ ページ {page_number} の処理中にエラー: {e}")
-                continue
+                log_proofreading_error(f"ページ {page_number} の処理中にエラー", e)
+                return None, None, 0.0
         
-        print(f"📊 処理完了: {len(pages_content)} ページ (総処理時間: {total_processing_time:.2f}秒)")
+        with ThreadPoolExecutor(max_workers=DI_PAGE_MAX_WORKERS) as executor:
+            outcomes = list(executor.map(_process_page, pages_data))
+        
+        # executor.map は入力順を保つため、ページ順はそのまま維持される
+        pages_content = []
+        new_page_entries = []  # 新規処理ページ（処理後に一括キャッシュ保存）
+        total_processing_time = 0.0
+        for page_result, cache_entry, processing_time in outcomes:
+            total_processing_time += processing_time
+            if page_result is not None:
+                pages_content.append(page_result)
+            if cache_entry is not None:
+                new_page_entries.append(cache_entry)
+        
+        # 新規処理したページを1トランザクションでキャッシュに保存
+        # （ページごとのコミットだと fsync がページ数分発生する）
+        if new_page_entries:
+            self.cache.save_page_cache_batch(new_page_entries)
+        
+        log_proofreading_info(f"処理完了: {len(pages_content)} ページ (総処理時間: {total_processing_time:.2f}秒)")
         
         # 全文書キャッシュとして保存（将来の高速化のため）
         if pages_content:
             self.cache.save_full_document_cache(
-                file_bytes, file_name, pages_content, total_processing_time
+                file_bytes, file_name, pages_content, total_processing_time,
+                file_hash=parent_hash
             )
         
         return pages_content
@@ -277,14 +461,15 @@ class AzureDocumentIntelligenceClient:
             self.cache.cleanup_old_cache(days)      
 
 class AzureOpenAIClient:
-    def __init__(self,tools: List[BaseTool] | None = None):
+    def __init__(self, tools: List[BaseTool] | None = None, model_name: str = "gpt-4.1-mini"):
         # ★ 1) max_completion_tokens で“書き過ぎ”ブロック
         # ★ 2) tools / tool_choice をその場で bind できるようにする
         self.client = ChatOpenAI(
             api_key=os.getenv("AZURE_OPENAI_KEY"),
-            model_name="gpt-4.1-mini",
+            model_name=model_name,
             temperature=0,
             max_completion_tokens=4096,
+            http_client=_get_shared_http_client(),
         )
         if tools:                          # tools が渡されていたら即 bind
             self.client = self.client.bind(
@@ -295,12 +480,56 @@ class AzureOpenAIClient:
     def get_openai_client(self) -> ChatOpenAI:
         return self.client
 
+@lru_cache(maxsize=1)
+def _get_shared_embeddings_client() -> OpenAIEmbeddings:
+    """
+    プロセス内で共有する埋め込みクライアントを取得（遅延生成）
+
+    VectorStoreService と ChromaDBClient がそれぞれ生成すると、
+    資格情報の解析とHTTPセッション構築をサービス生成のたびに払う
+    ことになるため、1インスタンスを使い回す（クライアントは状態を
+    持たずスレッドセーフ）。
+    """
+    return OpenAIEmbeddings(
+        api_key=os.getenv("AZURE_OPENAI_KEY"),
+        model=EMBEDDING_MODEL,
+        dimensions=EMBEDDING_DIMENSIONS,
+        # Azure OpenAI の埋め込みは1リクエスト2048入力まで受け付けるため、
+        # 既定(1000)より大きく取って embed_documents のHTTPS往復を減らす
+        chunk_size=2048,
+        max_retries=6,
+        request_timeout=60,
+        http_client=_get_shared_http_client(),
+    )
+
+
+@lru_cache(maxsize=1)
+def _get_shared_chroma_client() -> Chroma:
+    """
+    プロセス内で共有するChromaクライアントを取得（遅延生成）
+
+    永続化ディレクトリを開き直すコストとコレクションハンドルの
+    重複を避けるため、1インスタンスを使い回す。
+    """
+    # ChromaはHNSWインデックスを内蔵しているため、フラットスキャンへの
+    # フォールバックはない。コレクション作成時にHNSWパラメータを指定して
+    # 再現率とレイテンシのバランスを調整する（既存コレクションには
+    # 作成時の値が使われる）
+    return Chroma(
+        collection_name="knowledge_base_db",
+        persist_directory="chroma_db",
+        embedding_function=_get_shared_embeddings_client(),
+        collection_metadata={
+            "hnsw:space": HNSW_SPACE,
+            "hnsw:construction_ef": HNSW_CONSTRUCTION_EF,
+            "hnsw:search_ef": HNSW_SEARCH_EF,
+        },
+    )
+
+
 class AzureOpenAIEmbeddings:
     def __init__(self):
-        self.client = OpenAIEmbeddings(
-            api_key=os.getenv("AZURE_OPENAI_KEY"),
-            model="text-embedding-ada-002",
-        )
+        self.client = _get_shared_embeddings_client()
 
     def get_openai_embeddings(self) -> OpenAIEmbeddings:
         return self.client
@@ -308,12 +537,7 @@ class AzureOpenAIEmbeddings:
 
 class ChromaDBClient:
     def __init__(self):
-        azure_embeddings_client = AzureOpenAIEmbeddings()
-        self.client = Chroma(
-            collection_name="knowledge_base_db",
-            persist_directory="chroma_db",
-            embedding_function=azure_embeddings_client.get_openai_embeddings(),
-        )
+        self.client = _get_shared_chroma_client()
 
     def get_chroma_client(self) -> Chroma:
         return self.client
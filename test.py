@@ -1,5 +1,6 @@
 import os.path
 import io
+from concurrent.futures import ThreadPoolExecutor
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
@@ -40,50 +41,69 @@ def download_folder_contents(folder_id, output_dir):
             os.makedirs(output_dir)
             
         # List all files in the folder
-        results = service.files().list(
-            q=f"'{folder_id}' in parents",
-            fields="nextPageToken, files(id, name, mimeType)"
-        ).execute()
-        
-        items = results.get("files", [])
+        # 1回の list 呼び出しでは大きなフォルダが途中で切れるため、
+        # nextPageToken でページを辿り切る（pageSize=1000 はAPI上限）。
+        # fields も必要な項目だけに絞ってレスポンスを小さくする。
+        items = []
+        page_token = None
+        while True:
+            results = service.files().list(
+                q=f"'{folder_id}' in parents",
+                fields="nextPageToken, files(id, name, mimeType, size)",
+                pageSize=1000,
+                pageToken=page_token,
+            ).execute()
+            items.extend(results.get("files", []))
+            page_token = results.get("nextPageToken")
+            if not page_token:
+                break
         
         if not items:
             print("No files found in the folder.")
             return
             
         print(f"Found {len(items)} files. Starting download...")
-        
-        for item in items:
+
+        def _download_one(item):
             file_id = item['id']
             file_name = item['name']
             mime_type = item['mimeType']
-            
+
             # Skip Google Docs/Sheets/Slides files
             if mime_type.startswith('application/vnd.google-apps'):
                 print(f"Skipping Google Workspace file: {file_name}")
-                continue
-                
+                return
+
             print(f"Downloading: {file_name}")
-            
+
             request = service.files().get_media(fileId=file_id)
-            fh = io.BytesIO()
-            downloader = MediaIoBaseDownload(fh, request)
-            
-            done = False
-            while done is False:
-                status, done = downloader.next_chunk()
-                print(f"Download {int(status.progress() * 100)}%")
-                
-            # Save the file
             file_path = os.path.join(output_dir, file_name)
-            with open(file_path, 'wb') as f:
-                f.write(fh.getvalue())
-                
+
+            # ファイル全体を BytesIO に貯めてから書き出すとピークメモリが
+            # ファイルサイズ分増えるため、出力ファイルへ直接ストリームする。
+            # チャンクサイズも既定(100KiB)から8MiBへ拡大してHTTPS往復を減らす。
+            with open(file_path, 'wb') as fh:
+                downloader = MediaIoBaseDownload(fh, request, chunksize=8 * 1024 * 1024)
+                done = False
+                while done is False:
+                    status, done = downloader.next_chunk()
+                    print(f"Download {int(status.progress() * 100)}%")
+
+        # 各ファイルのダウンロードは独立したHTTPSストリームなので、
+        # 逐次ではなくスレッドプールで並列に取得する
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            list(executor.map(_download_one, items))
+
         print("Download completed!")
         
     except HttpError as error:
         print(f"An error occurred: {error}")
 
+# LatexTextSplitter は構築時にLaTeX区切りのパターン群を組み立てるため、
+# ファイルごとに作り直さずモジュールレベルの1インスタンスを使い回す
+_LATEX_SPLITTER = LatexTextSplitter(chunk_size=500, chunk_overlap=200)
+
+
 def chunking_tex(tex_file: str) -> list[str]:
     """
     テキストファイルをチャンク分割する。
@@ -92,10 +112,7 @@ def chunking_tex(tex_file: str) -> list[str]:
     """
     with open(tex_file, "r") as f:
         tex_file = f.read()
-    splitter = LatexTextSplitter(chunk_size=500, chunk_overlap=200)
-    chunks = splitter.split_text(tex_file)
-    print("chunks:", chunks)
-    return chunks
+    return _LATEX_SPLITTER.split_text(tex_file)
 
 
 import re
@@ -105,23 +122,75 @@ SECTION_RE = re.compile(
     flags=re.IGNORECASE
 )
 
+# 呼び出しのたびに re.compile（と動的なパターン文字列の組み立て）を
+# 繰り返さないよう、固定パターンはモジュールロード時に一度だけコンパイルする
+_DOC_BODY_RE = re.compile(r"\\begin\{document\}(.*?)\\end\{document\}", re.DOTALL)
+
+# \section コマンドのパターン。アスタリスク付き、オプション引数も考慮。
+# キャプチャグループ:
+# 1: \sectionコマンド全体 (例: \section*{My Title} や \section[short]{My Title})
+# 2: タイトルの波括弧の中身 (例: My Title や My \textbf{Title})
+#    ネストした波括弧にも対応: ([^{}]*(?:\{[^{}]*\}[^{}]*)*)
+_SECTION_SPLIT_RE = re.compile(
+    r"(\\section\*?(?:\[[^\]]*\])?\{([^{}]*(?:\{[^{}]*\}[^{}]*)*)\})"
+)
+
+# LaTeXの改行コマンド (\\ や \newline)
+_NEWLINE_CMD_RE = re.compile(r"\\\\(?:\[[^\]]*\])?|\\newline")
+
+# 一般的な書式設定コマンド（中身のテキストは残す）
+# 必要に応じてこのリストは拡張してください
+_FORMATTING_COMMANDS = [
+    'textbf', 'textit', 'texttt', 'emph', 'textsl', 'textsc', 'textnormal',
+    'bf', 'it', 'tt', 'rm', 'sf', 'sc', 'ul', # 古い形式のコマンド
+    'MakeUppercase', 'MakeLowercase', 'uppercase', 'lowercase'
+]
+# 全コマンドを1つの選択肢パターンにまとめ、タイトルを1回走査するだけで
+# \cmd{content} -> content / 裸の \cmd -> 除去 の両方を処理する
+# （コマンドごとに re.sub を2回ずつ呼ぶとタイトルを34回走査することになる）
+_FMT_CMD_RE = re.compile(
+    r'\\(?:' + '|'.join(_FORMATTING_COMMANDS) + r')'
+    r'(?:\{([^{}]*(?:\{[^{}]*\}[^{}]*)*)\}|(?=\s|$))'
+)
+
+# LaTeXの一般的なエスケープ文字 -> 通常の文字 (簡易版)
+_LATEX_ESCAPES = {
+    r"\\%": "%", r"\\&": "&", r"\\#": "#", r"\\_": "_", r"~": " ",
+    r"\\,": " ", r"\\thinspace": " ", r"\\enspace": " ", r"\\quad": " ", r"\\qquad": " ",
+    r"\\{": "{", r"\\}": "}", r"\\\$": "$", # これらは文脈に注意が必要
+    r"``": '"', r"''": '"', r"`": "'"
+}
+
+_EMPTY_BRACES_RE = re.compile(r"\{\s*\}")
+_EMPTY_BRACKETS_RE = re.compile(r"\[\s*\]")
+_WHITESPACE_RE = re.compile(r'\s+')
+
 def _ensure_str(data: Union[str, bytes]) -> str:
     """bytes → str を安全に変換（UTF-8→Shift-JISフォールバック）"""
     if isinstance(data, str):
         return data
-    for enc in ("utf-8", "utf-8-sig", "shift_jis", "cp932"):
+    # BOM があればコーデックは確定するので、総当たりせず直接デコードする
+    if data[:3] == b"\xef\xbb\xbf":
+        return data.decode("utf-8-sig")
+    # 入力の大半は UTF-8 なので、まず1回のスキャンで決着させる
+    # （失敗したときだけ日本語系コーデックへフォールバック）
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        pass
+    for enc in ("shift_jis", "cp932"):
         try:
             return data.decode(enc)
         except UnicodeDecodeError:
             continue
-    return data.decode("utf-8", errors="replace") 
+    return data.decode("utf-8", errors="replace")
 
 def get_document_body(latex_string):
     """
     LaTeX文字列から \\begin{document} と \\end{document} の間の内容を抽出します。
     見つからない場合は None を返します。
     """
-    match = re.search(r"\\begin\{document\}(.*?)\\end\{document\}", latex_string, re.DOTALL)
+    match = _DOC_BODY_RE.search(latex_string)
     if match:
         return match.group(1)
     else:
@@ -141,43 +210,33 @@ def clean_section_title(raw_title_content):
     title = raw_title_content
     
     # LaTeXの改行コマンド (\\ や \newline) をスペースに置換
-    title = re.sub(r"\\\\(?:\[[^\]]*\])?|\\newline", " ", title)
+    title = _NEWLINE_CMD_RE.sub(" ", title)
 
     # 一般的な書式設定コマンドを除去（中身のテキストは残す）
-    # 必要に応じてこのリストは拡張してください
-    formatting_commands = [
-        'textbf', 'textit', 'texttt', 'emph', 'textsl', 'textsc', 'textnormal',
-        'bf', 'it', 'tt', 'rm', 'sf', 'sc', 'ul', # 古い形式のコマンド
-        'MakeUppercase', 'MakeLowercase', 'uppercase', 'lowercase'
-    ]
-    for cmd in formatting_commands:
-        # \cmd{content} -> content
-        title = re.sub(r'\\' + cmd + r'\{([^{}]*(?:\{[^{}]*\}[^{}]*)*)\}', r'\1', title)
-        # \cmd (後にスペースか行末が続く場合) -> 空白 (コマンド自体を除去)
-        title = re.sub(r'\\' + cmd + r'(?=\s|$)', '', title)
+    # ネストしたコマンド (\textbf{\emph{x}} など) は外側から順に剥がれるため、
+    # 変化しなくなるまで繰り返す（通常は1〜2回で収束する）
+    while True:
+        stripped = _FMT_CMD_RE.sub(lambda m: m.group(1) or '', title)
+        if stripped == title:
+            break
+        title = stripped
 
     # LaTeXの数学モードのデリミタ ($...$, $$...$$ など) や特殊な記号コマンドはここでは単純除去していません。
     # タイトル内に複雑なLaTeX表現がある場合は、より高度な処理が必要です。
 
     # LaTeXの一般的なエスケープ文字を通常の文字に戻す (簡易版)
-    latex_escapes = {
-        r"\\%": "%", r"\\&": "&", r"\\#": "#", r"\\_": "_", r"~": " ",
-        r"\\,": " ", r"\\thinspace": " ", r"\\enspace": " ", r"\\quad": " ", r"\\qquad": " ",
-        r"\\{": "{", r"\\}": "}", r"\\\$": "$", # これらは文脈に注意が必要
-        r"``": '"', r"''": '"', r"`": "'"
-    }
-    for tex_char, normal_char in latex_escapes.items():
+    for tex_char, normal_char in _LATEX_ESCAPES.items():
         title = title.replace(tex_char, normal_char)
     
     # 残っているかもしれない単純なコマンド (例: \LaTeX) は、ここでは除去しません。
     # 必要であれば追加: title = re.sub(r'\\[a-zA-Z@]+', '', title)
 
     # 空の波括弧などを除去
-    title = re.sub(r"\{\s*\}", "", title)
-    title = re.sub(r"\[\s*\]", "", title)
+    title = _EMPTY_BRACES_RE.sub("", title)
+    title = _EMPTY_BRACKETS_RE.sub("", title)
 
     # 連続する空白を一つにまとめ、前後の空白を除去
-    title = re.sub(r'\s+', ' ', title).strip()
+    title = _WHITESPACE_RE.sub(' ', title).strip()
     
     return title
 
@@ -190,50 +249,37 @@ def split_tex_by_section(latex_string):
     if document_body is None:
         return []
 
-    # \section コマンドのパターン。アスタリスク付き、オプション引数も考慮。
-    # キャプチャグループ:
-    # 1: \sectionコマンド全体 (例: \section*{My Title} や \section[short]{My Title})
-    # 2: タイトルの波括弧の中身 (例: My Title や My \textbf{Title})
-    #    ネストした波括弧にも対応: ([^{}]*(?:\{[^{}]*\}[^{}]*)*)
-    section_pattern = r"(\\section\*?(?:\[[^\]]*\])?\{([^{}]*(?:\{[^{}]*\}[^{}]*)*)\})"
-    
-    # re.splitは、パターンにマッチした部分と、それによって区切られた部分を交互にリストにします。
-    # パターン内にキャプチャグループがあると、そのグループの内容もリストに含まれます。
-    # parts の構造: [text_before_sec1, sec1_full_cmd, sec1_title_content, text_after_sec1, sec2_full_cmd, sec2_title_content, ...]
-    parts = re.split(section_pattern, document_body)
-    
+    # re.split だとキャプチャグループ込みの3つ組リストを丸ごと構築することに
+    # なるため、finditer でマッチ位置だけ求め、本文はスライスで切り出します。
+    # （split_latex_by_section と同じ方式。走査は1回で済みます）
+    matches = list(_SECTION_SPLIT_RE.finditer(document_body))
+
     extracted_sections = []
-    
-    # 最初の \section より前の部分 (parts[0])
+
+    # 最初の \section より前の部分
     # これを「導入部」または「アブストラクト」などとして扱います。
-    if parts and parts[0].strip():
+    preamble_end = matches[0].start() if matches else len(document_body)
+    preamble = document_body[:preamble_end].strip()
+    if preamble:
         extracted_sections.append({
             'section_command_raw': None,    # \section コマンドではないため None
             'title_content_raw': None,      # 元のタイトル内容もない
             'title_clean': "導入部 / アブストラクト",
-            'content_raw': parts[0].strip() # 内容は生のLaTeX
+            'content_raw': preamble         # 内容は生のLaTeX
         })
-        
-    # \section コマンドで分割された部分の処理
-    # parts のインデックスは1から始まり、3つ組 (コマンド全体, タイトル内容, 後続テキスト) で進みます。
-    idx = 1
-    while idx < len(parts):
-        section_full_command = parts[idx]
-        section_title_content_raw = parts[idx+1] # 波括弧の中身
-        
-        # 次のセクションコマンドまでのテキストが、このセクションの内容になります。
-        content_after_section_raw = parts[idx+2].strip() if (idx+2) < len(parts) else ""
 
-        cleaned_title = clean_section_title(section_title_content_raw)
-        
+    # 各 \section コマンドから次のコマンドまでのテキストが、そのセクションの内容になります。
+    for i, match in enumerate(matches):
+        content_end = matches[i + 1].start() if i + 1 < len(matches) else len(document_body)
+        section_title_content_raw = match.group(2)  # 波括弧の中身
+
         extracted_sections.append({
-            'section_command_raw': section_full_command,
+            'section_command_raw': match.group(1),
             'title_content_raw': section_title_content_raw,
-            'title_clean': cleaned_title,
-            'content_raw': content_after_section_raw
+            'title_clean': clean_section_title(section_title_content_raw),
+            'content_raw': document_body[match.end():content_end].strip()
         })
-        idx += 3 # 次のセクションの組へ
-        
+
     return extracted_sections
 
 def split_latex_by_section(latex: Union[str, bytes]) -> List[str]:
@@ -257,8 +303,25 @@ def split_latex_by_section(latex: Union[str, bytes]) -> List[str]:
     return chunks
 
 def split_tex_by_langchain(latex_string):
-    splitter = LatexTextSplitter(chunk_size=500, chunk_overlap=200)
-    chunks = splitter.split_text(latex_string)
+    return _LATEX_SPLITTER.split_text(latex_string)
+
+
+def split_tex_smart(latex: Union[str, bytes], chunk_size: int = 500) -> List[str]:
+    """
+    セクション区切りを優先しつつ、長すぎるセクションだけ再分割する
+
+    split_latex_by_section の結果に LatexTextSplitter を全文へ重ねがけ
+    すると文書全体を二度走査することになるため、chunk_size を超える
+    セクションだけを再分割し、収まっているセクションはそのまま通す。
+    セクション境界を保った分、埋め込み向けにも意味的に切れ目の良い
+    チャンクになる。
+    """
+    chunks: List[str] = []
+    for section in split_latex_by_section(latex):
+        if len(section) <= chunk_size:
+            chunks.append(section)
+        else:
+            chunks.extend(_LATEX_SPLITTER.split_text(section))
     return chunks
 
 